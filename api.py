@@ -0,0 +1,307 @@
+"""
+Request handling shared by the KittenTTS servers: server.py (Flask) and
+asgi_server.py (ASGI). Handlers are framework-neutral: they take the parsed
+JSON body (or {}), the raw line text and the request headers, and return
+(payload, status, headers) for the server to send.
+"""
+
+from __future__ import annotations
+
+import math
+import threading
+from typing import Callable, Optional, Tuple
+
+import audio_format
+import metrics
+import prefork
+from speech import DEFAULT_CHANNEL, Admission, Speech
+
+Reply = Tuple[dict, int, dict]
+
+
+def error(message: str, status: int = 400, **extra) -> Reply:
+    """JSON error reply."""
+    return {"ok": False, "error": message, **extra}, status, {}
+
+
+def request_channel(data: dict, headers) -> str:
+    """Channel named in the JSON body or X-Channel header, else the default channel."""
+    channel = data.get("channel") or headers.get("X-Channel") or DEFAULT_CHANNEL
+    return str(channel).strip() or DEFAULT_CHANNEL
+
+
+def request_model(s: Speech, data: dict, headers) -> tuple[str | None, Reply | None]:
+    """
+    Model named in the JSON body or X-Model header (None: the default model).
+    Returns (model, None), or (None, error reply) for a model the server does not serve.
+    """
+    model = str(data.get("model") or headers.get("X-Model") or "").strip() or None
+    if model is not None and model not in s.models:
+        return None, error(f"Unknown model. Use one of: {s.models}")
+    return model, None
+
+
+def request_profile(s: Speech, data: dict, headers) -> tuple[str | None, Reply | None]:
+    """
+    Text preprocessing profile named in the JSON body or X-Profile header
+    (None: the server's default). Returns (profile, None), or (None, error reply).
+    """
+    profile = str(data.get("profile") or headers.get("X-Profile") or "").strip() or None
+    if profile is not None and profile not in s.profiles:
+        return None, error(f"Unknown profile. Use one of: {s.profiles}")
+    return profile, None
+
+
+def request_deadline(data: dict, headers) -> tuple[float | None, Reply | None]:
+    """
+    Deadline from the JSON "deadline_ms" key or X-Deadline-Ms header, in
+    seconds (None: no deadline). Returns (deadline, None), or (None, error reply).
+    """
+    value = data.get("deadline_ms", headers.get("X-Deadline-Ms"))
+    if value is None or value == "":
+        return None, None
+    try:
+        deadline_ms = float(value)
+    except (TypeError, ValueError):
+        return None, error("Invalid deadline_ms")
+    if not deadline_ms > 0:
+        return None, error("deadline_ms must be positive")
+    return deadline_ms / 1000.0, None
+
+
+def _flag(data: dict, key: str, headers, header: str) -> bool:
+    """Boolean option from a JSON key or a 1/true/yes header."""
+    return bool(data.get(key)) or headers.get(header, "").lower() in ("1", "true", "yes")
+
+
+def speak(s: Speech, data: dict, line: str, headers) -> Reply:
+    """
+    Admit one speech line without blocking. 200 with the line id and wait
+    estimate, 400 for malformed input, 429/503 with Retry-After when refused
+    (503 also when the line could not start playing before its deadline).
+    """
+    line = (line or "").strip()
+    if not line:
+        return error("Empty or missing speech line")
+
+    model, err = request_model(s, data, headers)
+    if err:
+        return err
+    profile, err = request_profile(s, data, headers)
+    if err:
+        return err
+    deadline, err = request_deadline(data, headers)
+    if err:
+        return err
+    channel = request_channel(data, headers)
+    barge_in = _flag(data, "barge_in", headers, "X-Barge-In")
+    admission = s.try_add_speech_line(
+        line, channel=channel, barge_in=barge_in, model=model, deadline=deadline, profile=profile
+    )
+    if admission.accepted:
+        return {
+            "ok": True,
+            "message": "Queued",
+            "line_id": admission.line_id,
+            "channel": admission.channel,
+            "queue_depth": admission.queue_depth,
+            "estimated_wait": round(admission.estimated_wait, 3),
+        }, 200, {}
+    if admission.reason == "invalid":
+        return error("Invalid format. Use: Character|speed|text")
+    return rejected(admission)
+
+
+def speak_batch(s: Speech, data: dict, lines, headers) -> Reply:
+    """
+    Admit many speech lines in one call: a JSON list of lines, or a script
+    body with one line per row (blank rows skipped). 200 with a result per
+    line when any line was queued or refused as invalid; 429/503 when the
+    queue refused all of them. Retry-After is set whenever lines were refused
+    for a full queue, so the caller can resend just those.
+
+    Lines are admitted against the channel's buffer_size like single lines,
+    so one call queues at most buffer_size minus the lines already waiting;
+    a longer script is sent in rounds as the queue drains (see
+    client.speak_batch()).
+    """
+    if isinstance(lines, str):
+        lines = [line.strip() for line in lines.splitlines() if line.strip()]
+    if not isinstance(lines, list) or not all(isinstance(line, str) for line in lines):
+        return error("'lines' must be a list of Character|speed|text strings")
+    if not lines:
+        return error("No speech lines")
+
+    model, err = request_model(s, data, headers)
+    if err:
+        return err
+    profile, err = request_profile(s, data, headers)
+    if err:
+        return err
+    deadline, err = request_deadline(data, headers)
+    if err:
+        return err
+    channel = request_channel(data, headers)
+    admissions = s.try_add_speech_lines(lines, channel=channel, model=model, deadline=deadline, profile=profile)
+    results = []
+    for admission in admissions:
+        if admission.accepted:
+            results.append({"ok": True, "line_id": admission.line_id})
+        else:
+            results.append({"ok": False, "reason": admission.reason})
+
+    refused = next((a for a in admissions if a.reason in ("full", "deadline", "channels", "stopped")), None)
+    accepted = sum(a.accepted for a in admissions)
+    if refused and not accepted and not any(a.reason == "invalid" for a in admissions):
+        return rejected(refused)
+    headers_out = {}
+    if refused:
+        headers_out["Retry-After"] = str(max(1, math.ceil(refused.estimated_wait)))
+    return {
+        "ok": accepted == len(admissions),
+        "channel": channel,
+        "accepted": accepted,
+        "results": results,
+        "queue_depth": s.queue_depth(channel),
+    }, 200, headers_out
+
+
+_REJECTED = {
+    "full": (429, "Queue full"),
+    "channels": (429, "Too many channels"),
+    "deadline": (503, "Deadline cannot be met"),
+    "stopped": (503, "Service unavailable"),
+}
+
+
+def rejected(admission: Admission) -> Reply:
+    """
+    429 when the queue is full or too many channels are open, 503 when the
+    line would miss its deadline or the server is shutting down; all carry
+    Retry-After.
+    """
+    status, message = _REJECTED.get(admission.reason, _REJECTED["stopped"])
+    payload, _, _ = error(
+        message,
+        queue_depth=admission.queue_depth,
+        estimated_wait=round(admission.estimated_wait, 3),
+    )
+    return payload, status, {"Retry-After": str(max(1, math.ceil(admission.estimated_wait)))}
+
+
+def synthesize_params(s: Speech, data: dict, headers=None) -> tuple[tuple | None, Reply | None]:
+    """
+    Validate a /synthesize body. Returns ((voice, speed, text, fmt, model, profile), None),
+    or (None, error reply). Speed follows the /speak convention (speed_offset is added).
+    """
+    text = str(data.get("text") or "").strip()
+    if not text:
+        return None, error("Empty or missing text")
+    fmt = str(data.get("format") or "wav").lower()
+    if fmt not in audio_format.FORMATS:
+        return None, error(f"Unsupported format. Use one of: {sorted(audio_format.FORMATS)}")
+    try:
+        speed = float(data.get("speed", 1.0)) + s.speed_offset
+    except (TypeError, ValueError):
+        return None, error("Invalid speed")
+    voice = str(data.get("voice") or s.default_voice).strip()
+    if voice not in s.voices:
+        voice = s.default_voice
+    model, err = request_model(s, data, headers or {})
+    if err:
+        return None, err
+    profile, err = request_profile(s, data, headers or {})
+    if err:
+        return None, err
+    return (voice, speed, text, fmt, model, profile), None
+
+
+def audio_headers(s: Speech, fmt: str) -> dict:
+    """Content-Type and X-Sample-Rate headers for a streamed audio response."""
+    return {
+        "Content-Type": audio_format.mime_type(fmt, s.sample_rate),
+        "X-Sample-Rate": str(s.sample_rate),
+    }
+
+
+class StreamSlots:
+    """
+    Cap on audio streams running at once. take() claims a slot without
+    blocking, so checking for a free slot and taking it cannot race with
+    another request.
+    """
+
+    def __init__(self, s: Speech, limit: int):
+        self.limit = limit
+        self.active = 0
+        self._lock = threading.Lock()
+        self._rejected = s.metrics.counter("kittentts_rejected_total", "Lines refused at admission", ("reason",))
+
+    def take(self) -> Optional[Callable[[], None]]:
+        """
+        Claim a slot. Returns the function that frees it (calls after the
+        first do nothing), or None when every slot is taken.
+        """
+        with self._lock:
+            if self.active >= self.limit:
+                return None
+            self.active += 1
+        released = False
+
+        def release() -> None:
+            nonlocal released
+            with self._lock:
+                if not released:
+                    released = True
+                    self.active -= 1
+
+        return release
+
+    def refused(self) -> Reply:
+        """429 reply for a stream over the cap, counted as a "streams" rejection."""
+        self._rejected.inc(1.0, "streams")
+        payload, status, _ = error("Too many streams", 429)
+        return payload, status, {"Retry-After": "1"}
+
+
+def cancel(s: Speech, data: dict, headers) -> Reply:
+    """Cancel one queued line; 404 if it is unknown or already played."""
+    try:
+        line_id = int(data["line_id"])
+    except (KeyError, TypeError, ValueError):
+        return error("Missing or invalid line_id")
+
+    channel = request_channel(data, headers)
+    if s.cancel(line_id, channel=channel):
+        return {"ok": True, "line_id": line_id, "channel": channel}, 200, {}
+    return error("Line not queued", 404, line_id=line_id, channel=channel)
+
+
+def cancel_channel(s: Speech, data: dict, headers) -> Reply:
+    """Cancel every line queued in a channel."""
+    channel = request_channel(data, headers)
+    cancelled = s.cancel_channel(channel)
+    return {"ok": True, "channel": channel, "cancelled": cancelled}, 200, {}
+
+
+def health(s: Speech | None = None) -> Reply:
+    """Health check with coalescing and preprocessing cache stats, plus micro-batching and model pool stats when those are on."""
+    payload = {"ok": True, "service": "KittenTTS"}
+    if s:
+        payload["models"] = s.models
+        payload["profiles"] = {"default": s.preprocess_profile, "available": s.profiles}
+        payload["coalescing"] = s.coalescing_stats()
+        payload["preprocess_cache"] = s.preprocess_stats()
+        for key, stats in (("batching", s.batch_stats()), ("model_pool", s.model_stats())):
+            if stats:
+                payload[key] = stats
+    return payload, 200, {}
+
+
+def metrics_text(s: Speech, worker: prefork.Worker | None = None) -> tuple[str, dict]:
+    """
+    Prometheus exposition of the pipeline metrics, with its Content-Type header.
+    In a pre-forked server (`worker` set) every worker's metrics are merged.
+    """
+    body = worker.merged_metrics(s.metrics) if worker else s.metrics.render()
+    return body, {"Content-Type": metrics.CONTENT_TYPE}
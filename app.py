@@ -3,6 +3,8 @@ KittenTTS script runner: loads a script file and speaks all lines via the Speech
 Run directly with optional startup parameters, or uses defaults.
 """
 
+from __future__ import annotations
+
 import argparse
 import os
 
@@ -0,0 +1,450 @@
+"""
+KittenTTS ASGI server: the same API as server.py, served from an asyncio event
+loop (Starlette + uvicorn) instead of a thread per request.
+
+Connections, including slow /synthesize streams, wait on the event loop;
+synthesis runs on the Speech worker pool (onnxruntime releases the GIL while
+it computes). At most --max-streams /synthesize responses and /ws sessions
+run at once; beyond that the server refuses straight away (429) instead of
+queueing the connection.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import itertools
+import json
+from collections import deque
+
+import uvicorn
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse, Response, StreamingResponse
+from starlette.routing import Route, WebSocketRoute
+from starlette.websockets import WebSocket, WebSocketDisconnect
+
+import api
+import audio_format
+import prefork
+from kittentts import ModelFiles
+from kittentts.preprocess import DEFAULT_PROFILE, PROFILES
+from speech import SentenceSegmenter, Speech
+
+speech: Speech | None = None
+stream_slots: api.StreamSlots | None = None
+session_ids = itertools.count(1)
+worker: prefork.Worker | None = None    # set in pre-forked workers
+
+
+def get_speech() -> Speech:
+    """The shared Speech instance; init_speech() must have run."""
+    if speech is None:
+        raise RuntimeError("Speech not initialized. Call init_speech() at startup.")
+    return speech
+
+
+def _reply(reply: api.Reply) -> JSONResponse:
+    """Starlette response for an api handler's (payload, status, headers)."""
+    payload, status, headers = reply
+    return JSONResponse(payload, status_code=status, headers=headers)
+
+
+async def _json_body(request: Request, key: str | None = None) -> dict:
+    """
+    JSON object body, or {} if the body is missing or not a JSON object.
+    With key, any other JSON value comes back as {key: value}.
+    """
+    try:
+        data = json.loads(await request.body() or b"{}")
+    except ValueError:
+        return {}
+    if isinstance(data, dict):
+        return data
+    return {key: data} if key else {}
+
+
+async def speak(request: Request) -> JSONResponse:
+    """POST /speak: plain text or JSON {'line': ...}; see server.speak()."""
+    data = {}
+    if request.headers.get("content-type", "").startswith("application/json"):
+        data = await _json_body(request)
+        line = data.get("line", "")
+    else:
+        line = (await request.body()).decode("utf-8", errors="replace")
+    return _reply(api.speak(get_speech(), data, line, request.headers))
+
+
+async def speak_batch(request: Request) -> JSONResponse:
+    """POST /speak_batch: JSON {'lines': [...]} or [...], or a plain-text script; see server.speak_batch()."""
+    data = {}
+    if request.headers.get("content-type", "").startswith("application/json"):
+        data = await _json_body(request, "lines")
+        lines = data.get("lines")
+    else:
+        lines = (await request.body()).decode("utf-8", errors="replace")
+    return _reply(api.speak_batch(get_speech(), data, lines, request.headers))
+
+
+async def synthesize(request: Request):
+    """POST /synthesize: stream audio back sentence by sentence; see server.synthesize()."""
+    s = get_speech()
+    params, err = api.synthesize_params(s, await _json_body(request), request.headers)
+    if err:
+        return _reply(err)
+    voice, speed, text, fmt, model, profile = params
+
+    release = stream_slots.take()
+    if release is None:
+        return _reply(stream_slots.refused())
+
+    async def body():
+        try:
+            if fmt == "wav":
+                yield audio_format.wav_header(s.sample_rate)
+            async for audio in s.astream(voice, speed, text, model=model, profile=profile):
+                yield audio_format.pcm16_bytes(audio)
+        finally:
+            release()
+
+    return _SlotStreamingResponse(body(), release, headers=api.audio_headers(s, fmt))
+
+
+class _SlotStreamingResponse(StreamingResponse):
+    """StreamingResponse that frees its stream slot once sent, also when the client left before the body started."""
+
+    def __init__(self, content, release, **kwargs):
+        super().__init__(content, **kwargs)
+        self.release = release
+
+    async def __call__(self, scope, receive, send) -> None:
+        try:
+            await super().__call__(scope, receive, send)
+        finally:
+            self.release()
+
+
+async def cancel(request: Request) -> JSONResponse:
+    """POST /cancel: cancel one queued line."""
+    return _reply(api.cancel(get_speech(), await _json_body(request), request.headers))
+
+
+async def cancel_channel(request: Request) -> JSONResponse:
+    """POST /cancel_channel: cancel every line queued in a channel."""
+    return _reply(api.cancel_channel(get_speech(), await _json_body(request), request.headers))
+
+
+async def metrics(request: Request) -> Response:
+    """GET /metrics: Prometheus text format."""
+    body, headers = api.metrics_text(get_speech(), worker)
+    return Response(body, headers=headers)
+
+
+async def health(request: Request) -> JSONResponse:
+    """GET /health."""
+    return _reply(api.health(speech))
+
+
+class _FrameSink:
+    """Channel sink for a WebSocket session: tags each clip with the session generation it belongs to."""
+
+    def __init__(self, put, generation: int):
+        self.put = put
+        self.generation = generation
+
+    def __call__(self, audio_data, sample_rate: int) -> None:
+        self.put((self.generation, audio_data))
+
+    def skip(self, line: int) -> None:
+        self.put((self.generation, None))
+
+
+class SpeakSession:
+    """
+    One /ws connection. Text fragments are split into sentences as they
+    complete and queued on a private channel, at most buffer_size in flight;
+    each sentence's audio goes back as one binary PCM16 frame, in order.
+    A cancel retires the channel and starts a new generation on a fresh one,
+    so audio still in flight for the old text is dropped.
+    """
+
+    def __init__(self, s: Speech, websocket: WebSocket):
+        self.s = s
+        self.websocket = websocket
+        self.voice = s.default_voice
+        self.speed = 1.0 + s.speed_offset
+        self.model: str | None = None
+        self.profile: str | None = None
+        self.segmenter = SentenceSegmenter()
+        self.id = next(session_ids)
+        self.generation = 0
+        self.channel = ""
+        self.waiting: deque[tuple] = deque()                    # (voice, speed, text, model, profile) not yet submitted
+        self.submitted = self.received = 0
+        self.flush_marks: deque[int] = deque()                  # sentence counts that end a flush
+        self.clips: asyncio.Queue = asyncio.Queue()
+        self.loop = asyncio.get_running_loop()
+
+    def _put(self, item) -> None:
+        # Called from the player thread; the loop may already be gone
+        try:
+            self.loop.call_soon_threadsafe(self.clips.put_nowait, item)
+        except RuntimeError:
+            pass
+
+    def _open_channel(self) -> None:
+        self.generation += 1
+        self.channel = f"ws-{self.id}.{self.generation}"
+        self.s.channel(self.channel, sink=_FrameSink(self._put, self.generation))
+        self.waiting.clear()
+        self.flush_marks.clear()
+        self.submitted = self.received = 0
+
+    def _close_channel(self) -> None:
+        self.s.cancel_channel(self.channel)
+        self.s.close_channel(self.channel)
+
+    async def run(self) -> None:
+        await self.websocket.accept()
+        # A session holds a channel and its player thread, so it counts against --max-streams
+        release = stream_slots.take()
+        if release is None:
+            payload, _, _ = stream_slots.refused()
+            await self.websocket.send_json({"type": "error", "error": payload["error"]})
+            await self.websocket.close(code=1013)   # Try Again Later
+            return
+        try:
+            await self._session()
+        finally:
+            release()
+
+    async def _session(self) -> None:
+        self._open_channel()
+        sender = asyncio.create_task(self._send_audio())
+        try:
+            await self.websocket.send_json({
+                "type": "ready",
+                "format": "pcm16",
+                "sample_rate": self.s.sample_rate,
+                "voice": self.voice,
+                "speed": round(self.speed - self.s.speed_offset, 3),
+            })
+            await self._receive()
+        except WebSocketDisconnect:
+            pass
+        finally:
+            sender.cancel()
+            self._close_channel()
+
+    async def _receive(self) -> None:
+        """Handle client messages until the client disconnects."""
+        while True:
+            message = await self.websocket.receive()
+            if message["type"] == "websocket.disconnect":
+                return
+            text = message.get("text")
+            if text is None:
+                await self.websocket.send_json({"type": "error", "error": "Send text frames"})
+                continue
+            try:
+                msg = json.loads(text)
+            except ValueError:
+                msg = None
+            if not isinstance(msg, dict):
+                msg = {"type": "text", "text": text}
+
+            kind = msg.get("type")
+            if kind == "text":
+                self._add(self.segmenter.feed(str(msg.get("text") or "")))
+            elif kind == "config":
+                await self._configure(msg)
+            elif kind == "flush":
+                self._add(self.segmenter.flush())
+                self.flush_marks.append(self.submitted + len(self.waiting))
+                await self._report_flushes()
+            elif kind == "cancel":
+                self._close_channel()
+                self.segmenter.reset()
+                self._open_channel()
+                await self.websocket.send_json({"type": "cancelled"})
+            else:
+                await self.websocket.send_json({"type": "error", "error": f"Unknown message type: {kind}"})
+
+    async def _configure(self, msg: dict) -> None:
+        """Voice, speed, model and preprocessing profile for sentences completed from now on."""
+        model = str(msg.get("model") or self.model or "").strip() or None
+        if model is not None and model not in self.s.models:
+            await self.websocket.send_json({"type": "error", "error": f"Unknown model: {model}"})
+            return
+        profile = str(msg.get("profile") or self.profile or "").strip() or None
+        if profile is not None and profile not in self.s.profiles:
+            await self.websocket.send_json({"type": "error", "error": f"Unknown profile: {profile}"})
+            return
+        voice = str(msg.get("voice") or self.voice).strip()
+        if voice not in self.s.voices:
+            await self.websocket.send_json({"type": "error", "error": f"Unknown voice: {voice}"})
+            return
+        try:
+            speed = float(msg["speed"]) + self.s.speed_offset if "speed" in msg else self.speed
+        except (TypeError, ValueError):
+            await self.websocket.send_json({"type": "error", "error": "Invalid speed"})
+            return
+        self.voice, self.speed, self.model, self.profile = voice, speed, model, profile
+
+    def _add(self, sentences: list[str]) -> None:
+        for sentence in sentences:
+            self.waiting.append((self.voice, self.speed, sentence, self.model, self.profile))
+        self._pump()
+
+    def _pump(self) -> None:
+        """Submit waiting sentences while fewer than buffer_size are in flight."""
+        while self.waiting and self.submitted - self.received < self.s.buffer_size:
+            voice, speed, text, model, profile = self.waiting[0]
+            admission = self.s.try_add_speech_line_parts(
+                voice, speed, text, channel=self.channel, model=model, profile=profile
+            )
+            if not admission.accepted:
+                break
+            self.waiting.popleft()
+            self.submitted += 1
+
+    async def _report_flushes(self) -> None:
+        while self.flush_marks and self.flush_marks[0] <= self.received:
+            self.flush_marks.popleft()
+            await self.websocket.send_json({"type": "flushed"})
+
+    async def _send_audio(self) -> None:
+        """Forward each sentence's audio, in order, as a binary frame."""
+        while True:
+            generation, audio = await self.clips.get()
+            if generation != self.generation:
+                continue
+            self.received += 1
+            if audio is not None:
+                await self.websocket.send_bytes(audio_format.pcm16_bytes(audio))
+            self._pump()
+            await self._report_flushes()
+
+
+async def speak_ws(websocket: WebSocket) -> None:
+    """WebSocket /ws: text fragments and control messages in, PCM16 audio frames out."""
+    await SpeakSession(get_speech(), websocket).run()
+
+
+app = Starlette(routes=[
+    Route("/speak", speak, methods=["POST"]),
+    Route("/speak_batch", speak_batch, methods=["POST"]),
+    Route("/synthesize", synthesize, methods=["POST"]),
+    Route("/cancel", cancel, methods=["POST"]),
+    Route("/cancel_channel", cancel_channel, methods=["POST"]),
+    Route("/metrics", metrics, methods=["GET"]),
+    Route("/health", health, methods=["GET"]),
+    WebSocketRoute("/ws", speak_ws),
+])
+
+
+def init_speech(
+    model_dir: str = "KittenML/",
+    model_name: str = "kitten-tts-nano-0.8-fp32",
+    default_voice: str = "Leo",
+    speed_offset: float = 0.2,
+    buffer_size: int = 5,
+    max_batch: int = 1,
+    batch_window_ms: float = 5.0,
+    models: list[str] | None = None,
+    model_memory_mb: float = 1024,
+    audio_cache_size: int = 16,
+    preprocess_profile: str = DEFAULT_PROFILE,
+    num_workers: int = 3,
+    max_streams: int = 32,
+    preloaded: ModelFiles | None = None,
+) -> None:
+    """Initialize the shared Speech instance and stream limit. Call before running the server."""
+    global speech, stream_slots
+    speech = Speech(
+        model_dir=model_dir,
+        model_name=model_name,
+        default_voice=default_voice,
+        speed_offset=speed_offset,
+        buffer_size=buffer_size,
+        max_batch=max_batch,
+        batch_window_ms=batch_window_ms,
+        models=models,
+        model_memory_mb=model_memory_mb,
+        dedup_cache_size=audio_cache_size,
+        preprocess_profile=preprocess_profile,
+        num_workers=num_workers,
+        preloaded=preloaded,
+    )
+    speech.start()
+    stream_slots = api.StreamSlots(speech, max_streams)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="KittenTTS ASGI API server")
+    parser.add_argument("--host", default="127.0.0.1", help="Bind host")
+    parser.add_argument("--port", type=int, default=5001, help="Bind port (5000 often used by macOS AirPlay)")
+    parser.add_argument("--model-dir", default="KittenML/", help="Model directory")
+    parser.add_argument("--model", default="kitten-tts-nano-0.8-fp32", help="Default model name")
+    parser.add_argument("--models", nargs="*", default=None, help="More models clients may pick per request (JSON 'model' or X-Model)")
+    parser.add_argument("--model-memory-mb", type=float, default=1024, help="Memory budget for the extra models; least recently used are evicted")
+    parser.add_argument("--voice", default="Leo", help="Default voice")
+    parser.add_argument("--speed-offset", type=float, default=0.2, help="Speed offset")
+    parser.add_argument("--buffer-size", type=int, default=5, help="Max lines queued before /speak answers 429")
+    parser.add_argument("--audio-cache-size", type=int, default=16, help="Recently generated clips kept for identical requests (0 = off)")
+    parser.add_argument("--profile", default=DEFAULT_PROFILE, choices=sorted(PROFILES), help="Default text preprocessing profile (JSON 'profile' or X-Profile per request)")
+    parser.add_argument("--max-batch", type=int, default=1, help="Micro-batch up to this many chunks per model call (1 = off)")
+    parser.add_argument("--batch-window-ms", type=float, default=5.0, help="How long a chunk waits for a batch to fill")
+    parser.add_argument("--workers", type=int, default=3, help="Synthesis worker threads")
+    parser.add_argument("--max-streams", type=int, default=32, help="Concurrent /synthesize streams and /ws sessions before 429 (per process)")
+    parser.add_argument("--processes", type=int, default=1, help="Pre-fork this many worker processes sharing the socket and model (1 = off)")
+    args = parser.parse_args()
+
+    options = dict(
+        model_dir=args.model_dir,
+        model_name=args.model,
+        default_voice=args.voice,
+        speed_offset=args.speed_offset,
+        buffer_size=args.buffer_size,
+        max_batch=args.max_batch,
+        batch_window_ms=args.batch_window_ms,
+        models=args.models,
+        model_memory_mb=args.model_memory_mb,
+        audio_cache_size=args.audio_cache_size,
+        preprocess_profile=args.profile,
+        num_workers=args.workers,
+        max_streams=args.max_streams,
+    )
+    if args.processes > 1:
+        serve_prefork(args.host, args.port, args.processes, options)
+        return
+
+    init_speech(**options)
+    try:
+        uvicorn.run(app, host=args.host, port=args.port)
+    finally:
+        if speech:
+            speech.shutdown()
+
+
+def serve_prefork(host: str, port: int, processes: int, options: dict) -> None:
+    """Bind and load the model once, then serve from `processes` forked workers."""
+    sock = prefork.listen(host, port)
+    files = ModelFiles(options["model_dir"] + options["model_name"])
+    print(f"Serving on http://{host}:{port}")
+
+    def serve(w: prefork.Worker) -> None:
+        global worker
+        worker = w
+        init_speech(**options, preloaded=files)
+        w.export_metrics(speech.metrics)
+        try:
+            uvicorn.Server(uvicorn.Config(app, fd=sock.fileno())).run()
+        finally:
+            speech.shutdown()
+
+    prefork.run(processes, serve)
+
+
+if __name__ == "__main__":
+    main()
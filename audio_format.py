@@ -0,0 +1,59 @@
+"""
+Audio encoding helpers for streaming synthesized speech over HTTP.
+Used by server.py (/synthesize).
+"""
+
+from __future__ import annotations
+
+import struct
+from typing import Iterable, Iterator
+
+import numpy as np
+
+# Formats accepted by /synthesize: name -> MIME type template
+FORMATS = {
+    "pcm16": "audio/L16; rate={rate}; channels=1",
+    "wav": "audio/wav",
+}
+
+# Data size used in a streamed WAV header, where the final length is unknown
+_WAV_UNKNOWN_SIZE = 0xFFFFFFFF
+
+
+def mime_type(fmt: str, sample_rate: int) -> str:
+    """MIME type for a stream format."""
+    return FORMATS[fmt].format(rate=sample_rate)
+
+
+def pcm16_bytes(audio) -> bytes:
+    """Convert float audio in [-1, 1] to little-endian 16-bit PCM."""
+    samples = np.clip(np.asarray(audio, dtype=np.float32).reshape(-1), -1.0, 1.0)
+    return (samples * 32767.0).astype("<i2").tobytes()
+
+
+def wav_header(sample_rate: int, data_size: int | None = None, channels: int = 1, bits: int = 16) -> bytes:
+    """
+    RIFF/WAVE header for PCM audio. With data_size None the sizes are set to
+    0xFFFFFFFF, which players treat as "read until end of stream".
+    """
+    byte_rate = sample_rate * channels * bits // 8
+    block_align = channels * bits // 8
+    if data_size is None:
+        riff_size = data_size = _WAV_UNKNOWN_SIZE
+    else:
+        riff_size = 36 + data_size
+    return (
+        b"RIFF" + struct.pack("<I", riff_size) + b"WAVE"
+        + b"fmt " + struct.pack("<IHHIIHH", 16, 1, channels, sample_rate, byte_rate, block_align, bits)
+        + b"data" + struct.pack("<I", data_size)
+    )
+
+
+def encode_stream(chunks: Iterable, fmt: str, sample_rate: int) -> Iterator[bytes]:
+    """Encode audio chunks as they arrive: a WAV header first for "wav", then PCM16 data."""
+    if fmt not in FORMATS:
+        raise ValueError(f"Unsupported format '{fmt}'. Choose from: {sorted(FORMATS)}")
+    if fmt == "wav":
+        yield wav_header(sample_rate)
+    for audio in chunks:
+        yield pcm16_bytes(audio)
@@ -0,0 +1,362 @@
+"""
+Text preprocessing benchmark.
+
+Times TextPreprocessor.process, which runs a compiled plan of the enabled
+stages and skips stages (and the whole numeric family) whose trigger
+characters are absent, against running every enabled stage on every text as
+the pipeline used to. Both must produce identical output; any difference is
+reported.
+
+Corpora: the demo cases from kittentts/preprocess.py, a prose corpus made of
+the script lines in scripts/ repeated --repeat times, and synthetic
+numeric-dense text (prices, specs, IP addresses, phone numbers) and URL-heavy
+text (links, emails, HTML). The synthetic corpora are seeded, so every run
+sees the same text.
+
+The stage breakdown runs the compiled plan one stage at a time over each
+corpus and reports each stage's µs per input character and a hash of the
+corpus after it, plus a hash of the final output. Save the results with
+--save and check a later run against them with --compare: any changed hash
+is reported (and the exit status is 1), so an optimization that alters the
+output is caught, along with the timing change per stage.
+
+The converter micro-benchmark times number_to_words, float_to_words and
+ordinal generation over the numbers in the numeric corpus, with the caches
+cleared before each pass (cold) and already filled (warm).
+
+The profile benchmark reports each preprocessing profile's throughput
+(see kittentts.preprocess.PROFILES) on every corpus, and how many texts come
+out differently from the "full" profile.
+
+The parallel benchmark runs the prose and numeric corpora through
+TextPreprocessor.process_many and process_stream on --workers processes.
+
+Usage:
+  python bench_preprocess.py
+  python bench_preprocess.py --rounds 5 --repeat 50 --numeric 5000 --workers 8
+  python bench_preprocess.py --save baseline.json
+  python bench_preprocess.py --compare baseline.json
+"""
+
+from __future__ import annotations
+
+import argparse
+import glob
+import hashlib
+import json
+import os
+import random
+import re
+import sys
+import time
+
+from kittentts import preprocess
+from kittentts.preprocess import DEMO_CASES, PROFILES, SENTENCE_CACHE, TextPreprocessor
+
+NUMERIC_TEMPLATES = [
+    "Shares of ACME rose {pct}% to ${price} after Q{q} revenue of ${big}M, up from ${big2}M.",
+    "The {n}-core chip runs at {ghz}GHz with {gb}GB RAM and draws {w}W at {temp}°C.",
+    "Connect to {ip} on port {port} or call {phone} before {h}:{m:02d}pm.",
+    "Between {year}-{year2}, the index gained {pct}% and closed {n}th of {n2} on {day}/{month}.",
+    "Latency fell from {ms}ms to {ms2}ms; throughput hit {k}K requests at {big}.{d} MB/s.",
+]
+
+URL_TEMPLATES = [
+    "Read the docs at https://{host}.{tld}/{path}/{page} or www.{host}.{tld} before you email {user}@{host}.{tld}.",
+    "<p>See <a href=\"https://{host}.{tld}/{path}\">the {path} guide</a> and <b>reply</b> to {user}@{host}.{tld}</p>",
+    "Mirror: http://{host}.{tld}/{path}?id={n}&ref={user} (backup at https://cdn.{host}.{tld}/{page}).",
+    "Questions? Write to {user}.{path}@{host}.{tld} or visit www.{host}.{tld}/{page} today.",
+]
+URL_WORDS = ["example", "kitten", "docs", "status", "support", "release", "alpha", "news", "team", "voice"]
+
+
+def load_prose(repeat: int) -> list[str]:
+    """Text fields of every Character|speed|text line in scripts/, repeated."""
+    texts = []
+    script_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), "scripts")
+    for path in sorted(glob.glob(os.path.join(script_dir, "*.txt"))):
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                parts = line.strip().split("|", 2)
+                if len(parts) == 3 and parts[2].strip():
+                    texts.append(parts[2])
+    return texts * repeat
+
+
+def numeric_texts(count: int, seed: int = 0) -> list[str]:
+    """Synthetic finance/tech sentences dense with numbers, repeating values as real text does."""
+    rnd = random.Random(seed)
+    texts = []
+    for _ in range(count):
+        template = rnd.choice(NUMERIC_TEMPLATES)
+        texts.append(template.format(
+            pct=f"{rnd.randint(0, 40)}.{rnd.randint(0, 9)}", price=f"{rnd.randint(1, 999)}.{rnd.randint(0, 99):02d}",
+            q=rnd.randint(1, 4), big=rnd.randint(1, 999), big2=rnd.randint(1, 999), n=rnd.randint(2, 128),
+            n2=rnd.randint(100, 500), ghz=f"{rnd.randint(1, 5)}.{rnd.randint(0, 9)}", gb=rnd.choice([8, 16, 32, 64]),
+            w=rnd.randint(5, 300), temp=rnd.randint(20, 95),
+            ip=".".join(str(rnd.randint(0, 255)) for _ in range(4)), port=rnd.choice([22, 80, 443, 8080]),
+            phone=f"555-{rnd.randint(0, 9999):04d}", h=rnd.randint(1, 12), m=rnd.randint(0, 59),
+            year=rnd.randint(1990, 2020), year2=rnd.randint(2021, 2030), day=rnd.randint(1, 28), month=rnd.randint(1, 12),
+            ms=rnd.randint(10, 900), ms2=rnd.randint(1, 9), k=rnd.randint(1, 99), d=rnd.randint(0, 9),
+        ))
+    return texts
+
+
+def url_texts(count: int, seed: int = 0) -> list[str]:
+    """Synthetic text full of links, email addresses and HTML tags."""
+    rnd = random.Random(seed)
+    return [
+        rnd.choice(URL_TEMPLATES).format(
+            host=rnd.choice(URL_WORDS), tld=rnd.choice(["com", "org", "io", "dev"]), path=rnd.choice(URL_WORDS),
+            page=f"{rnd.choice(URL_WORDS)}-{rnd.randint(1, 99)}.html", user=rnd.choice(URL_WORDS), n=rnd.randint(1, 9999),
+        )
+        for _ in range(count)
+    ]
+
+
+def digest(texts: list[str]) -> str:
+    """Short hash of a list of texts, to check that output did not change."""
+    h = hashlib.sha256()
+    for text in texts:
+        h.update(text.encode("utf-8"))
+        h.update(b"\0")
+    return h.hexdigest()[:16]
+
+
+def process_every_stage(pp: TextPreprocessor, text: str) -> str:
+    """The pipeline without triggers: every enabled stage runs on every text."""
+    for _, _, _, run, _ in pp._plan:
+        text = run(text)
+    return text
+
+
+def time_pass(fn, texts: list[str], rounds: int) -> tuple[float, list[str]]:
+    """Best-of-rounds seconds for one pass over texts, and that pass's output."""
+    best = float("inf")
+    out = []
+    for _ in range(rounds):
+        t0 = time.perf_counter()
+        out = [fn(text) for text in texts]
+        best = min(best, time.perf_counter() - t0)
+    return best, out
+
+
+def run(name: str, texts: list[str], rounds: int) -> None:
+    pp = TextPreprocessor()
+    chars = sum(len(t) for t in texts)
+    planned_s, planned = time_pass(pp.process, texts, rounds)
+    every_s, every = time_pass(lambda t: process_every_stage(pp, t), texts, rounds)
+    mismatches = sum(a != b for a, b in zip(planned, every))
+
+    print(f"\n{name}: {len(texts)} texts, {chars:,} chars")
+    print(f"  every stage   : {every_s * 1000:9.2f} ms  {every_s / chars * 1e6:7.3f} µs/char")
+    print(f"  compiled plan : {planned_s * 1000:9.2f} ms  {planned_s / chars * 1e6:7.3f} µs/char")
+    print(f"  speedup       : {every_s / planned_s:9.2f}x")
+    print(f"  output        : {'identical' if not mismatches else f'{mismatches} MISMATCHES'}")
+
+
+def bench_stages(name: str, texts: list[str], rounds: int) -> dict:
+    """
+    Run the compiled plan one stage at a time over the corpus, as process()
+    would (digit gate, triggers and skips included). Returns the corpus's
+    results: input and output hashes, total µs/char and, per stage, µs/char
+    and the hash of the corpus after that stage.
+    """
+    pp = TextPreprocessor()
+    chars = sum(len(t) for t in texts)
+    times = {stage[0]: float("inf") for stage in pp._plan}
+    gate_s = float("inf")
+    for _ in range(rounds):
+        current = list(texts)
+        has_digit = None
+        hashes = {}
+        for stage_name, family, trigger, stage, skip in pp._plan:
+            if family == "digit" and has_digit is None:
+                t0 = time.perf_counter()
+                has_digit = [preprocess._RE_DIGIT.search(text) is not None for text in current]
+                gate_s = min(gate_s, time.perf_counter() - t0)
+            t0 = time.perf_counter()
+            out = []
+            for i, text in enumerate(current):
+                if family == "digit" and not has_digit[i]:
+                    out.append(text)
+                elif trigger is not None and not trigger(text):
+                    out.append(skip(text) if skip is not None else text)
+                else:
+                    out.append(stage(text))
+            times[stage_name] = min(times[stage_name], time.perf_counter() - t0)
+            hashes[stage_name] = digest(out)
+            current = out
+
+    expected = [pp.process(text) for text in texts]
+    total = sum(times.values()) + (gate_s if gate_s != float("inf") else 0.0)
+    result = {
+        "texts": len(texts),
+        "chars": chars,
+        "input": digest(texts),
+        "output": digest(current),
+        "us_per_char": total / chars * 1e6,
+        "stages": {n: {"us_per_char": times[n] / chars * 1e6, "hash": hashes[n]} for n in times},
+    }
+
+    print(f"\nstages, {name}: {len(texts)} texts, {chars:,} chars, output {result['output']}"
+          + ("" if current == expected else "  (DIFFERS FROM process())"))
+    for stage_name, stage in result["stages"].items():
+        share = stage["us_per_char"] / result["us_per_char"] * 100
+        print(f"  {stage_name:28} {stage['us_per_char']:8.4f} µs/char {share:5.1f}%  {stage['hash']}")
+    if gate_s != float("inf"):
+        print(f"  {'(digit check)':28} {gate_s / chars * 1e6:8.4f} µs/char")
+    print(f"  {'total':28} {result['us_per_char']:8.4f} µs/char")
+    return result
+
+
+def compare(results: dict, baseline: dict) -> bool:
+    """Print hash and timing changes against a saved baseline; True when no output changed."""
+    print("\ncompared with baseline:")
+    unchanged = True
+    for corpus, now in results.items():
+        then = baseline.get(corpus)
+        if then is None:
+            print(f"  {corpus}: not in baseline")
+            continue
+        if then["input"] != now["input"]:
+            print(f"  {corpus}: corpus differs from the baseline's (different --repeat/--numeric?); skipped")
+            continue
+        same = then["output"] == now["output"]
+        unchanged &= same
+        print(f"  {corpus}: output {'unchanged' if same else 'CHANGED'}, "
+              f"{now['us_per_char']:.4f} µs/char vs {then['us_per_char']:.4f} ({then['us_per_char'] / now['us_per_char']:.2f}x)")
+        for stage_name, stage in now["stages"].items():
+            old = then["stages"].get(stage_name)
+            if old is None:
+                print(f"    {stage_name:28} new stage")
+            elif old["hash"] != stage["hash"]:
+                print(f"    {stage_name:28} output CHANGED")
+    return unchanged
+
+
+def bench_converters(texts: list[str], rounds: int) -> None:
+    """Time the number converters over the corpus's numbers, with caches cold and warm."""
+    numbers = re.findall(r"\d+(?:\.\d+)?", " ".join(texts))
+    ints = [int(n) for n in numbers if "." not in n]
+    floats = [n for n in numbers if "." in n]
+    converters = [
+        ("number_to_words", preprocess.number_to_words, ints),
+        ("float_to_words", preprocess.float_to_words, floats),
+        ("ordinals", preprocess._ordinal_suffix, ints),
+    ]
+    caches = [preprocess.number_to_words, preprocess._float_text_to_words, preprocess._ordinal_suffix]
+
+    print(f"\nconverters: {len(ints)} integers, {len(floats)} decimals")
+    for name, fn, values in converters:
+        cold = warm = float("inf")
+        for _ in range(rounds):
+            for cache in caches:
+                cache.cache_clear()
+            t0 = time.perf_counter()
+            for value in values:
+                fn(value)
+            cold = min(cold, time.perf_counter() - t0)
+            t0 = time.perf_counter()
+            for value in values:
+                fn(value)
+            warm = min(warm, time.perf_counter() - t0)
+        per = 1e6 / max(len(values), 1)
+        print(f"  {name:16}: cold {cold * per:6.3f} µs/call  warm {warm * per:6.3f} µs/call")
+
+
+def bench_profiles(corpora: dict, rounds: int) -> None:
+    """Throughput of each preprocessing profile per corpus, and how often it differs from "full"."""
+    print("\nprofiles (chars/s, texts differing from full):")
+    names = sorted(PROFILES, key=lambda name: name != "full")
+    print(f"  {'corpus':18}" + "".join(f"{name:>24}" for name in names))
+    for corpus, texts in corpora.items():
+        chars = sum(len(t) for t in texts)
+        full = None
+        row = f"  {corpus:18}"
+        for name in names:
+            pp = TextPreprocessor.from_profile(name)
+            seconds, out = time_pass(pp.process, texts, rounds)
+            full = full or out
+            differ = sum(a != b for a, b in zip(out, full))
+            row += f"{chars / seconds / 1e6:14.2f} M ({differ:5d})"
+        print(row)
+
+
+def bench_numeric_scan(corpora: dict, rounds: int) -> None:
+    """The fused numeric_tokens stage against the digit stages run one after another."""
+    print("\nnumeric scan (fused vs stage by stage):")
+    for corpus, texts in corpora.items():
+        chars = sum(len(t) for t in texts)
+        fused = TextPreprocessor()
+        staged = TextPreprocessor()
+        staged._plan = staged._compile(fuse_numeric=False)
+        fused_s, fused_out = time_pass(fused.process, texts, rounds)
+        staged_s, staged_out = time_pass(staged.process, texts, rounds)
+        whole = sum(1 for t in texts if preprocess._RE_NUMERIC_SPAN.search(t))
+        print(f"  {corpus:18} {staged_s / chars * 1e6:7.3f} → {fused_s / chars * 1e6:7.3f} µs/char "
+              f"({staged_s / fused_s:.2f}x), {whole / len(texts):5.1%} run whole, "
+              f"output {'identical' if fused_out == staged_out else 'MISMATCHES'}")
+
+
+def bench_parallel(texts: list[str], workers: int) -> None:
+    """process() one text at a time against process_many and process_stream on a pool."""
+    pp = TextPreprocessor()
+    chars = sum(len(t) for t in texts)
+    t0 = time.perf_counter()
+    serial = [pp.process(text) for text in texts]
+    serial_s = time.perf_counter() - t0
+    SENTENCE_CACHE.clear()     # with one worker both run here; start each cold
+    t0 = time.perf_counter()
+    many = pp.process_many(texts, workers=workers)
+    many_s = time.perf_counter() - t0
+    SENTENCE_CACHE.clear()
+    t0 = time.perf_counter()
+    streamed = list(pp.process_stream(iter(texts), workers=workers))
+    stream_s = time.perf_counter() - t0
+    same = many == serial and streamed == serial
+
+    print(f"\nparallel: {len(texts)} texts ({len(set(texts))} distinct), {chars:,} chars, {workers} workers")
+    print(f"  process()      : {serial_s * 1000:9.2f} ms")
+    print(f"  process_many   : {many_s * 1000:9.2f} ms  ({serial_s / many_s:.2f}x)")
+    print(f"  process_stream : {stream_s * 1000:9.2f} ms  ({serial_s / stream_s:.2f}x)")
+    print(f"  output         : {'identical' if same else 'MISMATCHES'}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="TextPreprocessor benchmark")
+    parser.add_argument("--rounds", type=int, default=3, help="Passes per corpus; the best is reported")
+    parser.add_argument("--repeat", type=int, default=20, help="Copies of the scripts/ lines in the prose corpus")
+    parser.add_argument("--numeric", type=int, default=2000, help="Sentences in the numeric-dense corpus")
+    parser.add_argument("--urls", type=int, default=1000, help="Sentences in the URL-heavy corpus")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="Processes for the parallel benchmark")
+    parser.add_argument("--save", metavar="PATH", help="Write the stage breakdown and output hashes to a baseline file")
+    parser.add_argument("--compare", metavar="PATH", help="Check output hashes and timings against a baseline file")
+    args = parser.parse_args()
+
+    corpora = {
+        "demo cases": [text for _, text in DEMO_CASES],
+        "prose (scripts/)": load_prose(args.repeat),
+        "numeric-dense": numeric_texts(args.numeric),
+        "url-heavy": url_texts(args.urls),
+    }
+    for name, texts in corpora.items():
+        run(name, texts, args.rounds)
+    results = {name: bench_stages(name, texts, args.rounds) for name, texts in corpora.items()}
+    bench_converters(corpora["numeric-dense"], args.rounds)
+    bench_numeric_scan(corpora, args.rounds)
+    bench_profiles(corpora, args.rounds)
+    bench_parallel(corpora["prose (scripts/)"] + corpora["numeric-dense"], args.workers)
+
+    if args.save:
+        with open(args.save, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+        print(f"\nbaseline saved to {args.save}")
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            if not compare(results, json.load(f)):
+                sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
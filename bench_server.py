@@ -0,0 +1,127 @@
+"""
+Server load test: Flask (server.py) vs ASGI (asgi_server.py).
+
+Starts each server as a subprocess on its own port, then has many concurrent
+clients stream /synthesize responses and reports time to first byte, total
+response time and throughput. Slow readers are simulated with --read-delay,
+which is where a thread-per-request server runs out of threads.
+
+Usage:
+  python bench_server.py
+  python bench_server.py --clients 64 --requests 4 --read-delay 0.05
+  python bench_server.py --servers asgi --port 5101
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import threading
+import time
+
+import requests
+
+from client import wait_for_server
+
+SERVERS = {"flask": "server.py", "asgi": "asgi_server.py"}
+
+
+def _percentile(values: list[float], pct: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct))]
+
+
+def load(base_url: str, clients: int, requests_per_client: int, text: str, read_delay: float) -> None:
+    """Run the /synthesize load against one server and print the results."""
+    first_byte: list[float] = []
+    totals: list[float] = []
+    status_counts: dict[int, int] = {}
+    lock = threading.Lock()
+
+    def client() -> None:
+        session = requests.Session()
+        for _ in range(requests_per_client):
+            t0 = time.perf_counter()
+            ttfb = None
+            try:
+                with session.post(f"{base_url}/synthesize", json={"text": text, "format": "pcm16"},
+                                  stream=True, timeout=120) as r:
+                    for _chunk in r.iter_content(chunk_size=8192):
+                        if ttfb is None:
+                            ttfb = time.perf_counter() - t0
+                        if read_delay:
+                            time.sleep(read_delay)
+                    status = r.status_code
+            except requests.RequestException:
+                status = 0
+            total = time.perf_counter() - t0
+            with lock:
+                status_counts[status] = status_counts.get(status, 0) + 1
+                if status == 200:
+                    first_byte.append((ttfb or total) * 1000)
+                    totals.append(total * 1000)
+
+    threads = [threading.Thread(target=client) for _ in range(clients)]
+    t0 = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    wall = time.perf_counter() - t0
+
+    print(f"  {clients} clients x {requests_per_client} requests in {wall:.2f}s "
+          f"({len(totals) / wall:.2f} ok/s), status counts {dict(sorted(status_counts.items()))}")
+    if totals:
+        print(f"  first byte: p50 {_percentile(first_byte, 0.50):8.1f} ms   p99 {_percentile(first_byte, 0.99):8.1f} ms")
+        print(f"  total     : p50 {_percentile(totals, 0.50):8.1f} ms   p99 {_percentile(totals, 0.99):8.1f} ms   "
+              f"mean {statistics.mean(totals):8.1f} ms")
+
+
+def run_server(name: str, host: str, port: int, args: argparse.Namespace) -> None:
+    """Start one server, load it, stop it."""
+    base_url = f"http://{host}:{port}"
+    script_dir = os.path.dirname(os.path.abspath(__file__))
+    proc = subprocess.Popen(
+        [sys.executable, SERVERS[name], "--host", host, "--port", str(port),
+         "--model", args.model, "--buffer-size", str(args.buffer_size)],
+        cwd=script_dir,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    try:
+        if not wait_for_server(base_url, timeout=120):
+            print(f"{name}: server failed to start in time")
+            return
+        # Warm-up request so model load is not counted
+        requests.post(f"{base_url}/synthesize", json={"text": "Warm up."}, timeout=120).content
+        print(f"{name} ({SERVERS[name]}):")
+        load(base_url, args.clients, args.requests, args.text, args.read_delay)
+    finally:
+        proc.terminate()
+        proc.wait()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Flask vs ASGI server load test")
+    parser.add_argument("--servers", nargs="+", choices=sorted(SERVERS), default=["flask", "asgi"],
+                        help="Servers to compare")
+    parser.add_argument("--host", default="127.0.0.1", help="Bind host")
+    parser.add_argument("--port", type=int, default=5101, help="First port; each server gets the next one")
+    parser.add_argument("--clients", type=int, default=32, help="Concurrent clients")
+    parser.add_argument("--requests", type=int, default=2, help="Requests per client")
+    parser.add_argument("--text", default="Hello there. This is a load test of the streaming endpoint.",
+                        help="Text to synthesize")
+    parser.add_argument("--read-delay", type=float, default=0.0, help="Seconds a client sleeps between chunks")
+    parser.add_argument("--model", default="kitten-tts-nano-0.8-fp32", help="Model name")
+    parser.add_argument("--buffer-size", type=int, default=5, help="Server buffer size")
+    args = parser.parse_args()
+
+    for i, name in enumerate(args.servers):
+        run_server(name, args.host, args.port + i, args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,168 @@
+"""
+Speech pipeline latency benchmark.
+
+Measures idle -> first-sample latency: the Speech engine sits idle for a while,
+then a single line is queued and we time how long until its first sample
+reaches the sink. Synthesis time is measured separately so the coordination
+overhead (wake-ups, hand-offs) can be read off directly.
+
+With --overload, many client threads submit lines far faster than they can be
+played and the per-request admission latency is reported for the non-blocking
+try_add_speech_line() path (what server.py uses) next to the blocking
+add_speech_line() path. Every request has its own text, so none is served by
+deduplication, and the sink takes as long as a real device to play each clip,
+so the queue backs up as it would under real load.
+
+Usage:
+  python bench_speech.py
+  python bench_speech.py --rounds 10 --idle 2.0
+  python bench_speech.py --overload --clients 16 --requests 20
+"""
+
+from __future__ import annotations
+
+import argparse
+import statistics
+import threading
+import time
+
+from speech import Speech
+
+
+class TimedSpeech(Speech):
+    """
+    Speech that records per-line synthesis time and when each clip reaches the
+    sink. The recent-clip cache is off, so every measured line is synthesized.
+    With realtime, the sink holds each clip for its duration, like a sound device.
+    """
+
+    def __init__(self, realtime: bool = False, **kwargs):
+        kwargs.setdefault("dedup_cache_size", 0)
+        self.realtime = realtime
+        self.synth_times: list[float] = []
+        self.first_sample_at: list[float] = []
+        self.clip_event = threading.Event()
+        super().__init__(sink=self._record_sink, **kwargs)
+
+    def _record_sink(self, audio_data, sample_rate: int) -> None:
+        self.first_sample_at.append(time.perf_counter())
+        self.clip_event.set()
+        if self.realtime:
+            time.sleep((getattr(audio_data, "size", None) or len(audio_data)) / sample_rate)
+
+    def _load_model(self):
+        model = super()._load_model()
+        generate = model.generate
+        synth_times = self.synth_times
+
+        def timed_generate(*args, **kwargs):
+            t0 = time.perf_counter()
+            try:
+                return generate(*args, **kwargs)
+            finally:
+                synth_times.append(time.perf_counter() - t0)
+
+        model.generate = timed_generate
+        return model
+
+
+def run(rounds: int, idle: float, text: str, **speech_kwargs) -> None:
+    speech = TimedSpeech(**speech_kwargs)
+    speech.start()
+    # Warm-up line so model load is not counted
+    speech.add_speech_line_parts("Leo", 1.0, "Warm up.")
+    speech.clip_event.wait()
+
+    totals, overheads = [], []
+    for _ in range(rounds):
+        time.sleep(idle)
+        speech.clip_event.clear()
+        n_synth = len(speech.synth_times)
+        t0 = time.perf_counter()
+        speech.add_speech_line_parts("Leo", 1.0, text)
+        speech.clip_event.wait()
+        total = speech.first_sample_at[-1] - t0
+        synth = speech.synth_times[n_synth]
+        totals.append(total * 1000)
+        overheads.append((total - synth) * 1000)
+
+    speech.shutdown()
+
+    print(f"idle -> first sample over {rounds} rounds (idle {idle:.1f}s each)")
+    print(f"  total     : median {statistics.median(totals):8.2f} ms   max {max(totals):8.2f} ms")
+    print(f"  overhead  : median {statistics.median(overheads):8.2f} ms   max {max(overheads):8.2f} ms")
+
+
+def _percentile(values: list[float], pct: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct))]
+
+
+def run_overload(clients: int, requests: int, text: str, blocking: bool, **speech_kwargs) -> None:
+    speech = TimedSpeech(realtime=True, **speech_kwargs)
+    speech.start()
+    speech.add_speech_line_parts("Leo", 1.0, "Warm up.")
+    speech.clip_event.wait()
+
+    latencies: list[float] = []
+    rejected = 0
+    lock = threading.Lock()
+
+    def client(n: int) -> None:
+        nonlocal rejected
+        for i in range(requests):
+            line = f"{text} Request {n}.{i}."
+            t0 = time.perf_counter()
+            if blocking:
+                ok = speech.add_speech_line_parts("Leo", 1.0, line)
+            else:
+                ok = speech.try_add_speech_line_parts("Leo", 1.0, line).accepted
+            elapsed = (time.perf_counter() - t0) * 1000
+            with lock:
+                latencies.append(elapsed)
+                rejected += not ok
+
+    threads = [threading.Thread(target=client, args=(n,)) for n in range(clients)]
+    t0 = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    wall = time.perf_counter() - t0
+    speech.shutdown()
+
+    mode = "blocking add_speech_line" if blocking else "non-blocking try_add_speech_line"
+    print(f"{mode}: {clients} clients x {requests} requests in {wall:.2f}s, {rejected} rejected")
+    print(f"  admission : p50 {_percentile(latencies, 0.50):8.3f} ms   "
+          f"p99 {_percentile(latencies, 0.99):8.3f} ms   max {max(latencies):8.3f} ms")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Speech pipeline latency benchmark")
+    parser.add_argument("--rounds", type=int, default=5, help="Number of measured lines")
+    parser.add_argument("--idle", type=float, default=1.0, help="Idle seconds before each line")
+    parser.add_argument("--text", default="Hello there.", help="Text to synthesize")
+    parser.add_argument("--model-dir", default="KittenML/", help="Model directory")
+    parser.add_argument("--model", default="kitten-tts-nano-0.8-fp32", help="Model name")
+    parser.add_argument("--workers", type=int, default=3, help="Worker threads")
+    parser.add_argument("--overload", action="store_true", help="Measure admission latency under overload")
+    parser.add_argument("--clients", type=int, default=8, help="Concurrent clients (--overload)")
+    parser.add_argument("--requests", type=int, default=10, help="Requests per client (--overload)")
+    parser.add_argument("--buffer-size", type=int, default=5, help="Speech buffer size")
+    args = parser.parse_args()
+
+    speech_kwargs = dict(
+        model_dir=args.model_dir,
+        model_name=args.model,
+        num_workers=args.workers,
+        buffer_size=args.buffer_size,
+    )
+    if args.overload:
+        run_overload(args.clients, args.requests, args.text, blocking=False, **speech_kwargs)
+        run_overload(args.clients, args.requests, args.text, blocking=True, **speech_kwargs)
+    else:
+        run(args.rounds, args.idle, args.text, **speech_kwargs)
+
+
+if __name__ == "__main__":
+    main()
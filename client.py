@@ -10,19 +10,29 @@ The server accepts speech lines in two formats:
 
 1. JSON body (Content-Type: application/json)
    {
-     "line": "Character|speed|text"
+     "line": "Character|speed|text",
+     "channel": "optional-channel-name"
    }
 
 2. Plain text body (Content-Type: text/plain)
    Character|speed|text
+   (set the channel with an X-Channel header)
 
 Speech line format: Character|speed|text
   - Character: Voice name (Bella, Luna, Rosie, Kiki, Jasper, Bruno, Leo)
   - speed: Float, e.g. 1.2 (server adds speed_offset, default 0.2)
   - text: Text to speak
 
-Success response (200): {"ok": true, "message": "Queued"}
+Success response (200): {"ok": true, "message": "Queued", "line_id": 1, "queue_depth": 0, "estimated_wait": 0.0}
 Error response (400): {"ok": false, "error": "..."}
+Queue full (429) / shutting down (503): {"ok": false, "error": "...", "queue_depth": 5, "estimated_wait": 2.3}
+  with a Retry-After header; speak() resends the line after that delay, up
+  to max_attempts tries
+
+Optional deadline: "deadline_ms" in the JSON body or an X-Deadline-Ms header.
+A line not expected to start playing within it is refused with 503
+"Deadline cannot be met"; an accepted line still waiting for a worker when it
+passes is dropped.
 
 Example JSON POST:
   curl -X POST http://127.0.0.1:5001/speak \\
@@ -33,8 +43,19 @@ Example plain text POST:
   curl -X POST http://127.0.0.1:5001/speak \\
     -H "Content-Type: text/plain" \\
     -d "Bella|1.4|Hi there."
+
+Many lines at once: POST /speak_batch with {"lines": [...]} or a plain-text
+script body (one line per row). The response has a result per line:
+  {"ok": true, "channel": "default", "accepted": 2,
+   "results": [{"ok": true, "line_id": 1}, {"ok": false, "reason": "full"}], ...}
+A request queues at most the server's --buffer-size minus the lines already
+waiting. Lines refused with reason "full" can be resent after Retry-After;
+speak_batch() does this round by round and reports any line that was not
+queued (invalid, deadline, stopped) with its reason.
 """
 
+from __future__ import annotations
+
 import argparse
 import os
 import subprocess
@@ -64,26 +85,163 @@ class Colors:
     GREEN = '\033[92m'
     RESET = '\033[0m'
 
-def speak(base_url: str, line: str, use_json: bool = True) -> tuple[bool, str]:
-    """Send a speech line to the server. Returns (success, message)."""
+def speak(
+    base_url: str, line: str, use_json: bool = True, channel: str | None = None, deadline_ms: float | None = None,
+    max_attempts: int = 10,
+) -> tuple[bool, str]:
+    """
+    Send a speech line to the server. Returns (success, message).
+    The server never blocks on a full queue: it answers 429 (queue full) or
+    503 (shutting down, or the deadline cannot be met) with Retry-After, and
+    the line is resent after that delay, up to max_attempts tries in all.
+    With deadline_ms the server refuses the line if it cannot start playing
+    within that many milliseconds, and no retry is made once it has passed.
+    """
     if not requests:
         return False, "Install requests: pip install requests"
 
     url = f"{base_url}/speak"
+    start = time.monotonic()
     print(f"{Colors.GREEN}{line}{Colors.RESET}")
-    if use_json:
-        resp = requests.post(url, json={"line": line}, timeout=300)
-    else:
-        resp = requests.post(url, data=line, headers={"Content-Type": "text/plain"}, timeout=300)
+    for attempt in range(1, max_attempts + 1):
+        headers = {}
+        timeout = 300
+        if deadline_ms is not None:
+            # Whatever is left of the deadline
+            remaining_ms = deadline_ms - (time.monotonic() - start) * 1000
+            if remaining_ms <= 0:
+                return False, "Deadline passed waiting for the server"
+            headers["X-Deadline-Ms"] = str(round(remaining_ms, 1))
+            timeout = remaining_ms / 1000.0
+        try:
+            if use_json:
+                payload = {"line": line}
+                if channel:
+                    payload["channel"] = channel
+                resp = requests.post(url, json=payload, headers=headers, timeout=timeout)
+            else:
+                headers["Content-Type"] = "text/plain"
+                if channel:
+                    headers["X-Channel"] = channel
+                resp = requests.post(url, data=line, headers=headers, timeout=timeout)
+        except requests.Timeout:
+            return False, "Deadline passed waiting for the server"
+
+        try:
+            data = resp.json()
+        except Exception:
+            return False, f"Non-JSON response: {resp.status_code}"
 
-    try:
-        data = resp.json()
-    except Exception:
-        return False, f"Non-JSON response: {resp.status_code}"
+        if resp.status_code == 200 and data.get("ok"):
+            return True, data.get("message", "Queued")
+        message = data.get("error", f"HTTP {resp.status_code}")
+        if resp.status_code not in (429, 503) or attempt == max_attempts:
+            return False, message
+        retry_after = float(resp.headers.get("Retry-After", 1))
+        if deadline_ms is not None and (time.monotonic() - start + retry_after) * 1000 >= deadline_ms:
+            return False, message
+        time.sleep(retry_after)
+    return False, "No attempts made"
 
-    if resp.status_code == 200 and data.get("ok"):
-        return True, data.get("message", "Queued")
-    return False, data.get("error", f"HTTP {resp.status_code}")
+
+def speak_batch(
+    base_url: str, lines: list[str], use_json: bool = True, channel: str | None = None, max_attempts: int = 10,
+) -> tuple[bool, str]:
+    """
+    Send many speech lines to the server in one request. A request queues at
+    most the server's --buffer-size minus the lines already waiting; lines
+    refused because the queue is full (or too many channels are open) are
+    resent after Retry-After until all are queued, giving up after
+    max_attempts rounds in a row that queue nothing.
+    Returns (success, message); the message lists every line that was not
+    queued, with the reason (invalid, deadline, ...).
+    """
+    if not requests:
+        return False, "Install requests: pip install requests"
+
+    url = f"{base_url}/speak_batch"
+    pending = [line.strip() for line in lines if line.strip()]
+    for line in pending:
+        print(f"{Colors.GREEN}{line}{Colors.RESET}")
+    queued = 0
+    refused: list[tuple[str, str]] = []
+    attempts = 0
+    while pending:
+        if use_json:
+            payload = {"lines": pending}
+            if channel:
+                payload["channel"] = channel
+            resp = requests.post(url, json=payload, timeout=300)
+        else:
+            headers = {"Content-Type": "text/plain"}
+            if channel:
+                headers["X-Channel"] = channel
+            resp = requests.post(url, data="\n".join(pending).encode("utf-8"), headers=headers, timeout=300)
+
+        try:
+            data = resp.json()
+        except Exception:
+            return False, f"Non-JSON response: {resp.status_code}"
+
+        if resp.status_code == 429:
+            results = [{"ok": False, "reason": "full"}] * len(pending)
+        elif resp.status_code == 200:
+            results = data.get("results", [])
+        else:
+            refused += [(line, data.get("error", f"HTTP {resp.status_code}")) for line in pending]
+            break
+
+        accepted = sum(1 for r in results if r.get("ok"))
+        queued += accepted
+        attempts = 0 if accepted else attempts + 1
+        retry = []
+        for line, r in zip(pending, results):
+            if r.get("ok"):
+                continue
+            if r.get("reason") in ("full", "channels") and attempts < max_attempts:
+                retry.append(line)
+            else:
+                refused.append((line, r.get("reason", "refused")))
+        if any(r.get("reason") == "stopped" for r in results):
+            refused += [(line, "stopped") for line in retry]
+            break
+        pending = retry
+        if pending:
+            retry_after = float(resp.headers.get("Retry-After", 1))
+            print(f"Queue full: resending {len(pending)} line(s) in {retry_after:g}s")
+            time.sleep(retry_after)
+
+    if refused:
+        details = "\n".join(f"    [{reason}] {line}" for line, reason in refused)
+        return False, f"Queued {queued} line(s), {len(refused)} not queued:\n{details}"
+    return True, f"Queued {queued} line(s)"
+
+
+def synthesize(
+    base_url: str,
+    text: str,
+    out_path: str,
+    voice: str = "Leo",
+    speed: float = 1.0,
+    fmt: str = "wav",
+) -> tuple[bool, str]:
+    """Synthesize text on the server and stream the audio into out_path. Returns (success, message)."""
+    if not requests:
+        return False, "Install requests: pip install requests"
+
+    payload = {"voice": voice, "speed": speed, "text": text, "format": fmt}
+    with requests.post(f"{base_url}/synthesize", json=payload, stream=True, timeout=300) as resp:
+        if resp.status_code != 200:
+            try:
+                return False, resp.json().get("error", f"HTTP {resp.status_code}")
+            except Exception:
+                return False, f"HTTP {resp.status_code}"
+        size = 0
+        with open(out_path, "wb") as f:
+            for chunk in resp.iter_content(chunk_size=None):
+                f.write(chunk)
+                size += len(chunk)
+    return True, f"Saved {size} bytes to {out_path}"
 
 
 def main() -> None:
@@ -97,6 +255,9 @@ def main() -> None:
     parser.add_argument("--start-server", action="store_true", help="Start server.py as subprocess before sending")
     parser.add_argument("--plain", action="store_true", help="Use plain text POST instead of JSON")
     parser.add_argument("--lines", nargs="*", help="Speech lines to send (overrides defaults)")
+    parser.add_argument("--script", default=None, help="Script file to send, one Character|speed|text line per row")
+    parser.add_argument("--channel", default=None, help="Server channel to queue lines on (default: server default)")
+    parser.add_argument("--save", default=None, help="Synthesize the lines via /synthesize into this WAV file instead of playing on the server")
     args = parser.parse_args()
 
     base_url = f"http://{args.host}:{args.port}"
@@ -128,7 +289,11 @@ def main() -> None:
         sys.exit(1)
     # VOICES_SHE = ["Bella", "Luna", "Rosie", "Kiki"]
     # VOICES_HE = ["Jasper", "Bruno", "Leo"]
-    lines = args.lines or [
+    script_lines = None
+    if args.script:
+        with open(args.script, "r") as f:
+            script_lines = f.read().splitlines()
+    lines = args.lines or script_lines or [
         "Leo|1.0|Leo, Hello, this is a test from the Kitten TTS client.",
         "Bella|1.0|Bella, Hello, this is a test from the Kitten TTS client.",
         "Jasper|1.0|Jasper, Hello, this is a test from the Kitten TTS client.",
@@ -138,13 +303,19 @@ def main() -> None:
         "Rosie|1.0|Rosie, Hello, this is a test from the Kitten TTS client.",
     ]
 
-    print(f"\nSending {len(lines)} speech line(s) to {base_url}/speak\n")
-    for i, line in enumerate(lines, 1):
-        ok, msg = speak(base_url, line, use_json=not args.plain)
-        if ok:
-            print(f"  [{i}] OK: {line[:50]}{'...' if len(line) > 180 else ''}")
-        else:
-            print(f"  [{i}] FAIL: {msg}")
+    if args.save:
+        text = " ".join(line.split("|", 2)[2] for line in lines if line.count("|") >= 2)
+        voice = lines[0].split("|", 1)[0] if lines else "Leo"
+        ok, msg = synthesize(base_url, text, args.save, voice=voice)
+        print(msg if ok else f"FAIL: {msg}")
+        if args.start_server:
+            proc.terminate()
+            proc.wait()
+        return
+
+    print(f"\nSending {len(lines)} speech line(s) to {base_url}/speak_batch\n")
+    ok, msg = speak_batch(base_url, lines, use_json=not args.plain, channel=args.channel)
+    print(f"  OK: {msg}" if ok else f"  FAIL: {msg}")
 
     if args.start_server:
         proc.terminate()
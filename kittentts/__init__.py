@@ -1,7 +1,9 @@
 from kittentts.get_model import get_model, KittenTTS
+from kittentts.batcher import MicroBatcher
+from kittentts.model_pool import ModelFiles, ModelPool, SharedModel
 
 __version__ = "0.1.0"
 __author__ = "KittenML"
 __description__ = "Ultra-lightweight text-to-speech model with just 15 million parameters"
 
-__all__ = ["get_model", "KittenTTS"]
+__all__ = ["get_model", "KittenTTS", "MicroBatcher", "ModelFiles", "ModelPool", "SharedModel"]
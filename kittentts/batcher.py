@@ -0,0 +1,167 @@
+import threading
+import time
+from collections import deque
+
+import numpy as np
+
+
+class _Row:
+    """One text chunk waiting for a batch slot."""
+
+    def __init__(self, text, voice, speed):
+        self.text = text
+        self.voice = voice
+        self.speed = speed
+        self.submitted = time.perf_counter()
+        self.audio = None
+        self.error = None
+        self.done = threading.Event()
+
+
+class MicroBatcher:
+    """Cross-request micro-batching in front of one KittenTTS model.
+
+    Callers (e.g. Speech worker threads) call generate() as they would on the
+    model. Their text chunks are collected for up to `window_ms` after the
+    first one arrives, or until `max_batch` are waiting, then grouped by token
+    count and speed and run as one model call per group with per-row voice
+    style. Rows in a call still differ in audio length (durations depend on
+    the phonemes and voice); the model cuts each back to its own length (see
+    KittenTTS_1_Onnx.run_batch), so each caller gets its own audio back.
+
+    All phonemization and inference happens on the batcher's own thread, so
+    the model is never used from two threads at once.
+    """
+
+    def __init__(self, model, window_ms=5.0, max_batch=8):
+        """
+        Args:
+            model: KittenTTS (or KittenTTS_1_Onnx) instance to batch for
+            window_ms: How long the first chunk of a batch waits for company
+            max_batch: Most chunks per batch
+        """
+        self.model = getattr(model, "model", model)
+        self.window = window_ms / 1000.0
+        self.max_batch = max(1, max_batch)
+
+        self._rows = deque()
+        self._lock = threading.Lock()
+        self._ready = threading.Condition(self._lock)
+        self._closed = False
+
+        self._batches = 0        # batches collected
+        self._calls = 0          # model calls (one per token-count group)
+        self._rows_done = 0
+        self._queue_delay = 0.0  # total seconds rows waited before their batch started
+        self._max_queue_delay = 0.0
+        # Optional callable(call_sizes, queue_delays) after each batch: rows per
+        # model call, and seconds each row waited before the batch started
+        self.batch_observer = None
+
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def generate(self, text, voice="expr-voice-5-m", speed=1.0, clean_text=True, profile=None):
+        """Synthesize text through the batcher. Blocks until every chunk is done.
+
+        Args:
+            profile: Preprocessing profile, as for KittenTTS.generate
+
+        Returns:
+            Audio data as numpy array
+        """
+        rows = [_Row(chunk, voice, speed) for chunk in self.model.text_chunks(text, clean_text=clean_text, profile=profile)]
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("MicroBatcher is closed")
+            self._rows.extend(rows)
+            self._ready.notify()
+        for row in rows:
+            row.done.wait()
+        for row in rows:
+            if row.error is not None:
+                raise row.error
+        return np.concatenate([row.audio for row in rows], axis=-1)
+
+    def _run(self):
+        """Collect a batch, run it, repeat."""
+        while True:
+            with self._lock:
+                while not self._rows and not self._closed:
+                    self._ready.wait()
+                if not self._rows:
+                    return
+                deadline = self._rows[0].submitted + self.window
+                while len(self._rows) < self.max_batch and not self._closed:
+                    remaining = deadline - time.perf_counter()
+                    if remaining <= 0:
+                        break
+                    self._ready.wait(remaining)
+                batch = [self._rows.popleft() for _ in range(min(self.max_batch, len(self._rows)))]
+            self._run_batch(batch)
+
+    def _run_batch(self, batch):
+        """Prepare each row, group by token count and speed, run each group as one call."""
+        started = time.perf_counter()
+        groups = {}
+        for row in batch:
+            try:
+                inputs = self.model._prepare_inputs(row.text, row.voice, row.speed)
+            except Exception as e:
+                row.error = e
+                continue
+            # Stacked inputs need one token count; speed is kept per group
+            key = (inputs["input_ids"].shape[1], float(inputs["speed"][0]))
+            groups.setdefault(key, []).append((row, inputs))
+
+        for group in groups.values():
+            try:
+                audios = self.model.run_batch([inputs for _, inputs in group])
+            except Exception as e:
+                audios = [None] * len(group)
+                for row, _ in group:
+                    row.error = e
+            for (row, _), audio in zip(group, audios):
+                row.audio = audio
+
+        delays = [started - row.submitted for row in batch]
+        with self._lock:
+            self._batches += 1
+            self._calls += len(groups)
+            self._rows_done += len(batch)
+            for delay in delays:
+                self._queue_delay += delay
+                self._max_queue_delay = max(self._max_queue_delay, delay)
+        for row in batch:
+            row.done.set()
+        if self.batch_observer is not None:
+            self.batch_observer([len(group) for group in groups.values()], delays)
+
+    def stats(self):
+        """Batch fill and queueing delay so far.
+
+        Returns:
+            Dict with batches, model_calls, rows, mean_batch_size, mean_fill
+            (rows per call / max_batch), mean_queue_ms, max_queue_ms and
+            whether the model accepted batched calls
+        """
+        with self._lock:
+            calls = max(1, self._calls)
+            rows = max(1, self._rows_done)
+            return {
+                "batches": self._batches,
+                "model_calls": self._calls,
+                "rows": self._rows_done,
+                "mean_batch_size": round(self._rows_done / calls, 3),
+                "mean_fill": round(self._rows_done / calls / self.max_batch, 3),
+                "mean_queue_ms": round(self._queue_delay / rows * 1000, 3),
+                "max_queue_ms": round(self._max_queue_delay * 1000, 3),
+                "batched_calls": self.model.batching,
+            }
+
+    def close(self):
+        """Finish what is queued, then stop the batcher thread."""
+        with self._lock:
+            self._closed = True
+            self._ready.notify()
+        self._thread.join()
@@ -23,20 +23,49 @@ class KittenTTS:
             
         self.model = download_from_huggingface(repo_id=repo_id, cache_dir=cache_dir)
     
-    def generate(self, text, voice="expr-voice-5-m", speed=1.0):
+    def generate(self, text, voice="expr-voice-5-m", speed=1.0, profile=None):
         """Generate audio from text.
         
         Args:
             text: Input text to synthesize
             voice: Voice to use for synthesis
             speed: Speech speed (1.0 = normal)
+            profile: Text preprocessing profile: "full" (default), "fast" or "numeric"
             
         Returns:
             Audio data as numpy array
         """
-        return self.model.generate(text, voice=voice, speed=speed)
+        return self.model.generate(text, voice=voice, speed=speed, profile=profile)
     
-    def generate_to_file(self, text, output_path, voice="expr-voice-5-m", speed=1.0, sample_rate=24000):
+    def generate_stream(self, text, voice="expr-voice-5-m", speed=1.0, profile=None):
+        """Generate audio from text chunk by chunk.
+        
+        Args:
+            text: Input text to synthesize
+            voice: Voice to use for synthesis
+            speed: Speech speed (1.0 = normal)
+            profile: Text preprocessing profile: "full" (default), "fast" or "numeric"
+            
+        Yields:
+            Audio data as numpy array, one per text chunk
+        """
+        return self.model.generate_stream(text, voice=voice, speed=speed, profile=profile)
+    
+    def generate_from_fragments(self, fragments, voice="expr-voice-5-m", speed=1.0, profile=None):
+        """Generate audio from text that arrives in pieces (e.g. an LLM token stream).
+        
+        Args:
+            fragments: Iterable of text fragments
+            voice: Voice to use for synthesis
+            speed: Speech speed (1.0 = normal)
+            profile: Text preprocessing profile: "full" (default), "fast" or "numeric"
+            
+        Yields:
+            Audio data as numpy array, one per text chunk, as soon as its sentence is complete
+        """
+        return self.model.generate_from_fragments(fragments, voice=voice, speed=speed, profile=profile)
+    
+    def generate_to_file(self, text, output_path, voice="expr-voice-5-m", speed=1.0, sample_rate=24000, profile=None):
         """Generate audio from text and save to file.
         
         Args:
@@ -45,8 +74,9 @@ class KittenTTS:
             voice: Voice to use for synthesis
             speed: Speech speed (1.0 = normal)
             sample_rate: Audio sample rate
+            profile: Text preprocessing profile: "full" (default), "fast" or "numeric"
         """
-        return self.model.generate_to_file(text, output_path, voice=voice, speed=speed, sample_rate=sample_rate)
+        return self.model.generate_to_file(text, output_path, voice=voice, speed=speed, sample_rate=sample_rate, profile=profile)
     
     @property
     def available_voices(self):
@@ -64,6 +94,24 @@ def download_from_huggingface(repo_id="KittenML/kitten-tts-nano-0.1", cache_dir=
     Returns:
         KittenTTS_1_Onnx: Instantiated model ready for use
     """
+    config, model_path, voices_path = download_model_files(repo_id, cache_dir)
+    
+    # Instantiate and return model
+    model = KittenTTS_1_Onnx(model_path=model_path, voices_path=voices_path, speed_priors=config.get("speed_priors", {}) , voice_aliases=config.get("voice_aliases", {}))
+    
+    return model
+
+
+def download_model_files(repo_id="KittenML/kitten-tts-nano-0.1", cache_dir=None):
+    """Download a model's config, ONNX file and voices from Hugging Face.
+    
+    Args:
+        repo_id: Hugging Face repository ID
+        cache_dir: Directory to cache downloaded files
+        
+    Returns:
+        (config dict, local model path, local voices path)
+    """
     # Download config file first
     config_path = hf_hub_download(
         repo_id=repo_id,
@@ -91,10 +139,7 @@ def download_from_huggingface(repo_id="KittenML/kitten-tts-nano-0.1", cache_dir=
         cache_dir=cache_dir
     )
     
-    # Instantiate and return model
-    model = KittenTTS_1_Onnx(model_path=model_path, voices_path=voices_path, speed_priors=config.get("speed_priors", {}) , voice_aliases=config.get("voice_aliases", {}))
-    
-    return model
+    return config, model_path, voices_path
 
 
 def get_model(repo_id="KittenML/kitten-tts-nano-0.1", cache_dir=None):
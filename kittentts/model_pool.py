@@ -0,0 +1,228 @@
+import hashlib
+import logging
+import os
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+import onnxruntime as ort
+
+from .get_model import download_model_files
+from .onnx_model import KittenTTS_1_Onnx
+
+logger = logging.getLogger(__name__)
+
+
+def _repo_id(repo_id):
+    return repo_id if "/" in repo_id else f"KittenML/{repo_id}"
+
+
+def _load_voices(voices_path):
+    # Read every voice up front: NpzFile reads lazily from the archive and is not thread-safe
+    with np.load(voices_path) as voices:
+        return {name: voices[name] for name in voices.files}
+
+
+def _ort_format(model_path):
+    """Path of an ORT-format copy of a model, converting the .onnx file on first use.
+
+    The copy is written next to the model (or, if that directory is not
+    writable, to the temp directory) and reused while it is newer than the
+    model. Returns model_path itself if the conversion fails.
+    """
+    if model_path.endswith(".ort"):
+        return model_path
+    stem = os.path.splitext(os.path.basename(model_path))[0]
+    digest = hashlib.sha1(os.path.abspath(model_path).encode()).hexdigest()[:12]
+    candidates = [
+        os.path.join(os.path.dirname(model_path), stem + ".ort"),
+        os.path.join(tempfile.gettempdir(), f"{stem}-{digest}.ort"),
+    ]
+    for ort_path in candidates:
+        if os.path.exists(ort_path) and os.path.getmtime(ort_path) >= os.path.getmtime(model_path):
+            return ort_path
+        options = ort.SessionOptions()
+        # Not ORT_ENABLE_ALL: its layout optimizations are specific to this machine's CPU
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_EXTENDED
+        options.optimized_model_filepath = ort_path
+        options.add_session_config_entry("session.save_model_format", "ORT")
+        try:
+            ort.InferenceSession(model_path, options)
+            return ort_path
+        except Exception as e:
+            logger.warning("Could not write ORT-format model to %s: %s", ort_path, e)
+    return model_path
+
+
+class ModelFiles:
+    """A model's config, ORT-format bytes and voice table read into memory.
+
+    Made in a parent process before forking workers. The .onnx model is
+    converted to ORT format once, and sessions built from those bytes use
+    them for their weights in place, so the children share one copy of the
+    weights copy-on-write (the buffer is never written) instead of each
+    parsing the model into a private copy. Nothing is downloaded or read
+    from disk again.
+    """
+
+    def __init__(self, repo_id, cache_dir=None):
+        """
+        Args:
+            repo_id: Hugging Face repository ID, or a model name under KittenML/
+            cache_dir: Directory to cache downloaded files
+        """
+        self.repo_id = _repo_id(repo_id)
+        config, self.model_path, voices_path = download_model_files(self.repo_id, cache_dir)
+        self.config = config
+        self.ort_path = _ort_format(self.model_path)
+        with open(self.ort_path, "rb") as f:
+            self.model_bytes = f.read()
+        self.voices = _load_voices(voices_path)
+
+    def session(self):
+        """A new InferenceSession from the in-memory bytes.
+
+        The session keeps using the shared buffer for its weights instead of
+        copying them. If the ORT-format conversion failed, the bytes are the
+        .onnx model, which each session parses into a private copy.
+        """
+        options = ort.SessionOptions()
+        options.add_session_config_entry("session.use_ort_model_bytes_directly", "1")
+        options.add_session_config_entry("session.use_ort_model_bytes_for_initializers", "1")
+        return ort.InferenceSession(self.model_bytes, options)
+
+
+class SharedModel:
+    """The read-only parts of one model, loaded once and shared by every thread.
+
+    The ONNX session (whose run() is thread-safe), the voice table and the
+    config are shared; each thread gets its own KittenTTS_1_Onnx around them,
+    because the phonemizer backend is not thread-safe.
+    """
+
+    def __init__(self, repo_id, cache_dir=None, files=None):
+        """
+        Args:
+            repo_id: Hugging Face repository ID, or a model name under KittenML/
+            cache_dir: Directory to cache downloaded files
+            files: Preloaded ModelFiles to build from instead of downloading
+        """
+        self.repo_id = _repo_id(repo_id)
+        if files is not None:
+            config, self.model_path = files.config, files.model_path
+            self.voices = files.voices
+            self.session = files.session()
+        else:
+            config, self.model_path, voices_path = download_model_files(self.repo_id, cache_dir)
+            self.voices = _load_voices(voices_path)
+            self.session = ort.InferenceSession(self.model_path)
+        self.speed_priors = config.get("speed_priors", {})
+        self.voice_aliases = config.get("voice_aliases", {})
+        self.nbytes = os.path.getsize(self.model_path) + sum(v.nbytes for v in self.voices.values())
+        self._local = threading.local()
+
+    def for_thread(self):
+        """This thread's model instance around the shared session and voices."""
+        model = getattr(self._local, "model", None)
+        if model is None:
+            model = self._local.model = KittenTTS_1_Onnx(
+                model_path=self.model_path,
+                speed_priors=self.speed_priors,
+                voice_aliases=self.voice_aliases,
+                session=self.session,
+                voices=self.voices,
+            )
+        return model
+
+
+class ModelPool:
+    """Models loaded on demand and kept in LRU order under a memory budget.
+
+    get() returns a per-thread model for a repo ID, loading it on first use.
+    When the loaded models' weights and voices exceed the budget, the least
+    recently used ones are dropped (threads still synthesizing with an evicted
+    model finish normally; it is freed when they let go). The most recently
+    used model always stays, even if it alone is over budget.
+    """
+
+    def __init__(self, memory_budget_mb=1024, cache_dir=None, loader=SharedModel):
+        """
+        Args:
+            memory_budget_mb: Budget for loaded weights and voices, in MB
+            cache_dir: Directory to cache downloaded files
+            loader: Callable(repo_id, cache_dir) returning a SharedModel
+        """
+        self.memory_budget = int(memory_budget_mb * 1024 * 1024)
+        self.cache_dir = cache_dir
+        self._loader = loader
+        self._models = OrderedDict()
+        self._loading = {}      # repo_id -> lock held while it loads
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.loads = 0
+        self.evictions = 0
+        self.load_seconds = 0.0
+
+    def get(self, repo_id):
+        """A model instance for this thread, loading the model if needed."""
+        return self.shared(repo_id).for_thread()
+
+    def shared(self, repo_id):
+        """The SharedModel for a repo ID, loading it if needed. One thread loads, others wait."""
+        with self._lock:
+            shared = self._lookup(repo_id)
+            if shared is not None:
+                return shared
+            load_lock = self._loading.setdefault(repo_id, threading.Lock())
+
+        with load_lock:
+            with self._lock:
+                shared = self._lookup(repo_id)
+                if shared is not None:
+                    return shared
+            t0 = time.perf_counter()
+            shared = self._loader(repo_id, self.cache_dir)
+            with self._lock:
+                self.loads += 1
+                self.load_seconds += time.perf_counter() - t0
+                self._models[repo_id] = shared
+                self._loading.pop(repo_id, None)
+                self._evict()
+        return shared
+
+    def _lookup(self, repo_id):
+        """Loaded model for repo_id, marked most recently used. Caller holds the lock."""
+        shared = self._models.get(repo_id)
+        if shared is not None:
+            self._models.move_to_end(repo_id)
+            self.hits += 1
+        return shared
+
+    def _evict(self):
+        """Drop least recently used models until within budget. Caller holds the lock."""
+        total = sum(m.nbytes for m in self._models.values())
+        while total > self.memory_budget and len(self._models) > 1:
+            _, shared = self._models.popitem(last=False)
+            total -= shared.nbytes
+            self.evictions += 1
+
+    def stats(self):
+        """Resident models and load, eviction and hit counts.
+
+        Returns:
+            Dict with resident (repo IDs, LRU first), resident_mb, budget_mb,
+            hits, loads, evictions and load_seconds
+        """
+        with self._lock:
+            return {
+                "resident": list(self._models),
+                "resident_mb": round(sum(m.nbytes for m in self._models.values()) / (1024 * 1024), 1),
+                "budget_mb": round(self.memory_budget / (1024 * 1024), 1),
+                "hits": self.hits,
+                "loads": self.loads,
+                "evictions": self.evictions,
+                "load_seconds": round(self.load_seconds, 3),
+            }
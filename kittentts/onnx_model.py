@@ -8,11 +8,49 @@ try:
 except ImportError:
     pass  # Fall back to system espeak-ng if espeakng_loader not installed
 
+import logging
+import time
+
 import numpy as np
 import phonemizer
 import soundfile as sf
 import onnxruntime as ort
-from .preprocess import TextPreprocessor
+from onnxruntime.capi.onnxruntime_pybind11_state import InvalidArgument
+from .preprocess import DEFAULT_PROFILE, StreamingPreprocessor, TextPreprocessor
+
+logger = logging.getLogger(__name__)
+
+# Samples trimmed from the end of each generated clip
+TRIM_SAMPLES = 5000
+
+# Consecutive failed batched calls after which batching is switched off
+MAX_BATCH_FAILURES = 3
+
+
+def row_lengths(audio: np.ndarray, durations: np.ndarray, rows: int):
+    """Samples of real audio in each row of a batched model output.
+
+    Each row is as long as its per-token durations (in frames) add up to; the
+    longest row fills the output, which gives the samples per frame.
+
+    Args:
+        audio: Batched audio output, one row per input
+        durations: Per-token durations output, one row per input
+        rows: Inputs in the batch
+
+    Returns:
+        Length of each row, or None if the outputs do not fit that contract
+    """
+    durations = np.asarray(durations)
+    if audio.ndim < 2 or audio.shape[0] != rows or durations.ndim < 2 or durations.shape[0] != rows:
+        return None
+    frames = np.rint(durations.reshape(rows, -1).sum(axis=1)).astype(np.int64)
+    longest = int(frames.max())
+    if longest <= 0 or audio.shape[-1] % longest:
+        return None
+    hop = audio.shape[-1] // longest
+    return [int(f) * hop for f in frames]
+
 
 def basic_english_tokenize(text):
     """Basic English tokenizer that splits on whitespace and punctuation."""
@@ -87,16 +125,19 @@ class TextCleaner:
 
 
 class KittenTTS_1_Onnx:
-    def __init__(self, model_path="kitten_tts_nano_preview.onnx", voices_path="voices.npz", speed_priors={}, voice_aliases={}):
+    def __init__(self, model_path="kitten_tts_nano_preview.onnx", voices_path="voices.npz", speed_priors={}, voice_aliases={},
+                 session=None, voices=None):
         """Initialize KittenTTS with model and voice data.
         
         Args:
             model_path: Path to the ONNX model file
             voices_path: Path to the voices NPZ file
+            session: Already-loaded InferenceSession to share instead of loading model_path
+            voices: Already-loaded voice table to share instead of loading voices_path
         """
         self.model_path = model_path
-        self.voices = np.load(voices_path) 
-        self.session = ort.InferenceSession(model_path)
+        self.voices = voices if voices is not None else np.load(voices_path)
+        self.session = session if session is not None else ort.InferenceSession(model_path)
         
         self.phonemizer = phonemizer.backend.EspeakBackend(
             language="en-us", preserve_punctuation=True, with_stress=True
@@ -111,8 +152,33 @@ class KittenTTS_1_Onnx:
         ]
         self.voice_aliases = voice_aliases
 
-        self.preprocessor = TextPreprocessor()
+        self.preprocessor = TextPreprocessor.from_profile(DEFAULT_PROFILE)
+        self._preprocessors = {DEFAULT_PROFILE: self.preprocessor}
+        # A batched call pads every row to the longest; the per-token durations
+        # output says where each row really ends. Without it, no batching.
+        self._duration_output = next(
+            (i for i, o in enumerate(self.session.get_outputs()) if "duration" in o.name.lower()), None
+        )
+        self.batching = self._duration_output is not None  # also cleared by run_batch() if the graph takes no batch
+        self._batch_failures = 0
+        # Optional callable(stage, seconds) for per-stage timings: "preprocess",
+        # "phonemize", "tokenize", "onnx" and "trim"
+        self.stage_observer = None
+
+    def _observe(self, stage: str, t0: float) -> None:
+        """Report the time since t0 for a pipeline stage, if anyone is listening."""
+        if self.stage_observer is not None:
+            self.stage_observer(stage, time.perf_counter() - t0)
     
+    def preprocessor_for(self, profile: str = None) -> TextPreprocessor:
+        """The TextPreprocessor for a named profile (see preprocess.PROFILES); None: the default."""
+        if profile is None:
+            return self.preprocessor
+        preprocessor = self._preprocessors.get(profile)
+        if preprocessor is None:
+            preprocessor = self._preprocessors[profile] = TextPreprocessor.from_profile(profile)
+        return preprocessor
+
     def _prepare_inputs(self, text: str, voice: str, speed: float = 1.0) -> dict:
         """Prepare ONNX model inputs from text and voice parameters."""
         if voice in self.voice_aliases:
@@ -125,9 +191,12 @@ class KittenTTS_1_Onnx:
             speed = speed * self.speed_priors[voice]
         
         # Phonemize the input text
+        t0 = time.perf_counter()
         phonemes_list = self.phonemizer.phonemize([text])
+        self._observe("phonemize", t0)
         
         # Process phonemes to get token IDs
+        t0 = time.perf_counter()
         phonemes = basic_english_tokenize(phonemes_list[0])
         phonemes = ' '.join(phonemes)
         tokens = self.text_cleaner(phonemes)
@@ -139,6 +208,7 @@ class KittenTTS_1_Onnx:
         input_ids = np.array([tokens], dtype=np.int64)
         ref_id =  min(len(text), self.voices[voice].shape[0] - 1)
         ref_s = self.voices[voice][ref_id:ref_id+1]
+        self._observe("tokenize", t0)
         
         return {
             "input_ids": input_ids,
@@ -146,14 +216,56 @@ class KittenTTS_1_Onnx:
             "speed": np.array([speed], dtype=np.float32),
         }
     
-    def generate(self, text: str, voice: str = "expr-voice-5-m", speed: float = 1.0, clean_text: bool=True) -> np.ndarray:
-        out_chunks = []
-        if clean_text:
-            text = self.preprocessor(text)
-        for text_chunk in chunk_text(text):
-            out_chunks.append(self.generate_single_chunk(text_chunk, voice, speed))
+    def generate(self, text: str, voice: str = "expr-voice-5-m", speed: float = 1.0, clean_text: bool=True,
+                 profile: str = None) -> np.ndarray:
+        out_chunks = list(self.generate_stream(text, voice, speed, clean_text=clean_text, profile=profile))
         return np.concatenate(out_chunks, axis=-1)
 
+    def generate_stream(self, text: str, voice: str = "expr-voice-5-m", speed: float = 1.0, clean_text: bool=True,
+                        profile: str = None):
+        """Synthesize speech chunk by chunk, yielding each chunk's audio as soon as it is ready.
+        
+        Args:
+            text: Input text to synthesize
+            voice: Voice to use for synthesis
+            speed: Speech speed (1.0 = normal)
+            clean_text: If true, it will cleanup the text. Eg. replace numbers with words.
+            profile: Preprocessing profile: "full" (default), "fast" or "numeric"
+            
+        Yields:
+            Audio data as numpy array, one per text chunk
+        """
+        for text_chunk in self.text_chunks(text, clean_text=clean_text, profile=profile):
+            yield self.generate_single_chunk(text_chunk, voice, speed)
+
+    def generate_from_fragments(self, fragments, voice: str = "expr-voice-5-m", speed: float = 1.0,
+                                profile: str = None):
+        """Synthesize text that arrives in pieces, such as an LLM token stream or a book read in blocks.
+
+        Each sentence is normalized and synthesized as soon as it is complete,
+        so the whole text is never held in memory.
+
+        Args:
+            fragments: Iterable of text fragments
+            voice: Voice to use for synthesis
+            speed: Speech speed (1.0 = normal)
+            profile: Preprocessing profile: "full" (default), "fast" or "numeric"
+
+        Yields:
+            Audio data as numpy array, one per text chunk
+        """
+        for sentence in StreamingPreprocessor(self.preprocessor_for(profile)).stream(fragments):
+            for text_chunk in chunk_text(sentence):
+                yield self.generate_single_chunk(text_chunk, voice, speed)
+
+    def text_chunks(self, text: str, clean_text: bool=True, profile: str = None) -> list:
+        """Split text into the chunks that are synthesized one model call each."""
+        if clean_text:
+            t0 = time.perf_counter()
+            text = self.preprocessor_for(profile).process_sentences(text)
+            self._observe("preprocess", t0)
+        return chunk_text(text)
+
     def generate_single_chunk(self, text: str, voice: str = "expr-voice-5-m", speed: float = 1.0) -> np.ndarray:
         """Synthesize speech from text.
         
@@ -167,15 +279,76 @@ class KittenTTS_1_Onnx:
         """
         onnx_inputs = self._prepare_inputs(text, voice, speed)
         
+        t0 = time.perf_counter()
         outputs = self.session.run(None, onnx_inputs)
+        self._observe("onnx", t0)
         
         # Trim audio
-        audio = outputs[0][..., :-5000]
+        t0 = time.perf_counter()
+        audio = outputs[0][..., :-TRIM_SAMPLES]
+        self._observe("trim", t0)
 
         return audio
+
+    def run_batch(self, batch_inputs: list) -> list:
+        """Run several prepared inputs (from _prepare_inputs) with the same token count and speed.
+        
+        The rows are stacked into one model call with per-row style. Each
+        row's length depends on its phonemes and voice, and the output is
+        padded to the longest, so every row is cut back to the length given by
+        its per-token durations before trimming, as a call of its own would be.
+        A graph without a durations output never batches: rows run one call
+        each. If the graph does not take a batch (fixed batch dimension, or
+        outputs that are not one row per input), batching is switched off for
+        this model. Any other failure is logged and that batch runs one call
+        per row; batching is switched off after MAX_BATCH_FAILURES in a row.
+        
+        Returns:
+            Trimmed audio for each row, in order
+        """
+        same_speed = len({float(b["speed"][0]) for b in batch_inputs}) == 1
+        if len(batch_inputs) > 1 and self.batching and same_speed:
+            try:
+                t0 = time.perf_counter()
+                outputs = self.session.run(None, {
+                    "input_ids": np.concatenate([b["input_ids"] for b in batch_inputs], axis=0),
+                    "style": np.concatenate([b["style"] for b in batch_inputs], axis=0),
+                    "speed": np.concatenate([b["speed"] for b in batch_inputs], axis=0),
+                })
+                self._observe("onnx", t0)
+                audio = outputs[0]
+                lengths = row_lengths(audio, outputs[self._duration_output], len(batch_inputs))
+                if lengths is not None:
+                    self._batch_failures = 0
+                    t0 = time.perf_counter()
+                    rows = [row[..., :length][..., :-TRIM_SAMPLES] for row, length in zip(audio, lengths)]
+                    self._observe("trim", t0)
+                    return rows
+                logger.warning(
+                    "Model outputs %s do not give one row and length per input; batching disabled",
+                    [np.shape(o) for o in outputs],
+                )
+                self.batching = False
+            except (InvalidArgument, ValueError) as e:
+                logger.warning("Model does not take a batch (%s); batching disabled", e)
+                self.batching = False
+            except Exception:
+                self._batch_failures += 1
+                logger.exception("Batched model call failed; running %d rows one by one", len(batch_inputs))
+                if self._batch_failures >= MAX_BATCH_FAILURES:
+                    logger.warning("%d batched calls failed in a row; batching disabled", self._batch_failures)
+                    self.batching = False
+        rows = []
+        for b in batch_inputs:
+            t0 = time.perf_counter()
+            outputs = self.session.run(None, b)
+            self._observe("onnx", t0)
+            rows.append(outputs[0][..., :-TRIM_SAMPLES])
+        return rows
     
     def generate_to_file(self, text: str, output_path: str, voice: str = "expr-voice-5-m", 
-                          speed: float = 1.0, sample_rate: int = 24000, clean_text: bool=True) -> None:
+                          speed: float = 1.0, sample_rate: int = 24000, clean_text: bool=True,
+                          profile: str = None) -> None:
         """Synthesize speech and save to file.
         
         Args:
@@ -185,7 +358,8 @@ class KittenTTS_1_Onnx:
             speed: Speech speed (1.0 = normal)
             sample_rate: Audio sample rate
             clean_text: If true, it will cleanup the text. Eg. replace numbers with words.
+            profile: Preprocessing profile: "full" (default), "fast" or "numeric"
         """
-        audio = self.generate(text, voice, speed, clean_text=clean_text)
+        audio = self.generate(text, voice, speed, clean_text=clean_text, profile=profile)
         sf.write(output_path, audio, sample_rate)
         print(f"Audio saved to {output_path}")
@@ -3,9 +3,14 @@ text_preprocessing.py
 A comprehensive text preprocessing library for NLP pipelines.
 """
 
+import os
 import re
+import threading
 import unicodedata
-from typing import Optional
+from collections import OrderedDict, deque
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from typing import Iterable, Iterator, Optional
 
 
 # ─────────────────────────────────────────────
@@ -31,6 +36,39 @@ _CURRENCY_SYMBOLS = {
     "₹": "rupee", "₩": "won", "₿": "bitcoin",
 }
 
+# Uppercase scale suffixes: $85K, 7B, 340M
+_SCALE_WORDS = {"K": "thousand", "M": "million", "B": "billion", "T": "trillion"}
+
+# Read digit by digit: decimals, IP octets, phone numbers
+_DECIMAL_DIGITS = ["zero"] + _ONES[1:10]
+_DIGIT_WORDS = {str(d): word for d, word in enumerate(_DECIMAL_DIGITS)}
+
+_DECADE_WORDS = {
+    0: "hundreds", 1: "tens", 2: "twenties", 3: "thirties", 4: "forties",
+    5: "fifties", 6: "sixties", 7: "seventies", 8: "eighties", 9: "nineties",
+}
+
+# Lowercased unit as matched by _RE_UNIT → spoken form
+_UNIT_MAP = {
+    "km": "kilometers", "kg": "kilograms", "mg": "milligrams",
+    "ml": "milliliters", "gb": "gigabytes", "mb": "megabytes",
+    "kb": "kilobytes", "tb": "terabytes",
+    "hz": "hertz", "khz": "kilohertz", "mhz": "megahertz", "ghz": "gigahertz",
+    "mph": "miles per hour", "kph": "kilometers per hour",
+    "ms": "milliseconds", "ns": "nanoseconds", "µs": "microseconds",
+    "°c": "degrees Celsius", "c°": "degrees Celsius",
+    "°f": "degrees Fahrenheit", "f°": "degrees Fahrenheit",
+}
+
+_STOPWORDS = frozenset({
+    "a", "an", "the", "and", "or", "but", "in", "on", "at", "to",
+    "for", "of", "with", "by", "from", "is", "was", "are", "were",
+    "be", "been", "being", "have", "has", "had", "do", "does", "did",
+    "will", "would", "could", "should", "may", "might", "this", "that",
+    "these", "those", "it", "its", "i", "me", "my", "we", "our",
+    "you", "your", "he", "she", "him", "her", "they", "them", "their",
+})
+
 _ROMAN = [
     (1000, "M"), (900, "CM"), (500, "D"), (400, "CD"),
     (100, "C"),  (90, "XC"),  (50, "L"),  (40, "XL"),
@@ -41,8 +79,8 @@ _RE_ROMAN = re.compile(
 )
 
 
-def _three_digits_to_words(n: int) -> str:
-    """Convert a number 0–999 to English words."""
+def _compose_three_digits(n: int) -> str:
+    """Spell out a number 0–999 (0 → ""). Used once per value to build _THREE_DIGIT_WORDS."""
     if n == 0:
         return ""
     parts = []
@@ -60,6 +98,20 @@ def _three_digits_to_words(n: int) -> str:
     return " ".join(parts)
 
 
+_THREE_DIGIT_WORDS = [_compose_three_digits(n) for n in range(1000)]
+
+
+def _three_digits_to_words(n: int) -> str:
+    """Convert a number 0–999 to English words."""
+    return _THREE_DIGIT_WORDS[n]
+
+
+# Converters are memoized: numeric-heavy text (prices, specs, addresses) repeats
+# the same values, and the caches are bounded so unbounded input cannot grow them.
+_CACHE_SIZE = 4096
+
+
+@lru_cache(maxsize=_CACHE_SIZE)
 def number_to_words(n: int) -> str:
     """
     Convert an integer to its English word representation.
@@ -109,7 +161,12 @@ def float_to_words(value, decimal_sep: str = "point") -> str:
         "3.10" → "three point one zero"
         1.007  → "one point zero zero seven"
     """
-    text = value if isinstance(value, str) else f"{value}"
+    # Cache on the text: -0.0 == 0.0 and 1 == 1.0, but they read differently
+    return _float_text_to_words(value if isinstance(value, str) else f"{value}", decimal_sep)
+
+
+@lru_cache(maxsize=_CACHE_SIZE)
+def _float_text_to_words(text: str, decimal_sep: str) -> str:
     negative = text.startswith("-")
     if negative:
         text = text[1:]
@@ -117,9 +174,8 @@ def float_to_words(value, decimal_sep: str = "point") -> str:
     if "." in text:
         int_part, dec_part = text.split(".", 1)
         int_words = number_to_words(int(int_part)) if int_part else "zero"
-        # Read each decimal digit individually; "0" → "zero"
-        digit_map = ["zero"] + _ONES[1:]  # index 0 → "zero"
-        dec_words = " ".join(digit_map[int(d)] for d in dec_part)
+        # Read each decimal digit individually; "0" → "zero" (int() also reads non-ASCII digits)
+        dec_words = " ".join(_DECIMAL_DIGITS[int(d)] for d in dec_part)
         result = f"{int_words} {decimal_sep} {dec_words}"
     else:
         result = number_to_words(int(text))
@@ -163,7 +219,9 @@ _RE_ORDINAL  = re.compile(r"\b(\d+)(st|nd|rd|th)\b", re.IGNORECASE)
 _RE_PERCENT  = re.compile(r"(-?[\d,]+(?:\.\d+)?)\s*%")
 
 # Currency: $100, €1,200.50, £50, $85K, $2.5M (optional scale suffix)
-_RE_CURRENCY = re.compile(r"([$€£¥₹₩₿])\s*([\d,]+(?:\.\d+)?)\s*([KMBT])?(?![a-zA-Z\d])")
+_RE_CURRENCY = re.compile(
+    "([" + re.escape("".join(_CURRENCY_SYMBOLS)) + r"])\s*([\d,]+(?:\.\d+)?)\s*([KMBT])?(?![a-zA-Z\d])"
+)
 
 # Time: 3:30pm, 14:00, 3:30 AM — requires 2-digit minutes so "3:0" (score) doesn't match
 _RE_TIME     = re.compile(r"\b(\d{1,2}):(\d{2})(?::(\d{2}))?\s*(am|pm)?\b", re.IGNORECASE)
@@ -176,8 +234,8 @@ _RE_RANGE    = re.compile(r"(?<!\w)(\d+)-(\d+)(?!\w)")
 _RE_MODEL_VER = re.compile(r"\b([a-zA-Z][a-zA-Z0-9]*)-(\d[\d.]*)(?=[^\d.]|$)")
 
 # Measurement units glued to numbers: 100km, 50kg, 25°C, 5GB
-_RE_UNIT     = re.compile(r"(\d+(?:\.\d+)?)\s*(km|kg|mg|ml|gb|mb|kb|tb|hz|khz|mhz|ghz|mph|kph|°[cCfF]|[cCfF]°|ms|ns|µs)\b",
-                          re.IGNORECASE)
+_UNITS       = r"km|kg|mg|ml|gb|mb|kb|tb|hz|khz|mhz|ghz|mph|kph|°[cCfF]|[cCfF]°|ms|ns|µs"
+_RE_UNIT     = re.compile(r"(\d+(?:\.\d+)?)\s*(" + _UNITS + r")\b", re.IGNORECASE)
 
 # Scale suffixes (uppercase only to avoid ambiguity): 7B, 340M, 1.5K, 2T
 # Must NOT be preceded by a letter (so 'MB' is handled by unit regex first)
@@ -192,14 +250,233 @@ _RE_FRACTION = re.compile(r"\b(\d+)\s*/\s*(\d+)\b")
 # Decades: 80s, 90s, 1980s, 2020s (number ending in 0 followed by 's')
 _RE_DECADE   = re.compile(r"\b(\d{1,3})0s\b")
 
-# Leading decimal (no digit before the dot): .5, .75
+# Leading decimal (no digit before the dot): .5, .75, and negative -.5
 _RE_LEAD_DEC = re.compile(r"(?<!\d)\.([\d])")
+_RE_NEG_LEAD_DEC = re.compile(r"(?<!\d)(-)\.([\d])")
+
+# IPv4 addresses: 192.168.1.1
+_RE_IP = re.compile(r"\b(\d{1,3})\.(\d{1,3})\.(\d{1,3})\.(\d{1,3})\b")
+
+# US phone numbers, longest form first: 1-800-555-0199, 555-123-4567, 555-1234
+_RE_PHONE_11 = re.compile(r"(?<!\d-)(?<!\d)\b(\d{1,2})-(\d{3})-(\d{3})-(\d{4})\b(?!-\d)")
+_RE_PHONE_10 = re.compile(r"(?<!\d-)(?<!\d)\b(\d{3})-(\d{3})-(\d{4})\b(?!-\d)")
+_RE_PHONE_7  = re.compile(r"(?<!\d-)\b(\d{3})-(\d{4})\b(?!-\d)")
+
+# A whitespace-delimited token containing a digit
+_RE_NUMERIC_TOKEN = re.compile(r"\S*\d\S*")
+# Where a digit stage's match can take in whitespace, so tokens cannot be
+# expanded one at a time: "50 %", "$ 5", "$5 .", "3:30 pm" (and "3:30 x",
+# where the time pattern swallows the space), "100 km", "5 K", "3 / 4";
+# plus ",%" and "$,", which the percent and currency patterns match
+# without a digit. Errs towards matching.
+_RE_NUMERIC_SPAN = re.compile(
+    r"[\d,]\s+(?:%|/|[KMBT](?![a-zA-Z\d])|(?i:" + _UNITS + r"))"
+    r"|/\s+[.\d]|,\s*%"
+    r"|[" + re.escape("".join(_CURRENCY_SYMBOLS)) + r"](?:[\s,]|[\d,.]*\d[\d,.]*\s(?![a-zA-Z\d]))"
+    r"|\d:\d\d\s+[\w.,\-" + re.escape("".join(_CURRENCY_SYMBOLS)) + r"]"
+)
+
+# Words that make a following single-letter Roman numeral (I, V, X) likely
+_RE_TITLE_WORDS = re.compile(
+    r"\b(war|chapter|part|volume|act|scene|book|section|article|"
+    r"king|queen|pope|louis|henry|edward|george|william|james|"
+    r"phase|round|level|stage|class|type|version|episode|season)\b",
+    re.IGNORECASE,
+)
+
+# Contractions, applied in this order. Each word containing an apostrophe is
+# rewritten by all rules in turn, so chains such as "I'd've" → "I would have"
+# resolve exactly as sequential passes over the whole text would.
+_CONTRACTION_RULES = [
+    (re.compile(pattern, re.IGNORECASE), replacement)
+    for pattern, replacement in [
+        (r"\bcan't\b",   "cannot"),
+        (r"\bwon't\b",   "will not"),
+        (r"\bshan't\b",  "shall not"),
+        (r"\bain't\b",   "is not"),
+        (r"\blet's\b",   "let us"),
+        (r"\b(\w+)n't\b", r"\1 not"),
+        (r"\b(\w+)'re\b", r"\1 are"),
+        (r"\b(\w+)'ve\b", r"\1 have"),
+        (r"\b(\w+)'ll\b", r"\1 will"),
+        (r"\b(\w+)'d\b",  r"\1 would"),
+        (r"\b(\w+)'m\b",  r"\1 am"),
+        (r"\bit's\b",    "it is"),
+    ]
+]
+# A whole run of word characters and apostrophes that contains an apostrophe.
+# No rule can match across anything else, so rewriting each run is exact.
+_RE_APOSTROPHE_WORD = re.compile(r"(?<![\w'])[\w']*'[\w']*")
+
+
+# ─────────────────────────────────────────────
+# Offset tracking
+# ─────────────────────────────────────────────
+# TextPreprocessor.process_aligned() records where every output character
+# came from. While it runs, the stages report their edits through _sub() and
+# the helpers below; the rest of the time these cost one global check.
+
+_tracking = 0                   # process_aligned() calls in progress, any thread
+_tracking_lock = threading.Lock()
+_local = threading.local()
+# A character with the combining marks that follow it; a whitespace-free token
+_RE_GRAPHEME = re.compile(r".[\u0300-\u036f\u1ab0-\u1aff\u1dc0-\u1dff\u20d0-\u20ff\ufe20-\ufe2f]*", re.DOTALL)
+_RE_TOKEN = re.compile(r"\S+")
+
+
+class _Alignment:
+    """
+    The text as it currently stands, with the input span (start, end) each
+    of its characters came from. Inserted text gets an empty span at its
+    insertion point.
+    """
+
+    def __init__(self, text: str):
+        self.text = text
+        self.spans = [(i, i + 1) for i in range(len(text))]
+        self.size = len(text)
+
+    def apply(self, text: str, edits: list, out: str) -> None:
+        """Record (start, end, replacement) edits, in order, that turned text into out."""
+        self.sync(text)
+        spans, new = self.spans, []
+        last = 0
+        for start, end, replacement in edits:
+            new.extend(spans[last:start])
+            if end > start:
+                span = (spans[start][0], spans[end - 1][1])
+            else:
+                at = spans[start][0] if start < len(spans) else (spans[-1][1] if spans else self.size)
+                span = (at, at)
+            new.extend([span] * len(replacement))
+            last = end
+        new.extend(spans[last:])
+        self.text, self.spans = out, new
+
+    def relabel(self, text: str, out: str) -> None:
+        """Record a change that kept every character in place (same length)."""
+        self.sync(text)
+        self.text = out
+
+    def sync(self, text: str) -> None:
+        """Catch up with a change made without reporting edits, as one edit around what differs."""
+        old = self.text
+        if text == old:
+            return
+        n = min(len(old), len(text))
+        head = 0
+        while head < n and old[head] == text[head]:
+            head += 1
+        tail = 0
+        while tail < n - head and old[-1 - tail] == text[-1 - tail]:
+            tail += 1
+        self.apply(old, [(head, len(old) - tail, text[head:len(text) - tail])], text)
+
+    def segments(self) -> list:
+        """
+        The alignment as (out_start, out_end, in_start, in_end) runs: text
+        copied unchanged is one run per stretch, each replacement one run.
+        """
+        runs = []       # [out_start, out_end, in_start, in_end, kind]
+        for i, (start, end) in enumerate(self.spans):
+            if runs:
+                run = runs[-1]
+                # kind is None while a run is one character and could go either way
+                if run[4] != "replaced" and end - start == 1 and start == run[3] and run[3] - run[2] == run[1] - run[0]:
+                    run[1], run[3], run[4] = i + 1, end, "copied"
+                    continue
+                if run[4] != "copied" and (start, end) == (run[2], run[3]):
+                    run[1], run[4] = i + 1, "replaced"
+                    continue
+            runs.append([i, i + 1, start, end, None])
+        return [tuple(run[:4]) for run in runs]
+
+
+def _alignment() -> Optional[_Alignment]:
+    """This thread's alignment while process_aligned() runs, else None."""
+    return getattr(_local, "alignment", None) if _tracking else None
+
+
+def _sub(pattern: re.Pattern, repl, text: str) -> str:
+    """pattern.sub(repl, text), reporting each replacement when offsets are tracked."""
+    alignment = getattr(_local, "alignment", None) if _tracking else None
+    if alignment is None:
+        return pattern.sub(repl, text)
+    edits, pieces, last = [], [], 0
+    for m in pattern.finditer(text):
+        replacement = repl(m) if callable(repl) else m.expand(repl)
+        pieces.append(text[last:m.start()])
+        pieces.append(replacement)
+        last = m.end()
+        if replacement != m.group():
+            edits.append((m.start(), m.end(), replacement))
+    if not edits:
+        return text
+    pieces.append(text[last:])
+    out = "".join(pieces)
+    alignment.apply(text, edits, out)
+    return out
+
+
+def _strip(text: str) -> str:
+    """text.strip(), reporting what it removed when offsets are tracked."""
+    out = text.strip()
+    alignment = _alignment()
+    if alignment is not None and out != text:
+        start = text.find(out[:1]) if out else len(text)
+        edits = [(0, start, "")] if start else []
+        if start + len(out) < len(text):
+            edits.append((start + len(out), len(text), ""))
+        alignment.apply(text, edits, out)
+    return out
+
+
+def _map_pieces(text: str, pieces: Iterable[tuple], out: str) -> str:
+    """
+    Report a transform applied piece by piece: pieces are (start, end,
+    result). Used only if the results join up to out; otherwise the change
+    is left for _Alignment.sync().
+    """
+    alignment = _alignment()
+    if alignment is None or out == text:
+        return out
+    edits = []
+    joined = []
+    for start, end, result in pieces:
+        joined.append(result)
+        if result != text[start:end]:
+            edits.append((start, end, result))
+    if "".join(joined) == out:
+        alignment.apply(text, edits, out)
+    return out
+
+
+def source_span(segments: list, start: int, end: int) -> Optional[tuple]:
+    """
+    Input offsets (in_start, in_end) that output[start:end] came from, given
+    the segments from TextPreprocessor.process_aligned(); None if the range
+    covers no output.
+
+    Examples:
+        "Pay $5", output "pay five dollars", range of "five" → (4, 6)  ("$5")
+    """
+    lo = hi = None
+    for out_start, out_end, in_start, in_end in segments:
+        if out_end <= start or out_start >= end:
+            continue
+        if out_end - out_start == in_end - in_start:
+            # Copied text: trim to the part of the run that overlaps
+            in_start, in_end = in_start + max(0, start - out_start), in_end - max(0, out_end - end)
+        lo = in_start if lo is None else min(lo, in_start)
+        hi = in_end if hi is None else max(hi, in_end)
+    return None if lo is None else (lo, hi)
 
 
 # ─────────────────────────────────────────────
 # Expansion helpers
 # ─────────────────────────────────────────────
 
+@lru_cache(maxsize=_CACHE_SIZE)
 def _ordinal_suffix(n: int) -> str:
     """Return the ordinal word for n (e.g. 1 → 'first', 5 → 'fifth', 21 → 'twenty-first')."""
     word = number_to_words(n)
@@ -211,13 +488,9 @@ def _ordinal_suffix(n: int) -> str:
         parts = word.rsplit(" ", 1)
         prefix, last, joiner = (parts[0], parts[1], " ") if len(parts) == 2 else ("", parts[0], "")
 
-    # Check exception table
-    for base, ordinal in _ORDINAL_EXCEPTIONS.items():
-        if last == base:
-            last_ord = ordinal
-            break
-    else:
-        # General rule
+    # Check exception table, else the general rule
+    last_ord = _ORDINAL_EXCEPTIONS.get(last)
+    if last_ord is None:
         if last.endswith("t"):
             last_ord = last + "h"
         elif last.endswith("e"):
@@ -241,7 +514,7 @@ def expand_ordinals(text: str) -> str:
     """
     def _replace(m: re.Match) -> str:
         return _ordinal_suffix(int(m.group(1)))
-    return _RE_ORDINAL.sub(_replace, text)
+    return _sub(_RE_ORDINAL, _replace, text)
 
 
 def expand_percentages(text: str) -> str:
@@ -258,7 +531,7 @@ def expand_percentages(text: str) -> str:
         if "." in raw:
             return float_to_words(float(raw)) + " percent"
         return number_to_words(int(raw)) + " percent"
-    return _RE_PERCENT.sub(_replace, text)
+    return _sub(_RE_PERCENT, _replace, text)
 
 
 def expand_currency(text: str) -> str:
@@ -272,8 +545,6 @@ def expand_currency(text: str) -> str:
         "$85K"      → "eighty five thousand dollars"
         "$2.5M"     → "two point five million dollars"
     """
-    _scale_map = {"K": "thousand", "M": "million", "B": "billion", "T": "trillion"}
-
     def _replace(m: re.Match) -> str:
         symbol = m.group(1)
         raw = m.group(2).replace(",", "")
@@ -282,7 +553,7 @@ def expand_currency(text: str) -> str:
 
         if scale_suffix:
             # e.g. $85K → "eighty five thousand dollars"
-            scale_word = _scale_map[scale_suffix]
+            scale_word = _SCALE_WORDS[scale_suffix]
             num = float_to_words(raw) if "." in raw else number_to_words(int(raw))
             return f"{num} {scale_word} {unit}{'s' if unit else ''}".strip()
 
@@ -300,7 +571,7 @@ def expand_currency(text: str) -> str:
             result = f"{words} {unit}{'s' if val != 1 and unit else ''}" if unit else words
         return result
 
-    return _RE_CURRENCY.sub(_replace, text)
+    return _sub(_RE_CURRENCY, _replace, text)
 
 
 def expand_time(text: str) -> str:
@@ -324,7 +595,7 @@ def expand_time(text: str) -> str:
             return f"{h_words} oh {number_to_words(mins)}{suffix}"
         else:
             return f"{h_words} {number_to_words(mins)}{suffix}"
-    return _RE_TIME.sub(_replace, text)
+    return _sub(_RE_TIME, _replace, text)
 
 
 def expand_ranges(text: str) -> str:
@@ -340,7 +611,7 @@ def expand_ranges(text: str) -> str:
         lo = number_to_words(int(m.group(1)))
         hi = number_to_words(int(m.group(2)))
         return f"{lo} to {hi}"
-    return _RE_RANGE.sub(_replace, text)
+    return _sub(_RE_RANGE, _replace, text)
 
 
 def expand_model_names(text: str) -> str:
@@ -356,7 +627,7 @@ def expand_model_names(text: str) -> str:
         "v2.0"       stays as "v2.0" (no hyphen — handled by number replacement)
         "IPv6"       stays as "IPv6"
     """
-    return _RE_MODEL_VER.sub(lambda m: f"{m.group(1)} {m.group(2)}", text)
+    return _sub(_RE_MODEL_VER, lambda m: f"{m.group(1)} {m.group(2)}", text)
 
 
 def expand_units(text: str) -> str:
@@ -369,23 +640,13 @@ def expand_units(text: str) -> str:
         "25°C"   → "twenty-five degrees Celsius"
         "5GB"    → "five gigabytes"
     """
-    _unit_map = {
-        "km": "kilometers", "kg": "kilograms", "mg": "milligrams",
-        "ml": "milliliters", "gb": "gigabytes", "mb": "megabytes",
-        "kb": "kilobytes", "tb": "terabytes",
-        "hz": "hertz", "khz": "kilohertz", "mhz": "megahertz", "ghz": "gigahertz",
-        "mph": "miles per hour", "kph": "kilometers per hour",
-        "ms": "milliseconds", "ns": "nanoseconds", "µs": "microseconds",
-        "°c": "degrees Celsius", "c°": "degrees Celsius",
-        "°f": "degrees Fahrenheit", "f°": "degrees Fahrenheit",
-    }
     def _replace(m: re.Match) -> str:
         raw = m.group(1)
         unit = m.group(2).lower()
-        expanded = _unit_map.get(unit, m.group(2))
+        expanded = _UNIT_MAP.get(unit, m.group(2))
         num = float_to_words(float(raw)) if "." in raw else number_to_words(int(raw))
         return f"{num} {expanded}"
-    return _RE_UNIT.sub(_replace, text)
+    return _sub(_RE_UNIT, _replace, text)
 
 
 def expand_roman_numerals(text: str, context_words: bool = True) -> str:
@@ -399,13 +660,6 @@ def expand_roman_numerals(text: str, context_words: bool = True) -> str:
         "Louis XIV"        → "Louis fourteen"
         "mix I with V"     → left unchanged (ambiguous single letters)
     """
-    _TITLE_WORDS = re.compile(
-        r"\b(war|chapter|part|volume|act|scene|book|section|article|"
-        r"king|queen|pope|louis|henry|edward|george|william|james|"
-        r"phase|round|level|stage|class|type|version|episode|season)\b",
-        re.IGNORECASE,
-    )
-
     def _replace(m: re.Match) -> str:
         roman = m.group(0)
         if not roman.strip():
@@ -415,7 +669,7 @@ def expand_roman_numerals(text: str, context_words: bool = True) -> str:
             # Only expand if preceded by a title word
             start = m.start()
             preceding = text[max(0, start - 30): start]
-            if not _TITLE_WORDS.search(preceding):
+            if not _RE_TITLE_WORDS.search(preceding):
                 return roman
         try:
             val = roman_to_int(roman)
@@ -425,7 +679,7 @@ def expand_roman_numerals(text: str, context_words: bool = True) -> str:
         except Exception:
             return roman
 
-    return _RE_ROMAN.sub(_replace, text)
+    return _sub(_RE_ROMAN, _replace, text)
 
 
 def normalize_leading_decimals(text: str) -> str:
@@ -437,8 +691,8 @@ def normalize_leading_decimals(text: str) -> str:
         "-.25 adjustment" → "-0.25 adjustment"
     """
     # Handle -.5 → -0.5 and .5 → 0.5
-    text = re.sub(r"(?<!\d)(-)\.([\d])", r"\g<1>0.\2", text)
-    return _RE_LEAD_DEC.sub(r"0.\1", text)
+    text = _sub(_RE_NEG_LEAD_DEC, r"\g<1>0.\2", text)
+    return _sub(_RE_LEAD_DEC, r"0.\1", text)
 
 
 def expand_scientific_notation(text: str) -> str:
@@ -457,7 +711,7 @@ def expand_scientific_notation(text: str) -> str:
         exp_words = number_to_words(abs(exp))
         sign = "negative " if exp < 0 else ""
         return f"{coeff_words} times ten to the {sign}{exp_words}"
-    return _RE_SCI.sub(_replace, text)
+    return _sub(_RE_SCI, _replace, text)
 
 
 def expand_scale_suffixes(text: str) -> str:
@@ -470,16 +724,14 @@ def expand_scale_suffixes(text: str) -> str:
         "1.5K salary"   → "one point five thousand salary"
         "$100K budget"  → "$100K budget"  (currency handled upstream)
     """
-    _map = {"K": "thousand", "M": "million", "B": "billion", "T": "trillion"}
-
     def _replace(m: re.Match) -> str:
         raw = m.group(1)
         suffix = m.group(2)
-        scale_word = _map.get(suffix, suffix)
+        scale_word = _SCALE_WORDS.get(suffix, suffix)
         num = float_to_words(raw) if "." in raw else number_to_words(int(raw))
         return f"{num} {scale_word}"
 
-    return _RE_SCALE.sub(_replace, text)
+    return _sub(_RE_SCALE, _replace, text)
 
 
 def expand_fractions(text: str) -> str:
@@ -508,7 +760,7 @@ def expand_fractions(text: str) -> str:
                 denom_word += "s"
         return f"{num_words} {denom_word}"
 
-    return _RE_FRACTION.sub(_replace, text)
+    return _sub(_RE_FRACTION, _replace, text)
 
 
 def expand_decades(text: str) -> str:
@@ -521,21 +773,16 @@ def expand_decades(text: str) -> str:
         "the 2020s"  → "the twenty twenties"
         "'90s music" → "nineties music"
     """
-    _decade_map = {
-        0: "hundreds", 1: "tens", 2: "twenties", 3: "thirties", 4: "forties",
-        5: "fifties", 6: "sixties", 7: "seventies", 8: "eighties", 9: "nineties",
-    }
-
     def _replace(m: re.Match) -> str:
         base = int(m.group(1))          # e.g. 8 for "80s", 198 for "1980s"
         decade_digit = base % 10
-        decade_word = _decade_map.get(decade_digit, "")
+        decade_word = _DECADE_WORDS.get(decade_digit, "")
         if base < 10:
             return decade_word
         century_part = base // 10       # e.g. 19 for 198
         return f"{number_to_words(century_part)} {decade_word}"
 
-    return _RE_DECADE.sub(_replace, text)
+    return _sub(_RE_DECADE, _replace, text)
 
 
 def expand_ip_addresses(text: str) -> str:
@@ -546,16 +793,13 @@ def expand_ip_addresses(text: str) -> str:
         "192.168.1.1"  → "one nine two dot one six eight dot one dot one"
         "10.0.0.1"     → "one zero dot zero dot zero dot one"
     """
-    _d = {"0": "zero", "1": "one", "2": "two", "3": "three", "4": "four",
-          "5": "five", "6": "six", "7": "seven", "8": "eight", "9": "nine"}
-
     def _octet(s: str) -> str:
-        return " ".join(_d[c] for c in s)
+        return " ".join(_DIGIT_WORDS[c] for c in s)
 
     def _replace(m: re.Match) -> str:
         return " dot ".join(_octet(g) for g in m.groups())
 
-    return re.sub(r"\b(\d{1,3})\.(\d{1,3})\.(\d{1,3})\.(\d{1,3})\b", _replace, text)
+    return _sub(_RE_IP, _replace, text)
 
 
 def expand_phone_numbers(text: str) -> str:
@@ -567,25 +811,13 @@ def expand_phone_numbers(text: str) -> str:
         "555-123-4567"   → "five five five one two three four five six seven"
         "1-800-555-0199" → "one eight zero zero five five five zero one nine nine"
     """
-    _d = {"0": "zero", "1": "one", "2": "two", "3": "three", "4": "four",
-          "5": "five", "6": "six", "7": "seven", "8": "eight", "9": "nine"}
-
-    def _digits(s: str) -> str:
-        return " ".join(_d[c] for c in s)
-
-    def _join(*groups) -> str:
-        return " ".join(_digits(g) for g in groups)
+    def _join(m: re.Match) -> str:
+        return " ".join(" ".join(_DIGIT_WORDS[c] for c in g) for g in m.groups())
 
     # Match longest pattern first to avoid partial matches
-    # 11-digit: 1-800-555-0199
-    text = re.sub(r"(?<!\d-)(?<!\d)\b(\d{1,2})-(\d{3})-(\d{3})-(\d{4})\b(?!-\d)",
-                  lambda m: _join(*m.groups()), text)
-    # 10-digit: 555-123-4567
-    text = re.sub(r"(?<!\d-)(?<!\d)\b(\d{3})-(\d{3})-(\d{4})\b(?!-\d)",
-                  lambda m: _join(*m.groups()), text)
-    # 7-digit local: 555-1234 (not preceded or followed by digit-hyphen to avoid sub-matching)
-    text = re.sub(r"(?<!\d-)\b(\d{3})-(\d{4})\b(?!-\d)",
-                  lambda m: _join(*m.groups()), text)
+    # (7-digit: not preceded or followed by digit-hyphen to avoid sub-matching)
+    for pattern in (_RE_PHONE_11, _RE_PHONE_10, _RE_PHONE_7):
+        text = _sub(pattern, _join, text)
     return text
 
 
@@ -612,58 +844,81 @@ def replace_numbers(text: str, replace_floats: bool = True) -> str:
                 return number_to_words(int(float(raw)))
         except (ValueError, OverflowError):
             return m.group()
-    return _RE_NUMBER.sub(_replace, text)
+    return _sub(_RE_NUMBER, _replace, text)
 
 
 def to_lowercase(text: str) -> str:
     """Convert text to lowercase."""
-    return text.lower()
+    out = text.lower()
+    alignment = _alignment()
+    if alignment is not None and out != text:
+        if len(out) == len(text):
+            alignment.relabel(text, out)
+        else:
+            # A few characters lowercase to two ("İ" → "i̇"); report them one by one
+            _map_pieces(text, ((i, i + 1, c.lower()) for i, c in enumerate(text)), out)
+    return out
 
 
 def remove_urls(text: str, replacement: str = "") -> str:
     """Remove URLs from text."""
-    return _RE_URL.sub(replacement, text).strip()
+    return _strip(_sub(_RE_URL, replacement, text))
 
 
 def remove_emails(text: str, replacement: str = "") -> str:
     """Remove email addresses from text."""
-    return _RE_EMAIL.sub(replacement, text).strip()
+    return _strip(_sub(_RE_EMAIL, replacement, text))
 
 
 def remove_html_tags(text: str) -> str:
     """Strip HTML tags from text."""
-    return _RE_HTML.sub(" ", text)
+    return _sub(_RE_HTML, " ", text)
 
 
 def remove_hashtags(text: str, replacement: str = "") -> str:
     """Remove hashtags (e.g. #NLP) from text."""
-    return _RE_HASHTAG.sub(replacement, text)
+    return _sub(_RE_HASHTAG, replacement, text)
 
 
 def remove_mentions(text: str, replacement: str = "") -> str:
     """Remove @mentions from text."""
-    return _RE_MENTION.sub(replacement, text)
+    return _sub(_RE_MENTION, replacement, text)
 
 
 def remove_punctuation(text: str) -> str:
     """Remove all punctuation characters."""
-    return _RE_PUNCT.sub(" ", text)
+    return _sub(_RE_PUNCT, " ", text)
 
 
 def remove_extra_whitespace(text: str) -> str:
     """Collapse multiple whitespace characters into a single space and strip ends."""
-    return _RE_SPACES.sub(" ", text).strip()
+    return _strip(_sub(_RE_SPACES, " ", text))
 
 
 def normalize_unicode(text: str, form: str = "NFC") -> str:
     """Normalize unicode characters (NFC, NFD, NFKC, or NFKD)."""
-    return unicodedata.normalize(form, text)
+    out = unicodedata.normalize(form, text)
+    if _tracking:
+        # Each base character with the combining marks after it normalizes on its own
+        return _map_pieces(text, (
+            (m.start(), m.end(), unicodedata.normalize(form, m.group()))
+            for m in _RE_GRAPHEME.finditer(text)
+        ), out)
+    return out
 
 
 def remove_accents(text: str) -> str:
     """Remove diacritical marks (accents) from characters."""
     nfkd = unicodedata.normalize("NFD", text)
-    return "".join(c for c in nfkd if unicodedata.category(c) != "Mn")
+    out = "".join(c for c in nfkd if unicodedata.category(c) != "Mn")
+    if _tracking:
+        return _map_pieces(text, (
+            (m.start(), m.end(), "".join(
+                c for c in unicodedata.normalize("NFD", m.group()) if unicodedata.category(c) != "Mn"
+            ))
+            for m in _RE_GRAPHEME.finditer(text)
+        ), out)
+    return out
 
 
 def expand_contractions(text: str) -> str:
@@ -675,23 +930,19 @@ def expand_contractions(text: str) -> str:
         "they're" → "they are"
         "I've"    → "I have"
     """
-    contractions = {
-        r"\bcan't\b":   "cannot",
-        r"\bwon't\b":   "will not",
-        r"\bshan't\b":  "shall not",
-        r"\bain't\b":   "is not",
-        r"\blet's\b":   "let us",
-        r"\b(\w+)n't\b": r"\1 not",
-        r"\b(\w+)'re\b": r"\1 are",
-        r"\b(\w+)'ve\b": r"\1 have",
-        r"\b(\w+)'ll\b": r"\1 will",
-        r"\b(\w+)'d\b":  r"\1 would",
-        r"\b(\w+)'m\b":  r"\1 am",
-        r"\bit's\b":    "it is",
-    }
-    for pattern, replacement in contractions.items():
-        text = re.sub(pattern, replacement, text, flags=re.IGNORECASE)
-    return text
+    return _sub(_RE_APOSTROPHE_WORD, _expand_contraction_word, text)
+
+
+@lru_cache(maxsize=4096)
+def _contraction_word(word: str) -> str:
+    """One apostrophe word with every contraction rule applied in order."""
+    for pattern, replacement in _CONTRACTION_RULES:
+        word = pattern.sub(replacement, word)
+    return word
+
+
+def _expand_contraction_word(m: re.Match) -> str:
+    return _contraction_word(m.group())
 
 
 def remove_stopwords(text: str, stopwords: Optional[set] = None) -> str:
@@ -702,22 +953,184 @@ def remove_stopwords(text: str, stopwords: Optional[set] = None) -> str:
         stopwords: Set of words to remove. Uses a built-in English set if None.
     """
     if stopwords is None:
-        stopwords = {
-            "a", "an", "the", "and", "or", "but", "in", "on", "at", "to",
-            "for", "of", "with", "by", "from", "is", "was", "are", "were",
-            "be", "been", "being", "have", "has", "had", "do", "does", "did",
-            "will", "would", "could", "should", "may", "might", "this", "that",
-            "these", "those", "it", "its", "i", "me", "my", "we", "our",
-            "you", "your", "he", "she", "him", "her", "they", "them", "their",
-        }
+        stopwords = _STOPWORDS
     tokens = text.split()
-    return " ".join(t for t in tokens if t.lower() not in stopwords)
+    out = " ".join(t for t in tokens if t.lower() not in stopwords)
+    if _tracking:
+        # Dropped words and the whitespace around kept ones, as pieces
+        pieces, last, sep = [], 0, ""
+        for m in _RE_TOKEN.finditer(text):
+            if m.group().lower() in stopwords:
+                continue
+            pieces.append((last, m.start(), sep))
+            pieces.append((m.start(), m.end(), m.group()))
+            last, sep = m.end(), " "
+        pieces.append((last, len(text), ""))
+        return _map_pieces(text, pieces, out)
+    return out
 
 
 # ─────────────────────────────────────────────
 # Pipeline helper
 # ─────────────────────────────────────────────
 
+_RE_DIGIT = re.compile(r"\d")
+
+
+def _has_any(needles):
+    """Trigger: the text contains at least one of the given characters or substrings."""
+    needles = tuple(needles)
+    return lambda text: any(n in text for n in needles)
+
+
+def _has_all(needles):
+    """Trigger: the text contains every one of the given characters or substrings."""
+    needles = tuple(needles)
+    return lambda text: all(n in text for n in needles)
+
+
+def _non_ascii(text: str) -> bool:
+    """Trigger for Unicode-only stages: pure ASCII is already NFC and has no accents."""
+    return not text.isascii()
+
+
+def _numeric_scanner(stages: list):
+    """
+    One stage doing the work of the digit stages (plan tuples, in order).
+
+    No digit stage matches across whitespace unless _RE_NUMERIC_SPAN finds
+    a place where it could, so the text is scanned once for tokens
+    containing a digit and each token runs through the stages on its own,
+    with the result memoized: prices, dates and figures repeat. Other text
+    (and text whose offsets are being tracked) runs through the stages
+    whole, as before. The output is the same either way.
+    """
+    def sequential(text: str) -> str:
+        for _, _, trigger, run, _ in stages:
+            if trigger is None or trigger(text):
+                text = run(text)
+        return text
+
+    expand_token = lru_cache(maxsize=_CACHE_SIZE)(sequential)
+
+    def scan(text: str) -> str:
+        if _tracking or _RE_NUMERIC_SPAN.search(text):
+            return sequential(text)
+        return _RE_NUMERIC_TOKEN.sub(lambda m: expand_token(m.group()), text)
+
+    return scan
+
+
+# Sentence boundary: terminal punctuation followed by whitespace ("3.14" and
+# "www.example.com" stay whole)
+_RE_SENTENCE_BREAK = re.compile(r"(?<=[.!?])\s+")
+
+
+class SentenceCache:
+    """
+    Bounded, thread-safe LRU of preprocessed sentences, keyed by
+    (config fingerprint, sentence) so preprocessors with different settings
+    can share one cache.
+    """
+
+    def __init__(self, maxsize: int = 4096):
+        self.maxsize = maxsize
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key) -> Optional[str]:
+        with self._lock:
+            value = self._entries.get(key)
+            if value is None:
+                self.misses += 1
+            else:
+                self._entries.move_to_end(key)
+                self.hits += 1
+            return value
+
+    def put(self, key, value: str) -> None:
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = 0
+
+    def stats(self) -> dict:
+        """Dict with hits, misses, size (sentences held) and maxsize."""
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "size": len(self._entries), "maxsize": self.maxsize}
+
+
+# Shared by every TextPreprocessor (and so every model instance and thread)
+SENTENCE_CACHE = SentenceCache()
+
+
+# Process-pool workers: each builds its own preprocessor from the parent's
+# config (the compiled plan holds lambdas, which do not pickle)
+_worker_preprocessor = None
+
+
+def _init_worker(config: dict) -> None:
+    global _worker_preprocessor
+    _worker_preprocessor = TextPreprocessor(**config)
+
+
+def _process_batch(texts: list) -> list:
+    return [_worker_preprocessor.process_sentences(text) for text in texts]
+
+
+def _batches(texts: Iterable[str], size: int) -> Iterator[list]:
+    batch = []
+    for text in texts:
+        batch.append(text)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+# Named settings for TextPreprocessor.from_profile(), as overrides of the
+# constructor defaults
+PROFILES = {
+    # Every expander: the constructor defaults
+    "full": {},
+    # Conversational (LLM) text: words, contractions and everyday numbers,
+    # money, percentages, ordinals and times; no markup, Unicode or
+    # technical-notation passes
+    "fast": {
+        "normalize_unicode": False,
+        "remove_html": False,
+        "remove_urls": False,
+        "remove_emails": False,
+        "expand_model_names": False,
+        "expand_ip_addresses": False,
+        "expand_phone_numbers": False,
+        "expand_scientific_notation": False,
+        "expand_fractions": False,
+        "expand_decades": False,
+        "expand_ranges": False,
+        "expand_units": False,
+        "expand_scale_suffixes": False,
+        "normalize_leading_decimals": False,
+    },
+    # Finance and tech text: every number, unit and address expander, without
+    # the HTML and Unicode passes
+    "numeric": {
+        "normalize_unicode": False,
+        "remove_html": False,
+    },
+}
+DEFAULT_PROFILE = "full"
+
+
 class TextPreprocessor:
     """
     Configurable preprocessing pipeline.
@@ -769,77 +1182,557 @@ class TextPreprocessor:
     ):
         self.config = {k: v for k, v in locals().items() if k != "self"}
         self._stopwords = stopwords
+        self._plan = self._compile()
+        self.fingerprint = tuple(
+            (k, frozenset(v) if isinstance(v, (set, frozenset)) else v) for k, v in sorted(self.config.items())
+        )
+
+    @classmethod
+    def from_profile(cls, profile: str = DEFAULT_PROFILE, **overrides) -> "TextPreprocessor":
+        """
+        A preprocessor with one of the PROFILES' settings.
+
+        Args:
+            profile: "full", "fast" or "numeric"
+            **overrides: Constructor arguments to change on top of the profile
+
+        Raises:
+            ValueError: for an unknown profile
+        """
+        if profile not in PROFILES:
+            raise ValueError(f"Unknown profile '{profile}'. Choose from: {sorted(PROFILES)}")
+        return cls(**{**PROFILES[profile], **overrides})
+
+    def _compile(self, fuse_numeric: bool = True) -> list:
+        """
+        Build the execution plan: the enabled stages, in pipeline order, as
+        (name, family, trigger, run, skip) tuples. With fuse_numeric, the
+        digit stages become one "numeric_tokens" stage (see _numeric_scanner)
+        unless Roman numeral expansion runs between them.
+
+        name    – the stage's config flag
+        family  – "digit" for stages that can only match text containing a digit;
+                  the whole family is skipped when the text has none
+        trigger – cheap check on the current text, or None to always run;
+                  when it fails the stage could not have matched anything
+        run     – the stage itself
+        skip    – what to do instead when the trigger fails (None: nothing)
+        """
+        cfg = self.config
+        stages = [
+            # (config flag, family, trigger, run, skip)
+            ("normalize_unicode", None, _non_ascii, normalize_unicode, None),
+            ("remove_html", None, _has_all("<>"), remove_html_tags, None),
+            ("remove_urls", None, _has_any(("http", "www.")), remove_urls, _strip),
+            ("remove_emails", None, _has_any("@"), remove_emails, _strip),
+            ("remove_hashtags", None, _has_any("#"), remove_hashtags, None),
+            ("remove_mentions", None, _has_any("@"), remove_mentions, None),
+            ("expand_contractions", None, _has_any("'"), expand_contractions, None),
+            # IP addresses before normalize_leading_decimals (IPs contain dots before digits)
+            ("expand_ip_addresses", "digit", _has_any("."), expand_ip_addresses, None),
+            # Normalise bare leading decimals early so downstream regexes see "0.5" not ".5"
+            ("normalize_leading_decimals", "digit", _has_any("."), normalize_leading_decimals, None),
+            # Expand special forms before generic number replacement
+            ("expand_currency", "digit", _has_any(_CURRENCY_SYMBOLS), expand_currency, None),
+            ("expand_percentages", "digit", _has_any("%"), expand_percentages, None),
+            # Scientific notation before model-name expansion (e.g. "1e-4" contains "e-4")
+            ("expand_scientific_notation", "digit", _has_any("eE"), expand_scientific_notation, None),
+            ("expand_time", "digit", _has_any(":"), expand_time, None),
+            ("expand_ordinals", "digit", None, expand_ordinals, None),
+            ("expand_units", "digit", None, expand_units, None),
+            # Scale suffixes after units (units handles "MB"/"GB"; this handles bare "B"/"M")
+            ("expand_scale_suffixes", "digit", _has_any("KMBT"), expand_scale_suffixes, None),
+            ("expand_fractions", "digit", _has_any("/"), expand_fractions, None),
+            ("expand_decades", "digit", _has_any(("0s",)), expand_decades, None),
+            # Phone numbers before ranges, otherwise NNN-NNNN is treated as a range
+            ("expand_phone_numbers", "digit", _has_any("-"), expand_phone_numbers, None),
+            ("expand_ranges", "digit", _has_any("-"), expand_ranges, None),
+            ("expand_model_names", "digit", _has_any("-"), expand_model_names, None),
+            ("expand_roman_numerals", None, _has_any("IVXLCDM"), expand_roman_numerals, None),
+            ("replace_numbers", "digit", None,
+             lambda text: replace_numbers(text, replace_floats=cfg["replace_floats"]), None),
+            ("remove_accents", None, _non_ascii, remove_accents, None),
+            ("remove_punctuation", None, None, remove_punctuation, None),
+            ("lowercase", None, None, to_lowercase, None),
+            ("remove_stopwords", None, None, lambda text: remove_stopwords(text, self._stopwords), None),
+            ("remove_extra_whitespace", None, None, remove_extra_whitespace, None),
+        ]
+        plan = [stage for stage in stages if cfg[stage[0]]]
+        digit = [stage for stage in plan if stage[1] == "digit"]
+        at = plan.index(digit[0]) if digit else 0
+        if fuse_numeric and len(digit) > 1 and plan[at:at + len(digit)] == digit:
+            plan[at:at + len(digit)] = [("numeric_tokens", "digit", None, _numeric_scanner(digit), None)]
+        return plan
 
     def __call__(self, text: str) -> str:
         return self.process(text)
 
     def process(self, text: str) -> str:
+        has_digit = None
+        for _, family, trigger, run, skip in self._plan:
+            if family == "digit":
+                # No stage adds digits, so one check covers the whole family
+                if has_digit is None:
+                    has_digit = _RE_DIGIT.search(text) is not None
+                if not has_digit:
+                    continue
+            if trigger is not None and not trigger(text):
+                if skip is not None:
+                    text = skip(text)
+                continue
+            text = run(text)
+
+        return text
+
+    def process_sentences(self, text: str, cache: Optional[SentenceCache] = SENTENCE_CACHE) -> str:
+        """
+        Process text one sentence at a time, reusing cached results for
+        sentences seen before (by this or any identically configured
+        preprocessor). Same output as process(): the text is cached whole
+        instead when splitting it would change the result (see _whole_text).
+
+        Args:
+            cache: SentenceCache to use, or None to process without caching
+        """
+        if cache is None:
+            return self.process(text)
+        if self._whole_text(text):
+            return self._process_cached(text, cache)
+        out = []
+        for sentence in _RE_SENTENCE_BREAK.split(text):
+            sentence = self._process_cached(sentence, cache)
+            if sentence:
+                out.append(sentence)
+        return " ".join(out)
+
+    def _whole_text(self, text: str) -> bool:
+        """
+        True if text must be processed in one piece: whitespace is kept as
+        is, Roman numerals are expanded (they look back across sentences),
+        or an HTML tag runs across a sentence break ("a < 5. Then b > 3"),
+        so removing it takes parts of two sentences with it.
+        """
         cfg = self.config
+        if not cfg["remove_extra_whitespace"] or cfg["expand_roman_numerals"]:
+            return True
+        return cfg["remove_html"] and "<" in text and ">" in text and any(
+            _RE_SENTENCE_BREAK.search(m.group()) for m in _RE_HTML.finditer(text)
+        )
+
+    def process_aligned(self, text: str) -> tuple:
+        """
+        Process text like process(), also returning where each part of the
+        output came from in the input.
+
+        Returns:
+            (output, segments): segments are (out_start, out_end, in_start,
+            in_end) runs covering the output in order. Text copied unchanged
+            maps character for character; an expansion such as "$5" → "five
+            dollars" maps as a whole to the input it replaced. Pass segments
+            to source_span() to look up any output range.
+
+        Examples:
+            "Pay $5" → ("pay five dollars", [(0, 4, 0, 4), (4, 16, 4, 6)])
+        """
+        global _tracking
+        alignment = _local.alignment = _Alignment(text)
+        with _tracking_lock:
+            _tracking += 1
+        try:
+            out = self.process(text)
+        finally:
+            with _tracking_lock:
+                _tracking -= 1
+            _local.alignment = None
+        alignment.sync(out)
+        return out, alignment.segments()
+
+    def sentence_spans(self, text: str, cache: Optional[SentenceCache] = SENTENCE_CACHE) -> list:
+        """
+        The sentences process_sentences() splits text into, each with its
+        input offsets and processed form. After an edit, only sentences
+        whose source text changed need processing (and synthesizing) again;
+        the rest come from the cache. Joining the processed forms with " "
+        gives process_sentences(text).
+
+        Args:
+            cache: SentenceCache to use, or None to process without caching
+
+        Returns:
+            List of (in_start, in_end, processed) for sentences that are not
+            empty after processing; in_start/in_end exclude surrounding whitespace
+        """
+        def run(piece: str) -> str:
+            return self.process(piece) if cache is None else self._process_cached(piece, cache)
+
+        if self._whole_text(text):
+            out = run(text)
+            return [(0, len(text), out)] if out else []
+        spans, start = [], 0
+        for end, resume in [(m.start(), m.end()) for m in _RE_SENTENCE_BREAK.finditer(text)] + [(len(text), 0)]:
+            piece = text[start:end]
+            out = run(piece)
+            if out:
+                lead = len(piece) - len(piece.lstrip())
+                spans.append((start + lead, start + len(piece.rstrip()), out))
+            start = resume
+        return spans
+
+    def process_many(self, texts: Iterable[str], workers: Optional[int] = None,
+                     batch_size: Optional[int] = None) -> list:
+        """
+        Process many texts on a process pool. Duplicate texts are processed
+        once; results come back in input order.
+
+        Args:
+            texts: Texts to process
+            workers: Worker processes (default: one per CPU; 1 processes in this process)
+            batch_size: Texts sent to a worker at a time (default: enough for
+                about four batches per worker, at most 256)
+
+        Returns:
+            The processed texts, one per input
+        """
+        texts = list(texts)
+        unique = list(dict.fromkeys(texts))
+        workers = workers or os.cpu_count() or 1
+        if batch_size is None:
+            batch_size = max(1, min(256, -(-len(unique) // (workers * 4))))
+
+        if workers <= 1 or len(unique) <= batch_size:
+            done = [self.process_sentences(text) for text in unique]
+        else:
+            done = []
+            with ProcessPoolExecutor(workers, initializer=_init_worker, initargs=(self.config,)) as pool:
+                for batch in pool.map(_process_batch, _batches(unique, batch_size)):
+                    done.extend(batch)
+        results = dict(zip(unique, done))
+        return [results[text] for text in texts]
+
+    def process_stream(self, texts: Iterable[str], workers: Optional[int] = None,
+                       batch_size: int = 64) -> Iterator[str]:
+        """
+        Process a stream of texts (such as the lines of a script file) on a
+        process pool, yielding results in input order as they are ready.
+        At most two batches per worker are in flight, so the input is read
+        lazily and memory stays bounded. Duplicates within a batch are
+        processed once.
+
+        Args:
+            texts: Iterable of texts to process
+            workers: Worker processes (default: one per CPU; 1 processes in this process)
+            batch_size: Texts sent to a worker at a time
+
+        Yields:
+            One processed text per input
+        """
+        workers = workers or os.cpu_count() or 1
+        if workers <= 1:
+            for text in texts:
+                yield self.process_sentences(text)
+            return
+
+        with ProcessPoolExecutor(workers, initializer=_init_worker, initargs=(self.config,)) as pool:
+            in_flight = deque()     # (batch, its unique texts, future)
+
+            def drain():
+                batch, unique, future = in_flight.popleft()
+                results = dict(zip(unique, future.result()))
+                return [results[text] for text in batch]
+
+            for batch in _batches(texts, batch_size):
+                unique = list(dict.fromkeys(batch))
+                in_flight.append((batch, unique, pool.submit(_process_batch, unique)))
+                if len(in_flight) >= workers * 2:
+                    yield from drain()
+            while in_flight:
+                yield from drain()
+
+    def _process_cached(self, text: str, cache: SentenceCache) -> str:
+        key = (self.fingerprint, text)
+        out = cache.get(key)
+        if out is None:
+            out = self.process(text)
+            cache.put(key, out)
+        return out
 
-        if cfg["normalize_unicode"]:
-            text = normalize_unicode(text)
-        if cfg["remove_html"]:
-            text = remove_html_tags(text)
-        if cfg["remove_urls"]:
-            text = remove_urls(text)
-        if cfg["remove_emails"]:
-            text = remove_emails(text)
-        if cfg["remove_hashtags"]:
-            text = remove_hashtags(text)
-        if cfg["remove_mentions"]:
-            text = remove_mentions(text)
-        if cfg["expand_contractions"]:
-            text = expand_contractions(text)
-        # IP addresses before normalize_leading_decimals (IPs contain dots before digits)
-        if cfg["expand_ip_addresses"]:
-            text = expand_ip_addresses(text)
-        # Normalise bare leading decimals early so downstream regexes see "0.5" not ".5"
-        if cfg["normalize_leading_decimals"]:
-            text = normalize_leading_decimals(text)
-        # Expand special forms before generic number replacement
-        if cfg["expand_currency"]:
-            text = expand_currency(text)
-        if cfg["expand_percentages"]:
-            text = expand_percentages(text)
-        # Scientific notation before model-name expansion (e.g. "1e-4" contains "e-4")
-        if cfg["expand_scientific_notation"]:
-            text = expand_scientific_notation(text)
-        if cfg["expand_time"]:
-            text = expand_time(text)
-        if cfg["expand_ordinals"]:
-            text = expand_ordinals(text)
-        if cfg["expand_units"]:
-            text = expand_units(text)
-        # Scale suffixes after units (units handles "MB"/"GB"; this handles bare "B"/"M")
-        if cfg["expand_scale_suffixes"]:
-            text = expand_scale_suffixes(text)
-        if cfg["expand_fractions"]:
-            text = expand_fractions(text)
-        if cfg["expand_decades"]:
-            text = expand_decades(text)
-        # Phone numbers before ranges, otherwise NNN-NNNN is treated as a range
-        if cfg["expand_phone_numbers"]:
-            text = expand_phone_numbers(text)
-        if cfg["expand_ranges"]:
-            text = expand_ranges(text)
-        if cfg["expand_model_names"]:
-            text = expand_model_names(text)
-        if cfg["expand_roman_numerals"]:
-            text = expand_roman_numerals(text)
-        if cfg["replace_numbers"]:
-            text = replace_numbers(text, replace_floats=cfg["replace_floats"])
-        if cfg["remove_accents"]:
-            text = remove_accents(text)
-        if cfg["remove_punctuation"]:
-            text = remove_punctuation(text)
-        if cfg["lowercase"]:
-            text = to_lowercase(text)
-        if cfg["remove_stopwords"]:
-            text = remove_stopwords(text, self._stopwords)
-        if cfg["remove_extra_whitespace"]:
-            text = remove_extra_whitespace(text)
 
-        return text
+# ─────────────────────────────────────────────
+# Incremental input
+# ─────────────────────────────────────────────
+
+# A sentence break with the first character after it (the lookahead)
+_RE_BREAK_CANDIDATE = re.compile(r"(?<=[.!?])\s+(?=\S)")
+_RE_LAST_TOKEN = re.compile(r"(\S+)\s*$")
+# Places to cut a sentence that grows too long: after a clause, else between two words
+_RE_CLAUSE_CUT = re.compile(r"(?<=[,;:])\s+(?=[^\W\d])")
+_RE_WORD_CUT = re.compile(r"(?<=[^\W\d])\s+(?=[^\W\d])")
+
+# Abbreviations whose period does not end a sentence
+_ABBREVIATIONS = frozenset({
+    "mr", "mrs", "ms", "dr", "prof", "sr", "jr", "st", "mt", "vs", "etc",
+    "e.g", "i.e", "approx", "no", "fig", "inc", "ltd", "co", "corp", "dept",
+})
+
+
+class SentenceSplitter:
+    """
+    Splits text that arrives in fragments (an LLM token stream, a file read
+    in blocks) into sentences as soon as they are safely complete.
+
+    A sentence ends at terminal punctuation followed by whitespace, once the
+    next non-space character has arrived: a lowercase letter after it, an
+    abbreviation ("Dr.", "e.g.") or an initial ("J.") before it means the
+    sentence goes on. Every boundary is one process_sentences() also splits
+    at, but a sentence is not always self-contained: an HTML-like tag can
+    run across a break ("a < 5. Then b > 3"). StreamingPreprocessor holds
+    such sentences back until the tag closes.
+
+    Unfinished text is held back. A run-on sentence longer than max_pending
+    characters is cut at the last clause or word gap before its final
+    `lookahead` characters, never next to a digit, so multi-token forms
+    such as "555-1234", "5-10" or "3:30 pm" are not split.
+    """
+
+    def __init__(self, max_pending: int = 1000, lookahead: int = 64):
+        """
+        Args:
+            max_pending: Characters held back before a run-on sentence is cut
+            lookahead: Trailing characters never cut off with a run-on sentence
+        """
+        self.max_pending = max_pending
+        self.lookahead = lookahead
+        self._buffer = ""
+
+    def feed(self, fragment: str) -> list:
+        """Add a fragment; returns the sentences it completed."""
+        # Resume where a break could still be undecided: the trailing
+        # punctuation and whitespace of the previous buffer
+        start = len(self._buffer)
+        while start and (self._buffer[start - 1].isspace() or self._buffer[start - 1] in ".!?"):
+            start -= 1
+        self._buffer += fragment
+
+        sentences = []
+        cut = 0
+        for m in _RE_BREAK_CANDIDATE.finditer(self._buffer, start):
+            if self._is_boundary(m):
+                sentences.append(self._buffer[cut:m.start()].strip())
+                cut = m.end()
+        self._buffer = self._buffer[cut:]
+
+        while len(self._buffer) > self.max_pending:
+            at = self._run_on_cut()
+            if at is None:
+                break
+            sentences.append(self._buffer[:at].strip())
+            self._buffer = self._buffer[at:].lstrip()
+        return [s for s in sentences if s]
+
+    def flush(self) -> list:
+        """End of input: returns the unfinished sentence, if any."""
+        rest, self._buffer = self._buffer.strip(), ""
+        return [rest] if rest else []
+
+    def reset(self) -> None:
+        """Drop any unfinished sentence."""
+        self._buffer = ""
+
+    def _is_boundary(self, m: re.Match) -> bool:
+        if self._buffer[m.end()].islower():
+            return False
+        token = _RE_LAST_TOKEN.search(self._buffer, max(0, m.start() - 32), m.start())
+        if token is None:
+            return True
+        word = token.group(1)
+        if word.endswith(".") and not word.endswith(".."):
+            word = word.lstrip("(\"'[").rstrip(".")
+            if word.lower() in _ABBREVIATIONS:
+                return False
+            if len(word) == 1 and word.isupper() and word != "I":
+                return False
+        return True
+
+    def _run_on_cut(self) -> Optional[int]:
+        """Where to cut an over-long pending sentence, or None if there is no safe place."""
+        limit = len(self._buffer) - self.lookahead
+        for pattern in (_RE_CLAUSE_CUT, _RE_WORD_CUT):
+            last = None
+            for m in pattern.finditer(self._buffer, 0, limit):
+                last = m
+            if last is not None:
+                return last.end()
+        return None
+
+
+class StreamingPreprocessor:
+    """
+    Incremental TextPreprocessor for unbounded input: feed() takes text
+    fragments and returns normalized sentences as soon as they are complete
+    (see SentenceSplitter), so a book or a live token stream never has to
+    be held in memory whole. Sentences go through the shared sentence cache.
+
+    After an unclosed "<" later sentences are held back and processed
+    together, so a tag that runs across a break is removed as process()
+    removes it. Once the held text passes max_pending characters it is
+    released as is, and the output may differ from process() on the
+    whole text.
+
+    Usage:
+        sp = StreamingPreprocessor()
+        for fragment in token_stream:
+            for sentence in sp.feed(fragment):
+                speak(sentence)
+        for sentence in sp.flush():
+            speak(sentence)
+    """
+
+    def __init__(self, preprocessor: Optional[TextPreprocessor] = None,
+                 cache: Optional[SentenceCache] = SENTENCE_CACHE, **splitter):
+        """
+        Args:
+            preprocessor: TextPreprocessor to apply (default settings if None)
+            cache: SentenceCache to use, or None to process without caching
+            **splitter: max_pending and lookahead, as for SentenceSplitter
+        """
+        self.preprocessor = preprocessor or TextPreprocessor()
+        self.cache = cache
+        self.splitter = SentenceSplitter(**splitter)
+        self._held = ""
+
+    def feed(self, fragment: str) -> list:
+        """Add a fragment; returns the normalized sentences it completed."""
+        return self._normalize(self.splitter.feed(fragment))
+
+    def flush(self) -> list:
+        """End of input: returns the normalized unfinished sentence, if any."""
+        return self._normalize(self.splitter.flush(), final=True)
+
+    def reset(self) -> None:
+        """Drop any unfinished sentence."""
+        self.splitter.reset()
+        self._held = ""
+
+    def stream(self, fragments: Iterable[str]) -> Iterator[str]:
+        """Normalized sentences from an iterable of fragments, flushing at its end."""
+        for fragment in fragments:
+            yield from self.feed(fragment)
+        yield from self.flush()
+
+    def _normalize(self, sentences: list, final: bool = False) -> list:
+        if final and self._held:
+            sentences = sentences or [""]
+        out = []
+        for sentence in sentences:
+            if self._held:
+                sentence = f"{self._held} {sentence}".rstrip()
+                self._held = ""
+            if not final and self._tag_open(sentence):
+                self._held = sentence
+                continue
+            sentence = self.preprocessor.process_sentences(sentence, self.cache)
+            if sentence:
+                out.append(sentence)
+        return out
+
+    def _tag_open(self, text: str) -> bool:
+        """True if text ends inside what may be an HTML tag a later sentence closes."""
+        return (self.preprocessor.config["remove_html"]
+                and text.rfind("<") > text.rfind(">")
+                and len(text) <= self.splitter.max_pending)
+
+
+# ─────────────────────────────────────────────
+# Demo corpus (also used by bench_preprocess.py)
+# ─────────────────────────────────────────────
+
+# (label, text) pairs covering each expansion and the tricky cases between them
+DEMO_CASES = [
+    # ── Numbers ────────────────────────────────────────────────────
+    ("Plain integer",              "There are 1200 students and 42 teachers."),
+    ("Large number",               "The project costs $1,000,000 and took 365 days."),
+    ("Negative number",            "Temperature dropped to -5 degrees overnight."),
+    ("Float",                      "Pi is approximately 3.14159."),
+    ("Float trailing zero",        "The voltage is 1.50 volts."),
+    ("Leading decimal",            "Add .5 teaspoons of salt and .25 cup of milk."),
+    ("Negative leading decimal",   "A -.05 correction was applied."),
+    ("Zero",                       "There were 0 errors and 0.0 warnings."),
+    ("Comma thousands",            "The population is 7,900,000,000."),
+    # ── Scientific notation ─────────────────────────────────────────
+    ("Scientific e-notation",      "Learning rate is 1e-4, weight decay 1e-5."),
+    ("Scientific capital E",       "Avogadro's number is 6.022E23."),
+    ("Scientific large exp",       "The signal is 2.5e10 Hz."),
+    # ── Scale suffixes ─────────────────────────────────────────────
+    ("Model params B",             "We trained a 7B parameter model and a 13B variant."),
+    ("Model params M",             "The 340M model beat the 7B on MMLU."),
+    ("Scale suffix K",             "The salary was $85K per year."),
+    # ── Currency ───────────────────────────────────────────────────
+    ("Dollar amount",              "A coffee costs $4.99 here."),
+    ("Euro amount",                "Rent is €1,200 per month."),
+    ("Pound with cents",           "The book is £9.99."),
+    # ── Percentages ────────────────────────────────────────────────
+    ("Percentage",                 "Inflation rose by 3.5% last quarter."),
+    ("Negative percentage",        "Stocks fell -2% today."),
+    # ── Ordinals ───────────────────────────────────────────────────
+    ("Ordinals 1st/2nd/3rd",       "She finished 1st, he came 2nd, I was 3rd."),
+    ("Ordinal 21st",               "It's the 21st century and the 100th anniversary."),
+    ("Ordinal 42nd",               "He ran his 42nd marathon."),
+    ("Ordinal 33rd",               "On the 33rd floor."),
+    # ── Fractions ──────────────────────────────────────────────────
+    ("Half",                       "Cut the recipe in 1/2."),
+    ("Quarters",                   "Add 3/4 cup of sugar and 1/4 teaspoon of salt."),
+    ("Thirds",                     "The team completed 2/3 of the project."),
+    ("Eighths",                    "The pipe is 5/8 inch in diameter."),
+    # ── Time ───────────────────────────────────────────────────────
+    ("12-hour time",               "The meeting starts at 3:30pm."),
+    ("24-hour time",               "Departure at 14:00."),
+    ("Time with oh",               "Alarm set for 9:05 AM."),
+    ("Midnight",                   "The server restarts at 0:00."),
+    # ── Decades ────────────────────────────────────────────────────
+    ("Bare decade",                "The 80s music scene was iconic."),
+    ("Full decade",                "She grew up listening to 1990s grunge."),
+    ("2000s",                      "The 2000s brought social media."),
+    ("2020s",                      "AI took off in the 2020s."),
+    ("Apostrophe decade",          "Born in the '90s, raised on 2000s pop."),
+    # ── Ranges ─────────────────────────────────────────────────────
+    ("Numeric range",              "Read pages 10-20 for homework."),
+    ("Year range",                 "The war lasted from 2020-2024."),
+    ("Temperature range",          "Store between 5-10 degrees."),
+    # ── Model / version names ───────────────────────────────────────
+    ("GPT-3",                      "gpt-3 is pretty sick."),
+    ("GPT-3.5",                    "They upgraded to GPT-3.5 last month."),
+    ("GPL-3 license",              "This project is licensed under GPL-3."),
+    ("Python version",             "Requires Python-3.10 or higher."),
+    ("Multiple versions",          "Both CUDA-11 and CUDA-12 are supported."),
+    # ── Units ──────────────────────────────────────────────────────
+    ("Distance",                   "The trail is 42km long."),
+    ("Weight",                     "Each package weighs 500kg."),
+    ("Temperature °C",             "Water boils at 100°C."),
+    ("Data size GB",               "Download the 2.5GB model file."),
+    ("Frequency GHz",              "The CPU runs at 3.6GHz."),
+    ("Latency ms",                 "Average latency is 12ms."),
+    # ── HTML / URLs / emails ───────────────────────────────────────
+    ("HTML tags",                  "<b>Hello</b> World! It's a great day."),
+    ("URL and email",              "Visit https://example.com or email hello@example.com."),
+    ("Hashtags and mentions",      "#NLP @user great post!"),
+    # ── Contractions ───────────────────────────────────────────────
+    ("Contractions",               "I don't know, won't you help? They've already left."),
+    ("Ain't / let's",              "Ain't no mountain high enough. Let's go!"),
+    # ── Edge / tricky cases ─────────────────────────────────────────
+    ("Score / ratio",              "The final score was 3:0."),
+    ("Aspect ratio",               "The display is 16:9."),
+    ("IP address",                 "Connect to server at 192.168.1.1 on port 8080."),
+    ("Phone number",               "Call us at 555-1234 or 1-800-555-0199."),
+    ("Negative vs. hyphen",        "On a scale of -10 to 10, she rated it 8."),
+    ("Ellipsis",                   "He paused... then spoke."),
+    ("Em dash number",             "The result — 42 — surprised everyone."),
+    # ── Mixed / real-world ──────────────────────────────────────────
+    ("Research abstract",          "We trained a 7B parameter model for 100 epochs at 1e-4 learning rate."),
+    ("GPT benchmark",              "GPT-4 scored 90% on the benchmark — 15% better than GPT-3.5."),
+    ("News headline",              "Fed raises rates by 0.25%, S&P 500 drops 1.2%."),
+    ("Startup pitch",              "We raised $2.5M in seed funding and are growing 20% month-over-month."),
+    ("Tech spec",                  "The M3 chip runs at 4.05GHz with a 40M transistor GPU and 8GB RAM."),
+]
 
 
 # ─────────────────────────────────────────────
@@ -849,97 +1742,10 @@ class TextPreprocessor:
 if __name__ == "__main__":
     pp = TextPreprocessor()
 
-    cases = [
-        # ── Numbers ────────────────────────────────────────────────────
-        ("Plain integer",              "There are 1200 students and 42 teachers."),
-        ("Large number",               "The project costs $1,000,000 and took 365 days."),
-        ("Negative number",            "Temperature dropped to -5 degrees overnight."),
-        ("Float",                      "Pi is approximately 3.14159."),
-        ("Float trailing zero",        "The voltage is 1.50 volts."),
-        ("Leading decimal",            "Add .5 teaspoons of salt and .25 cup of milk."),
-        ("Negative leading decimal",   "A -.05 correction was applied."),
-        ("Zero",                       "There were 0 errors and 0.0 warnings."),
-        ("Comma thousands",            "The population is 7,900,000,000."),
-        # ── Scientific notation ─────────────────────────────────────────
-        ("Scientific e-notation",      "Learning rate is 1e-4, weight decay 1e-5."),
-        ("Scientific capital E",       "Avogadro's number is 6.022E23."),
-        ("Scientific large exp",       "The signal is 2.5e10 Hz."),
-        # ── Scale suffixes ─────────────────────────────────────────────
-        ("Model params B",             "We trained a 7B parameter model and a 13B variant."),
-        ("Model params M",             "The 340M model beat the 7B on MMLU."),
-        ("Scale suffix K",             "The salary was $85K per year."),
-        # ── Currency ───────────────────────────────────────────────────
-        ("Dollar amount",              "A coffee costs $4.99 here."),
-        ("Euro amount",                "Rent is €1,200 per month."),
-        ("Pound with cents",           "The book is £9.99."),
-        # ── Percentages ────────────────────────────────────────────────
-        ("Percentage",                 "Inflation rose by 3.5% last quarter."),
-        ("Negative percentage",        "Stocks fell -2% today."),
-        # ── Ordinals ───────────────────────────────────────────────────
-        ("Ordinals 1st/2nd/3rd",       "She finished 1st, he came 2nd, I was 3rd."),
-        ("Ordinal 21st",               "It's the 21st century and the 100th anniversary."),
-        ("Ordinal 42nd",               "He ran his 42nd marathon."),
-        ("Ordinal 33rd",               "On the 33rd floor."),
-        # ── Fractions ──────────────────────────────────────────────────
-        ("Half",                       "Cut the recipe in 1/2."),
-        ("Quarters",                   "Add 3/4 cup of sugar and 1/4 teaspoon of salt."),
-        ("Thirds",                     "The team completed 2/3 of the project."),
-        ("Eighths",                    "The pipe is 5/8 inch in diameter."),
-        # ── Time ───────────────────────────────────────────────────────
-        ("12-hour time",               "The meeting starts at 3:30pm."),
-        ("24-hour time",               "Departure at 14:00."),
-        ("Time with oh",               "Alarm set for 9:05 AM."),
-        ("Midnight",                   "The server restarts at 0:00."),
-        # ── Decades ────────────────────────────────────────────────────
-        ("Bare decade",                "The 80s music scene was iconic."),
-        ("Full decade",                "She grew up listening to 1990s grunge."),
-        ("2000s",                      "The 2000s brought social media."),
-        ("2020s",                      "AI took off in the 2020s."),
-        ("Apostrophe decade",          "Born in the '90s, raised on 2000s pop."),
-        # ── Ranges ─────────────────────────────────────────────────────
-        ("Numeric range",              "Read pages 10-20 for homework."),
-        ("Year range",                 "The war lasted from 2020-2024."),
-        ("Temperature range",          "Store between 5-10 degrees."),
-        # ── Model / version names ───────────────────────────────────────
-        ("GPT-3",                      "gpt-3 is pretty sick."),
-        ("GPT-3.5",                    "They upgraded to GPT-3.5 last month."),
-        ("GPL-3 license",              "This project is licensed under GPL-3."),
-        ("Python version",             "Requires Python-3.10 or higher."),
-        ("Multiple versions",          "Both CUDA-11 and CUDA-12 are supported."),
-        # ── Units ──────────────────────────────────────────────────────
-        ("Distance",                   "The trail is 42km long."),
-        ("Weight",                     "Each package weighs 500kg."),
-        ("Temperature °C",             "Water boils at 100°C."),
-        ("Data size GB",               "Download the 2.5GB model file."),
-        ("Frequency GHz",              "The CPU runs at 3.6GHz."),
-        ("Latency ms",                 "Average latency is 12ms."),
-        # ── HTML / URLs / emails ───────────────────────────────────────
-        ("HTML tags",                  "<b>Hello</b> World! It's a great day."),
-        ("URL and email",              "Visit https://example.com or email hello@example.com."),
-        ("Hashtags and mentions",      "#NLP @user great post!"),
-        # ── Contractions ───────────────────────────────────────────────
-        ("Contractions",               "I don't know, won't you help? They've already left."),
-        ("Ain't / let's",              "Ain't no mountain high enough. Let's go!"),
-        # ── Edge / tricky cases ─────────────────────────────────────────
-        ("Score / ratio",              "The final score was 3:0."),
-        ("Aspect ratio",               "The display is 16:9."),
-        ("IP address",                 "Connect to server at 192.168.1.1 on port 8080."),
-        ("Phone number",               "Call us at 555-1234 or 1-800-555-0199."),
-        ("Negative vs. hyphen",        "On a scale of -10 to 10, she rated it 8."),
-        ("Ellipsis",                   "He paused... then spoke."),
-        ("Em dash number",             "The result — 42 — surprised everyone."),
-        # ── Mixed / real-world ──────────────────────────────────────────
-        ("Research abstract",          "We trained a 7B parameter model for 100 epochs at 1e-4 learning rate."),
-        ("GPT benchmark",              "GPT-4 scored 90% on the benchmark — 15% better than GPT-3.5."),
-        ("News headline",              "Fed raises rates by 0.25%, S&P 500 drops 1.2%."),
-        ("Startup pitch",              "We raised $2.5M in seed funding and are growing 20% month-over-month."),
-        ("Tech spec",                  "The M3 chip runs at 4.05GHz with a 40M transistor GPU and 8GB RAM."),
-    ]
-
     print("=" * 70)
     print("TextPreprocessor Demo")
     print("=" * 70)
-    for label, text in cases:
+    for label, text in DEMO_CASES:
         print(f"\n  [{label}]")
         print(f"  IN : {text}")
         print(f"  OUT: {pp(text)}")
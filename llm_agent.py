@@ -24,7 +24,7 @@ try:
 except ImportError:
     requests = None
 
-from client import speak
+from client import speak, speak_batch
 
 
 # ANSI escape codes for colors
@@ -39,9 +39,7 @@ def send_lines_background_speech(base_url: str, lines: list[str],script_path=Non
         rc=utils.append_text(script_path,"\n"+"\n".join(lines))
         return
     def _send():
-        for line in lines:
-            # print(f"{Colors.GREEN}{line}{Colors.RESET}")
-            speak(base_url, line.replace("’",""), use_json=True)
+        speak_batch(base_url, [line.replace("’","") for line in lines], use_json=True)
     t = threading.Thread(target=_send, daemon=True)
     t.start()
 
@@ -433,7 +431,7 @@ def main() -> None:
             return
 
         base_url = f"http://{args.speech_host}:{args.speech_port}"
-        print(f"\nSending to {base_url}/speak (background)\n")
+        print(f"\nSending to {base_url}/speak_batch (background)\n")
         # Synchronous (blocks until each line is queued):
         # for i, line in enumerate(script_lines, 1):
         #     ok, msg = speak(base_url, line, use_json=True)
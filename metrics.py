@@ -0,0 +1,249 @@
+"""
+Minimal in-process metrics registry with Prometheus text exposition.
+Used by speech.py to instrument the synthesis pipeline and by the servers
+for GET /metrics.
+
+Updating a metric costs one small lock and a few additions, so counters and
+histograms can sit on hot paths. Gauges that mirror existing state (queue
+depths and the like) take a callback instead and are read only at scrape time.
+
+Pre-forked servers (prefork.py) write each process's snapshot() to a file and
+merge them at scrape time with merge_snapshots().
+"""
+
+from __future__ import annotations
+
+import bisect
+import json
+import math
+import os
+import threading
+from typing import Callable, Iterator
+
+# Latency buckets in seconds
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, help: str, labelnames: tuple = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def samples(self) -> Iterator[tuple[str, tuple, float]]:
+        """(name suffix, label values, value) for each exported sample."""
+        raise NotImplementedError
+
+
+class Counter(_Metric):
+    """Monotonic count, optionally split by label values."""
+
+    kind = "counter"
+
+    def __init__(self, name: str, help: str, labelnames: tuple = ()):
+        super().__init__(name, help, labelnames)
+        self._values: dict[tuple, float] = {}
+
+    def inc(self, amount: float = 1.0, *labels) -> None:
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0.0) + amount
+
+    def value(self, *labels) -> float:
+        with self._lock:
+            return self._values.get(labels, 0.0)
+
+    def samples(self) -> Iterator[tuple[str, tuple, float]]:
+        with self._lock:
+            items = list(self._values.items())
+        for labels, value in items:
+            yield "", labels, value
+
+
+class Gauge(_Metric):
+    """
+    Current value. Either set() directly, or pass `fn` returning a number (or
+    a {label values: number} dict) to be read at scrape time.
+    """
+
+    kind = "gauge"
+
+    def __init__(self, name: str, help: str, labelnames: tuple = (), fn: Callable | None = None):
+        super().__init__(name, help, labelnames)
+        self._values: dict[tuple, float] = {}
+        self.fn = fn
+
+    def set(self, value: float, *labels) -> None:
+        with self._lock:
+            self._values[labels] = value
+
+    def samples(self) -> Iterator[tuple[str, tuple, float]]:
+        if self.fn is not None:
+            value = self.fn()
+            items = value.items() if isinstance(value, dict) else [((), value)]
+        else:
+            with self._lock:
+                items = list(self._values.items())
+        for labels, value in items:
+            yield "", labels, value
+
+
+class Histogram(_Metric):
+    """Distribution of observed values in fixed buckets, optionally split by label values."""
+
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, labelnames: tuple = (), buckets: tuple = DEFAULT_BUCKETS):
+        super().__init__(name, help, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._values: dict[tuple, list] = {}   # labels -> [bucket counts..., +Inf count, sum]
+
+    def observe(self, value: float, *labels) -> None:
+        i = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            counts = self._values.get(labels)
+            if counts is None:
+                counts = self._values[labels] = [0] * (len(self.buckets) + 1) + [0.0]
+            counts[i] += 1
+            counts[-1] += value
+
+    def samples(self) -> Iterator[tuple[str, tuple, float]]:
+        with self._lock:
+            items = [(labels, list(counts)) for labels, counts in self._values.items()]
+        for labels, counts in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (math.inf,), counts):
+                cumulative += count
+                yield "_bucket", labels + (("+Inf" if bound == math.inf else repr(bound)),), cumulative
+            yield "_sum", labels, counts[-1]
+            yield "_count", labels, cumulative
+
+
+class Registry:
+    """A named set of metrics. Asking for an existing name returns the same metric."""
+
+    def __init__(self):
+        self._metrics: dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+
+    def _get(self, cls, name: str, *args, **kwargs):
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = cls(name, *args, **kwargs)
+            return metric
+
+    def counter(self, name: str, help: str, labelnames: tuple = ()) -> Counter:
+        return self._get(Counter, name, help, labelnames)
+
+    def gauge(self, name: str, help: str, labelnames: tuple = (), fn: Callable | None = None) -> Gauge:
+        return self._get(Gauge, name, help, labelnames, fn)
+
+    def histogram(self, name: str, help: str, labelnames: tuple = (), buckets: tuple = DEFAULT_BUCKETS) -> Histogram:
+        return self._get(Histogram, name, help, labelnames, buckets)
+
+    def render(self) -> str:
+        """All metrics in the Prometheus text exposition format."""
+        return _render(self.snapshot())
+
+    def snapshot(self) -> list[dict]:
+        """Every metric's current samples as JSON-serializable dicts, for merging across processes."""
+        with self._lock:
+            metrics = list(self._metrics.values())
+        return [
+            {
+                "name": metric.name,
+                "help": metric.help,
+                "kind": metric.kind,
+                "labelnames": list(metric.labelnames),
+                "samples": [[suffix, list(labels), float(value)] for suffix, labels, value in metric.samples()],
+            }
+            for metric in metrics
+        ]
+
+
+def write_snapshot(registry: Registry, path: str) -> None:
+    """Write registry.snapshot() to path atomically, so readers never see a partial file."""
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "w") as f:
+        json.dump(registry.snapshot(), f)
+    os.replace(tmp, path)
+
+
+def read_snapshots(directory: str) -> dict[str, list[dict]]:
+    """Snapshots written by write_snapshot() into a directory, keyed by file name (minus .json)."""
+    snapshots = {}
+    for name in sorted(os.listdir(directory)):
+        if not name.endswith(".json"):
+            continue
+        try:
+            key = name[:-len(".json")]
+            if key.startswith("worker-"):
+                key = key[len("worker-"):]
+            with open(os.path.join(directory, name)) as f:
+                snapshots[key] = json.load(f)
+        except (OSError, ValueError):
+            continue    # removed or replaced while listing
+    return snapshots
+
+
+def merge_snapshots(snapshots: dict[str, list[dict]]) -> str:
+    """
+    Prometheus text for several processes' snapshots. Counters and histograms
+    are summed across processes; gauges (current values and ratios, which do
+    not add up) are exported per process with a `worker` label.
+    """
+    families: dict[str, dict] = {}
+    for worker, snapshot in snapshots.items():
+        for family in snapshot:
+            merged = families.get(family["name"])
+            if merged is None:
+                merged = families[family["name"]] = {**family, "samples": {}}
+                if family["kind"] == "gauge":
+                    merged["labelnames"] = family["labelnames"] + ["worker"]
+            samples = merged["samples"]
+            for suffix, labels, value in family["samples"]:
+                if family["kind"] == "gauge":
+                    samples[(suffix, tuple(labels) + (worker,))] = value
+                else:
+                    key = (suffix, tuple(labels))
+                    samples[key] = samples.get(key, 0.0) + value
+    for family in families.values():
+        family["samples"] = [[suffix, labels, value] for (suffix, labels), value in family["samples"].items()]
+    return _render(list(families.values()))
+
+
+def _render(families: list[dict]) -> str:
+    lines = []
+    for family in families:
+        name = family["name"]
+        lines.append(f"# HELP {name} {family['help']}")
+        lines.append(f"# TYPE {name} {family['kind']}")
+        labelnames = tuple(family["labelnames"])
+        for suffix, labels, value in family["samples"]:
+            names = labelnames + (("le",) if suffix == "_bucket" else ())
+            lines.append(f"{name}{suffix}{_format_labels(names, tuple(labels))} {_format_value(value)}")
+    return "\n".join(lines) + "\n"
+
+
+def _format_labels(names: tuple, values: tuple) -> str:
+    if not names:
+        return ""
+    pairs = ",".join(f'{n}="{_escape(str(v))}"' for n, v in zip(names, values))
+    return "{" + pairs + "}"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
@@ -0,0 +1,135 @@
+"""
+Pre-fork process model for the KittenTTS servers (--processes N).
+
+The parent binds the listening socket and reads the model, converted to ORT
+format, and the voice table once (kittentts.ModelFiles), then forks N
+workers. The workers inherit both: they accept connections on the same
+socket, and the voices and model bytes stay shared copy-on-write. Each
+worker starts its own Speech (threads do not survive fork) and its own ONNX
+session, which uses the shared ORT-format bytes for its weights in place.
+
+Each worker writes its metrics to a file in a shared directory; GET /metrics
+on any worker merges them (see metrics.merge_snapshots). The parent restarts
+workers that exit unexpectedly and stops them all on SIGINT/SIGTERM.
+"""
+
+from __future__ import annotations
+
+import os
+import signal
+import socket
+import tempfile
+import threading
+import time
+from typing import Callable
+
+import metrics
+
+SNAPSHOT_INTERVAL = 2.0
+
+
+def listen(host: str, port: int, backlog: int = 128) -> socket.socket:
+    """A bound, listening TCP socket that forked workers can inherit."""
+    family = socket.AF_INET6 if ":" in host else socket.AF_INET
+    sock = socket.socket(family, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(backlog)
+    sock.set_inheritable(True)
+    return sock
+
+
+class Worker:
+    """A forked worker's identity and its metrics file."""
+
+    def __init__(self, index: int, metrics_dir: str):
+        self.index = index
+        self.metrics_dir = metrics_dir
+        self.name = str(index)
+        self.path = os.path.join(metrics_dir, f"worker-{index}.json")
+
+    def export_metrics(self, registry: metrics.Registry) -> None:
+        """Write this worker's metrics now, then every SNAPSHOT_INTERVAL seconds in the background."""
+        metrics.write_snapshot(registry, self.path)
+
+        def loop():
+            while True:
+                time.sleep(SNAPSHOT_INTERVAL)
+                metrics.write_snapshot(registry, self.path)
+
+        threading.Thread(target=loop, daemon=True).start()
+
+    def merged_metrics(self, registry: metrics.Registry) -> str:
+        """Every worker's metrics, with this worker's brought up to date first."""
+        metrics.write_snapshot(registry, self.path)
+        return metrics.merge_snapshots(metrics.read_snapshots(self.metrics_dir))
+
+
+def run(processes: int, serve: Callable[[Worker], None]) -> None:
+    """
+    Fork `processes` workers, each calling serve(worker) until it returns or
+    is terminated, and supervise them until SIGINT/SIGTERM. Load anything the
+    workers should share (and bind the socket) before calling this.
+    """
+    metrics_dir = tempfile.mkdtemp(prefix="kittentts-metrics-")
+    children: dict[int, int] = {}   # pid -> worker index
+    stopping = False
+
+    def spawn(index: int) -> None:
+        pid = os.fork()
+        if pid == 0:
+            code = 0
+            try:
+                signal.signal(signal.SIGINT, signal.SIG_IGN)       # the parent handles Ctrl+C
+                signal.signal(signal.SIGTERM, _raise_exit)
+                serve(Worker(index, metrics_dir))
+            except SystemExit:
+                pass
+            except BaseException:
+                import traceback
+                traceback.print_exc()
+                code = 1
+            os._exit(code)
+        children[pid] = index
+
+    def stop(signum, frame) -> None:
+        nonlocal stopping
+        stopping = True
+        for pid in children:
+            _kill(pid)
+
+    signal.signal(signal.SIGINT, stop)
+    signal.signal(signal.SIGTERM, stop)
+    for index in range(processes):
+        spawn(index)
+    print(f"Pre-fork: {processes} workers, pids {sorted(children)}")
+
+    while children:
+        try:
+            pid, status = os.wait()
+        except ChildProcessError:
+            break
+        except InterruptedError:
+            continue
+        index = children.pop(pid, None)
+        if index is None or stopping:
+            continue
+        print(f"Worker {index} (pid {pid}) exited with status {status}; restarting")
+        time.sleep(1.0)     # don't spin if workers die at startup
+        if not stopping:
+            spawn(index)
+
+    for name in os.listdir(metrics_dir):
+        os.remove(os.path.join(metrics_dir, name))
+    os.rmdir(metrics_dir)
+
+
+def _raise_exit(signum, frame) -> None:
+    raise SystemExit(0)
+
+
+def _kill(pid: int) -> None:
+    try:
+        os.kill(pid, signal.SIGTERM)
+    except ProcessLookupError:
+        pass
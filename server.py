@@ -1,15 +1,27 @@
 """
 KittenTTS Flask API server: accepts POST requests with speech lines (Character|speed|text)
-and queues them for playback using the shared Speech class.
+and queues them for playback using the shared Speech class, or synthesizes them
+and streams the audio back to the caller.
 """
 
+from __future__ import annotations
+
 import argparse
-from flask import Flask, request, jsonify
 
+from flask import Flask, Response, request, jsonify, stream_with_context
+from werkzeug.serving import make_server
+
+import api
+import audio_format
+import prefork
+from kittentts import ModelFiles
+from kittentts.preprocess import DEFAULT_PROFILE, PROFILES
 from speech import Speech
 
 app = Flask(__name__)
 speech: Speech | None = None
+stream_slots: api.StreamSlots | None = None
+worker: prefork.Worker | None = None    # set in pre-forked workers
 
 
 def get_speech() -> Speech:
@@ -20,33 +32,115 @@ def get_speech() -> Speech:
     return speech
 
 
+def _reply(reply: api.Reply):
+    """Flask response for an api handler's (payload, status, headers)."""
+    payload, status, headers = reply
+    return jsonify(payload), status, headers
+
+
 @app.route("/speak", methods=["POST"])
-def speak() -> tuple[dict, int]:
+def speak():
     """
     Accept a speech line. Body: plain text or JSON with 'line' key.
     Format: Character|speed|text
+    Optional channel: JSON 'channel' key or X-Channel header (default "default").
+    Optional barge-in: JSON 'barge_in': true or X-Barge-In: 1 cancels everything
+    else queued in the channel and jumps the line to the front.
+    Optional deadline: JSON 'deadline_ms' or X-Deadline-Ms header; the line is
+    refused (503) if it is not expected to start playing in time, and dropped
+    if it is still waiting for a worker when the deadline passes.
+    Never blocks on a full queue: answers 429 with Retry-After instead.
     """
     s = get_speech()
-
+    data = {}
     if request.is_json:
         data = request.get_json()
+        if not isinstance(data, dict):
+            return _reply(api.error("JSON body must be an object with a 'line' key"))
         line = data.get("line", "")
     else:
         line = request.get_data(as_text=True)
+    return _reply(api.speak(s, data, line, request.headers))
 
-    line = (line or "").strip()
-    if not line:
-        return jsonify({"ok": False, "error": "Empty or missing speech line"}), 400
 
-    if s.add_speech_line(line):
-        return jsonify({"ok": True, "message": "Queued"}), 200
-    return jsonify({"ok": False, "error": "Invalid format. Use: Character|speed|text"}), 400
+@app.route("/speak_batch", methods=["POST"])
+def speak_batch():
+    """
+    Accept many speech lines in one request: JSON {"lines": [...], "channel": ...}
+    (or a bare JSON list of lines), or a plain-text script body with one
+    Character|speed|text line per row.
+    Responds with a result per line (line_id, or the reason it was refused).
+    """
+    s = get_speech()
+    data = {}
+    if request.is_json:
+        data = request.get_json()
+        if not isinstance(data, dict):
+            data = {"lines": data}
+        lines = data.get("lines")
+    else:
+        lines = request.get_data(as_text=True)
+    return _reply(api.speak_batch(s, data, lines, request.headers))
+
+
+@app.route("/synthesize", methods=["POST"])
+def synthesize():
+    """
+    Synthesize text and stream the audio back with chunked transfer encoding.
+    JSON body: {"voice": "Leo", "speed": 1.0, "text": "...", "format": "wav" | "pcm16", "profile": "fast"}
+    Speed follows the /speak convention (speed_offset is added). Audio for each
+    sentence is sent as soon as it is synthesized. At most --max-streams
+    responses run at once; beyond that the answer is 429 with Retry-After.
+    """
+    s = get_speech()
+    params, err = api.synthesize_params(s, request.get_json(silent=True) or {}, request.headers)
+    if err:
+        return _reply(err)
+    voice, speed, text, fmt, model, profile = params
+
+    release = stream_slots.take()
+    if release is None:
+        return _reply(stream_slots.refused())
+
+    def body():
+        try:
+            chunks = s.stream(voice, speed, text, model=model, profile=profile)
+            yield from audio_format.encode_stream(chunks, fmt, s.sample_rate)
+        finally:
+            release()
+
+    response = Response(stream_with_context(body()), headers=api.audio_headers(s, fmt))
+    # Also frees the slot when the client left before the body started
+    response.call_on_close(release)
+    return response
+
+
+@app.route("/cancel", methods=["POST"])
+def cancel():
+    """
+    Cancel one queued line. JSON body: {"line_id": 7, "channel": "default"}
+    (channel also via X-Channel header). 404 if the line is unknown or already played.
+    """
+    return _reply(api.cancel(get_speech(), request.get_json(silent=True) or {}, request.headers))
+
+
+@app.route("/cancel_channel", methods=["POST"])
+def cancel_channel():
+    """Cancel every line queued in a channel. JSON 'channel' key or X-Channel header."""
+    return _reply(api.cancel_channel(get_speech(), request.get_json(silent=True) or {}, request.headers))
+
+
+@app.route("/metrics", methods=["GET"])
+def metrics():
+    """Prometheus metrics: stage latencies, queue depths, cache hits, utilization, rejections."""
+    body, headers = api.metrics_text(get_speech(), worker)
+    return Response(body, headers=headers)
 
 
 @app.route("/health", methods=["GET"])
-def health() -> tuple[dict, int]:
+def health():
     """Health check."""
-    return jsonify({"ok": True, "service": "KittenTTS"}), 200
+    return _reply(api.health(speech))
 
 
 def init_speech(
@@ -54,16 +148,34 @@ def init_speech(
     model_name: str = "kitten-tts-nano-0.8-fp32",
     default_voice: str = "Leo",
     speed_offset: float = 0.2,
+    buffer_size: int = 5,
+    max_batch: int = 1,
+    batch_window_ms: float = 5.0,
+    models: list[str] | None = None,
+    model_memory_mb: float = 1024,
+    audio_cache_size: int = 16,
+    preprocess_profile: str = DEFAULT_PROFILE,
+    max_streams: int = 32,
+    preloaded: ModelFiles | None = None,
 ) -> None:
-    """Initialize the shared Speech instance. Call before running the server."""
-    global speech
+    """Initialize the shared Speech instance and stream limit. Call before running the server."""
+    global speech, stream_slots
     speech = Speech(
         model_dir=model_dir,
         model_name=model_name,
         default_voice=default_voice,
         speed_offset=speed_offset,
+        buffer_size=buffer_size,
+        max_batch=max_batch,
+        batch_window_ms=batch_window_ms,
+        models=models,
+        model_memory_mb=model_memory_mb,
+        dedup_cache_size=audio_cache_size,
+        preprocess_profile=preprocess_profile,
+        preloaded=preloaded,
     )
     speech.start()
+    stream_slots = api.StreamSlots(speech, max_streams)
 
 
 def main() -> None:
@@ -71,19 +183,40 @@ def main() -> None:
     parser.add_argument("--host", default="127.0.0.1", help="Bind host")
     parser.add_argument("--port", type=int, default=5001, help="Bind port (5000 often used by macOS AirPlay)")
     parser.add_argument("--model-dir", default="KittenML/", help="Model directory")
-    parser.add_argument("--model", default="kitten-tts-nano-0.8-fp32", help="Model name")
+    parser.add_argument("--model", default="kitten-tts-nano-0.8-fp32", help="Default model name")
+    parser.add_argument("--models", nargs="*", default=None, help="More models clients may pick per request (JSON 'model' or X-Model)")
+    parser.add_argument("--model-memory-mb", type=float, default=1024, help="Memory budget for the extra models; least recently used are evicted")
     parser.add_argument("--voice", default="Leo", help="Default voice")
     parser.add_argument("--speed-offset", type=float, default=0.2, help="Speed offset")
-    parser.add_argument("--debug", action="store_true", help="Flask debug mode")
+    parser.add_argument("--buffer-size", type=int, default=5, help="Max lines queued before /speak answers 429")
+    parser.add_argument("--audio-cache-size", type=int, default=16, help="Recently generated clips kept for identical requests (0 = off)")
+    parser.add_argument("--profile", default=DEFAULT_PROFILE, choices=sorted(PROFILES), help="Default text preprocessing profile (JSON 'profile' or X-Profile per request)")
+    parser.add_argument("--max-batch", type=int, default=1, help="Micro-batch up to this many chunks per model call (1 = off)")
+    parser.add_argument("--batch-window-ms", type=float, default=5.0, help="How long a chunk waits for a batch to fill")
+    parser.add_argument("--max-streams", type=int, default=32, help="Concurrent /synthesize streams before 429 (per process)")
+    parser.add_argument("--processes", type=int, default=1, help="Pre-fork this many worker processes sharing the socket and model (1 = off)")
+    parser.add_argument("--debug", action="store_true", help="Flask debug mode (single process only)")
     args = parser.parse_args()
 
-    init_speech(
+    options = dict(
         model_dir=args.model_dir,
         model_name=args.model,
         default_voice=args.voice,
         speed_offset=args.speed_offset,
+        buffer_size=args.buffer_size,
+        max_batch=args.max_batch,
+        batch_window_ms=args.batch_window_ms,
+        models=args.models,
+        model_memory_mb=args.model_memory_mb,
+        audio_cache_size=args.audio_cache_size,
+        preprocess_profile=args.profile,
+        max_streams=args.max_streams,
     )
+    if args.processes > 1:
+        serve_prefork(args.host, args.port, args.processes, options)
+        return
 
+    init_speech(**options)
     try:
         app.run(host=args.host, port=args.port, debug=args.debug)
     finally:
@@ -91,5 +224,24 @@ def main() -> None:
             speech.shutdown()
 
 
+def serve_prefork(host: str, port: int, processes: int, options: dict) -> None:
+    """Bind and load the model once, then serve from `processes` forked workers."""
+    sock = prefork.listen(host, port)
+    files = ModelFiles(options["model_dir"] + options["model_name"])
+    print(f"Serving on http://{host}:{port}")
+
+    def serve(w: prefork.Worker) -> None:
+        global worker
+        worker = w
+        init_speech(**options, preloaded=files)
+        w.export_metrics(speech.metrics)
+        try:
+            make_server(host, port, app, threaded=True, fd=sock.fileno()).serve_forever()
+        finally:
+            speech.shutdown()
+
+    prefork.run(processes, serve)
+
+
 if __name__ == "__main__":
     main()
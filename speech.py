@@ -5,11 +5,21 @@ Used by app.py (script mode) and server.py (API mode).
 
 from __future__ import annotations
 
-from kittentts import KittenTTS
+import asyncio
+import itertools
+import queue
+import time
+import warnings
+from collections import OrderedDict, deque
+from dataclasses import dataclass
+from typing import AsyncIterator, Callable, Iterator
+
+from kittentts import KittenTTS, MicroBatcher, ModelFiles, ModelPool, SharedModel
+from kittentts.preprocess import DEFAULT_PROFILE, PROFILES, SENTENCE_CACHE, SentenceSplitter
+from metrics import Registry
 import sounddevice as sd
 import threading
-import queue
-from threading import Semaphore, Lock
+from threading import Condition, Lock
 
 # Color definitions for console output
 class Colors:
@@ -37,10 +47,175 @@ VOICES_HE = ["Jasper", "Bruno", "Leo"]
 ALL_VOICES = VOICES_SHE + VOICES_HE
 
 
+DEFAULT_CHANNEL = "default"
+
+# Smoothing factor for the per-line timing averages used to estimate queue wait
+_EWMA_ALPHA = 0.2
+
+# Channels that share the local sound device take turns instead of cutting each other off
+_sound_device_lock = Lock()
+
+def split_sentences(text: str) -> list[str]:
+    """Split text at sentence boundaries (see SentenceSegmenter) so each sentence can be synthesized on its own."""
+    segmenter = SentenceSegmenter()
+    return segmenter.feed(text) + segmenter.flush()
+
+
+class SentenceSegmenter(SentenceSplitter):
+    """
+    Incremental split_sentences() for text that arrives in fragments: feed()
+    returns each sentence once the first character after its closing
+    punctuation and whitespace shows it really ended (not "Dr." or "e.g.");
+    flush() returns whatever is left. Run-on text is cut at a clause or word
+    gap after max_pending characters. Sentences stay raw; the model
+    normalizes each one (through the shared sentence cache) when it
+    synthesizes it. See kittentts.preprocess.SentenceSplitter.
+    """
+
+
+@dataclass
+class Admission:
+    """Result of a non-blocking admission attempt (see Speech.try_add_speech_line)."""
+
+    accepted: bool
+    line_id: int | None = None      # line number within the channel
+    channel: str = DEFAULT_CHANNEL
+    queue_depth: int = 0            # lines queued ahead of this one, not yet played
+    estimated_wait: float = 0.0     # seconds until this line would start playing
+    reason: str = ""                # "invalid", "full", "deadline", "channels" or "stopped" when not accepted
+
+
+class SoundDeviceSink:
+    """
+    Default sink: play a clip on the local sound device and block until it
+    finishes. stop() cuts off the clip this sink is currently playing.
+    """
+
+    def __init__(self):
+        self._playing = False
+
+    def __call__(self, audio_data, sample_rate: int) -> None:
+        with _sound_device_lock:
+            self._playing = True
+            try:
+                sd.play(audio_data, sample_rate)
+                sd.wait()
+            finally:
+                self._playing = False
+
+    def stop(self) -> None:
+        # Only stop the device while it is playing our clip, not another channel's
+        if self._playing:
+            sd.stop()
+
+
+def _ewma(avg: float, sample: float) -> float:
+    """Exponentially weighted moving average; the first sample seeds the average."""
+    return sample if avg == 0.0 else avg + _EWMA_ALPHA * (sample - avg)
+
+
+class _StreamSink:
+    """
+    Sink for Speech.stream(): hands each clip to the consuming generator.
+    Slots that produced no audio arrive as None, and close() ends the stream.
+    """
+
+    END = object()
+
+    def __init__(self, put: Callable | None = None):
+        self.clips: queue.Queue = queue.Queue()
+        self._put = put or self.clips.put
+
+    def __call__(self, audio_data, sample_rate: int) -> None:
+        self._put(audio_data)
+
+    def skip(self, line: int) -> None:
+        self._put(None)
+
+    def close(self) -> None:
+        self._put(self.END)
+
+
+class _Job:
+    """
+    One synthesis of a (voice, speed, text) line. Identical lines queued while
+    the job is pending or running attach to it as extra slots (single-flight),
+    and each slot gets the same clip. Guarded by the owning Speech's lock.
+    """
+
+    def __init__(self, key: tuple, voice: str, speed: float, text: str, owner: "Channel", model: str | None = None,
+                 profile: str = DEFAULT_PROFILE):
+        self.key = key
+        self.model = model          # None: the Speech's default model
+        self.profile = profile      # text preprocessing profile
+        self.voice = voice
+        self.speed = speed
+        self.text = text
+        self.owner = owner          # channel whose pending deque schedules the job
+        self.slots: list[tuple[Channel, int]] = []
+        self.running = False
+        self.queued_at = time.perf_counter()
+
+    def first_line(self, ch: "Channel") -> int | None:
+        """The earliest of `ch`'s lines waiting on this job, or None."""
+        return min((line for c, line in self.slots if c is ch), default=None)
+
+
+class Channel:
+    """
+    One ordered stream of speech lines. A channel numbers its own lines, plays
+    them in order through its own sink on its own player thread, and gets a
+    weighted share of the worker pool shared by all channels of a Speech.
+    All fields are guarded by the owning Speech's lock.
+    """
+
+    def __init__(self, name: str, sink: Callable, weight: float, buffer_size: int, lock: Lock):
+        self.name = name
+        self.sink = sink
+        self.weight = weight
+        self.buffer_size = buffer_size
+
+        self.pending: deque[_Job] = deque()
+        self.jobs: dict[int, _Job] = {}     # line -> job it is waiting on
+        self.results: dict[int, tuple] = {}
+        self.cancelled: set[int] = set()    # lines the player must skip
+        self.admitted_at: dict[int, float] = {}     # line -> admission time, until it reaches the sink
+        self.deadlines: dict[int, float] = {}       # line -> time by which it must start playing
+        self.line_counter = 0
+        self.next_line = 1
+        self.played_count = 0               # lines finished: played or skipped
+        self.playing_line: int | None = None
+        self.urgent = False                 # head of pending is a barge-in line
+        self.no_more_lines = False
+        self.reapable = False               # created by a line naming it; retired when idle
+        self.vtime = 0.0        # fair-scheduling virtual finish time
+        self.avg_play_s = 0.0
+
+        self.clip_ready = Condition(lock)     # player: next-in-order clip is ready
+        self.space_ready = Condition(lock)    # producers: a buffer slot was freed
+        self.player_thread: threading.Thread | None = None
+
+    def queue_depth(self) -> int:
+        """Lines queued but not yet played, not counting cancelled ones."""
+        return self.line_counter - self.played_count - len(self.cancelled)
+
+    def is_drained(self) -> bool:
+        """True once no more lines are expected and every queued line was played."""
+        return self.no_more_lines and self.played_count >= self.line_counter
+
+
 class Speech:
     """
     Core TTS engine: queues speech lines, generates audio via worker threads,
     plays in order. Supports script mode (batch) and API mode (streaming).
+
+    Lines go to named channels (see channel()); each channel keeps its own
+    ordering and sink, and all channels share the worker pool through a
+    weighted fair scheduler. Lines added without a channel use "default".
+
+    Threads coordinate through condition variables on a single lock: workers
+    sleep until a task is queued, each player sleeps until its next-in-order
+    clip is ready, and producers sleep until a buffer slot frees up.
     """
 
     def __init__(
@@ -53,195 +228,1067 @@ class Speech:
         speed_offset: float = 0.2,
         buffer_size: int = 5,
         num_workers: int = 3,
-        player_timeout: float = 10.0,
+        sink: Callable | None = None,
+        dedup_cache_size: int = 16,
+        max_batch: int = 1,
+        batch_window_ms: float = 5.0,
+        metrics: Registry | None = None,
+        models: list[str] | None = None,
+        model_memory_mb: float = 1024,
+        preloaded: ModelFiles | None = None,
+        preprocess_profile: str = DEFAULT_PROFILE,
+        max_channels: int = 64,
+        channel_idle_s: float | None = 60.0,
+        player_timeout: float | None = None,
     ):
+        if player_timeout is not None:
+            # Players sleep on a condition variable now; there is no queue timeout to set
+            warnings.warn("Speech(player_timeout=...) is ignored and will be removed", DeprecationWarning, stacklevel=2)
+        self.model_dir = model_dir
+        self.model_name = model_name
         self.model_path = model_dir + model_name
+        # Models selectable per line; anything besides model_name comes from a shared LRU pool
+        self.models = [model_name] + [m for m in (models or []) if m != model_name]
+        self._pool = ModelPool(model_memory_mb) if len(self.models) > 1 else None
+        # Default model built from files read before a fork: one session shared by the workers
+        self._shared = SharedModel(self.model_path, files=preloaded) if preloaded else None
+        if preprocess_profile not in PROFILES:
+            raise ValueError(f"Unknown preprocess profile '{preprocess_profile}'. Choose from: {sorted(PROFILES)}")
+        self.preprocess_profile = preprocess_profile    # default for lines that don't pick one
+        self.profiles = sorted(PROFILES)
         self.voices = voices or ALL_VOICES
         self.default_voice = default_voice
         self.sample_rate = sample_rate
         self.speed_offset = speed_offset
         self.buffer_size = buffer_size
         self.num_workers = num_workers
-        self.player_timeout = player_timeout
+        self.sink = sink
+        self.dedup_cache_size = dedup_cache_size
+        self.max_batch = max_batch
+        self.batch_window_ms = batch_window_ms
+        self.max_channels = max_channels
+        self.channel_idle_s = channel_idle_s
 
-        self._task_queue: queue.Queue = queue.Queue()
-        self._results_queue: queue.PriorityQueue = queue.PriorityQueue()
-        self._buffer_semaphore = Semaphore(buffer_size)
+        self._lock = Lock()
+        self._work_ready = Condition(self._lock)    # workers: a task was queued
+        self._all_played = Condition(self._lock)    # wait_until_complete: a channel drained
         self._print_lock = Lock()
 
-        self._line_counter = 0
-        self._total_lines = 0
-        self._no_more_lines = threading.Event()
-        self._all_played = threading.Event()
-        self._shutdown = threading.Event()
+        self._channels: dict[str, Channel] = {}
+        self._urgent: deque[Channel] = deque()
+        self._jobs: dict[tuple, _Job] = {}                          # pending or running, by key
+        self._recent: OrderedDict[tuple, object] = OrderedDict()    # recently generated clips
+        self._dedup_hits = 0
+        self._cache_hits = 0
+        self._stream_ids = itertools.count(1)
+        self._pending_count = 0
+        self._vclock = 0.0
+        self._stopping = False
+        self._avg_synth_s = 0.0
+        self._batcher: MicroBatcher | None = None
 
         self._worker_threads: list[threading.Thread] = []
-        self._player_thread: threading.Thread | None = None
+        self._player_threads: list[threading.Thread] = []
         self._started = False
+        self._started_at = 0.0
 
-    def _worker(self) -> None:
-        """Pulls tasks from queue, generates audio, puts results in results queue."""
-        model = KittenTTS(self.model_path)
-        while not self._shutdown.is_set():
-            try:
-                task = self._task_queue.get(timeout=0.5)
-            except queue.Empty:
+        self.metrics = metrics or Registry()
+        self._init_metrics()
+
+    def _init_metrics(self) -> None:
+        """Register the pipeline's metrics; gauges read live state at scrape time."""
+        m = self.metrics
+        self._m_stage = m.histogram("kittentts_stage_seconds", "Time per model pipeline stage", ("stage",))
+        self._m_synth = m.histogram("kittentts_synthesis_seconds", "Time to synthesize one line")
+        self._m_queue_wait = m.histogram("kittentts_queue_wait_seconds", "Time a synthesis job waited for a worker")
+        self._m_latency = m.histogram("kittentts_end_to_end_seconds", "Time from admission until a line's audio reaches its sink")
+        self._m_rtf = m.histogram(
+            "kittentts_real_time_factor", "Synthesis time divided by audio duration, per line",
+            buckets=(0.01, 0.02, 0.05, 0.1, 0.2, 0.5, 1.0, 2.0, 5.0),
+        )
+        self._m_batch_rows = m.histogram(
+            "kittentts_batch_rows", "Text chunks per batched model call", buckets=(1, 2, 4, 8, 16, 32, 64),
+        )
+        self._m_batch_wait = m.histogram(
+            "kittentts_batch_queue_wait_seconds", "Time a text chunk waited for its micro-batch to start",
+            buckets=(0.001, 0.002, 0.005, 0.01, 0.02, 0.05, 0.1, 0.25, 0.5),
+        )
+        self._m_lines = m.counter("kittentts_lines_total", "Lines admitted")
+        self._m_dedup = m.counter("kittentts_dedup_hits_total", "Lines served by an identical in-flight or recent synthesis")
+        self._m_cache_hits = m.counter("kittentts_audio_cache_hits_total", "Lines served from recently generated clips")
+        m.gauge("kittentts_audio_cache_clips", "Recently generated clips kept for reuse", fn=lambda: len(self._recent))
+        self._m_syntheses = m.counter("kittentts_syntheses_total", "Model calls by result", ("result",))
+        self._m_rejected = m.counter("kittentts_rejected_total", "Lines refused at admission", ("reason",))
+        self._m_busy = m.counter("kittentts_worker_busy_seconds_total", "Seconds workers spent synthesizing")
+        self._m_shed = m.counter("kittentts_shed_total", "Lines dropped for a deadline, at admission or when reached in the queue", ("stage",))
+        self._m_completed = m.counter(
+            "kittentts_lines_completed_total", "Lines whose audio reached the sink, by deadline outcome", ("deadline",)
+        )
+        m.gauge("kittentts_workers", "Worker threads", fn=lambda: len(self._worker_threads))
+        m.gauge("kittentts_worker_utilization", "Share of worker time spent synthesizing since start", fn=self._utilization)
+        m.gauge("kittentts_pending_jobs", "Synthesis jobs waiting for a worker", fn=lambda: self._pending_count)
+        m.gauge("kittentts_running_jobs", "Synthesis jobs on a worker", fn=self._running_jobs)
+        m.gauge("kittentts_reorder_buffer", "Finished clips waiting for their turn to play", fn=self._reorder_buffer)
+        m.gauge("kittentts_queued_lines", "Lines admitted but not yet played", fn=self.queue_depth)
+        m.gauge("kittentts_channels", "Open channels", fn=lambda: len(self.channel_names()))
+        m.gauge("kittentts_dedup_hit_ratio", "Share of admitted lines served by deduplication", fn=self._dedup_ratio)
+        m.gauge("kittentts_preprocess_cache_events", "Preprocessed-sentence cache hits and misses", ("event",), fn=self._preprocess_events)
+        m.gauge("kittentts_preprocess_cache_sentences", "Preprocessed sentences kept for reuse", fn=lambda: self.preprocess_stats()["size"])
+        if self._pool:
+            m.gauge("kittentts_model_pool_events", "Model pool hits, loads and evictions", ("event",), fn=self._pool_events)
+            m.gauge("kittentts_model_pool_resident_mb", "Weights and voices of the pooled models", fn=lambda: self._pool.stats()["resident_mb"])
+
+    def _preprocess_events(self) -> dict:
+        stats = self.preprocess_stats()
+        return {("hit",): stats["hits"], ("miss",): stats["misses"]}
+
+    def _pool_events(self) -> dict:
+        stats = self._pool.stats()
+        return {("hit",): stats["hits"], ("load",): stats["loads"], ("eviction",): stats["evictions"]}
+
+    def _utilization(self) -> float:
+        workers = len(self._worker_threads)
+        if not workers or not self._started_at:
+            return 0.0
+        return self._m_busy.value() / (workers * (time.perf_counter() - self._started_at))
+
+    def _running_jobs(self) -> int:
+        with self._lock:
+            return sum(job.running for job in self._jobs.values())
+
+    def _reorder_buffer(self) -> int:
+        with self._lock:
+            return sum(len(ch.results) for ch in self._channels.values())
+
+    def _dedup_ratio(self) -> float:
+        lines = self._m_lines.value()
+        return self._m_dedup.value() / lines if lines else 0.0
+
+    def _instrument(self, model) -> None:
+        """Send the model's per-stage timings to the metrics registry, if it reports them."""
+        inner = getattr(model, "model", model)
+        if hasattr(inner, "stage_observer"):
+            inner.stage_observer = self._observe_stage
+
+    def _observe_stage(self, stage: str, seconds: float) -> None:
+        self._m_stage.observe(seconds, stage)
+
+    def _observe_batch(self, call_sizes: list[int], queue_delays: list[float]) -> None:
+        for rows in call_sizes:
+            self._m_batch_rows.observe(rows)
+        for delay in queue_delays:
+            self._m_batch_wait.observe(delay)
+
+    def _load_model(self):
+        """Load the TTS model used by one worker thread."""
+        if self._shared is not None:
+            return self._shared.for_thread()
+        return KittenTTS(self.model_path)
+
+    def _log(self, ch: Channel, color: str, msg: str) -> None:
+        prefix = "" if ch.name == DEFAULT_CHANNEL else f"[{ch.name}] "
+        with self._print_lock:
+            print(color + prefix + msg + Colors.RESET)
+
+    # ── Channels ─────────────────────────────────────────────────────────
+
+    def channel(self, name: str = DEFAULT_CHANNEL, sink: Callable | None = None, weight: float = 1.0) -> Channel:
+        """
+        Get or create a channel. `sink` (default: the Speech sink, else the
+        local sound device) receives the channel's clips in order; `weight` sets its share of the worker pool
+        relative to other busy channels. Both only apply when creating.
+        """
+        with self._lock:
+            return self._get_channel(name, sink, weight, implicit=False)
+
+    def _get_channel(
+        self, name: str, sink: Callable | None = None, weight: float = 1.0, implicit: bool = True,
+    ) -> Channel | None:
+        """
+        Get or create a channel. A closed channel that still has lines to play
+        reopens; a drained one is replaced by a fresh one. A channel created
+        `implicit`ly, by a line naming it, is retired once idle for
+        channel_idle_s, and is refused (None) while max_channels are open.
+        Caller holds the lock.
+        """
+        ch = self._channels.get(name)
+        if ch is not None and not ch.is_drained():
+            ch.no_more_lines = False
+            ch.reapable = ch.reapable and implicit
+            return ch
+        if implicit and name != DEFAULT_CHANNEL and len(self._channels) >= self.max_channels:
+            return None
+        if weight <= 0:
+            raise ValueError("Channel weight must be positive")
+        ch = Channel(name, sink or self.sink or SoundDeviceSink(), weight, self.buffer_size, self._lock)
+        ch.vtime = self._vclock
+        ch.reapable = implicit and name != DEFAULT_CHANNEL
+        self._channels[name] = ch
+        ch.player_thread = threading.Thread(target=self._player, args=(ch,), daemon=True)
+        ch.player_thread.start()
+        # Retired channels' players have exited; keep only the live ones
+        self._player_threads = [t for t in self._player_threads if t.is_alive()] + [ch.player_thread]
+        return ch
+
+    def channel_names(self) -> list[str]:
+        """Names of the open channels."""
+        with self._lock:
+            return [name for name, ch in self._channels.items() if not ch.no_more_lines]
+
+    def close_channel(self, name: str) -> None:
+        """No more lines for this channel: it plays what is queued, then goes away."""
+        with self._lock:
+            ch = self._channels.get(name)
+            if ch is not None:
+                ch.no_more_lines = True
+                ch.clip_ready.notify()
+
+    # ── Threads ──────────────────────────────────────────────────────────
+
+    def _next_task(self) -> _Job | None:
+        """
+        Pick the next task: barge-in lines first, then weighted fair queuing
+        across channels, the busy channel with the smallest virtual time goes
+        first. Lines past their deadline are shed on the way, and jobs left
+        with no lines are skipped. Caller holds the lock.
+        """
+        while True:
+            best = None
+            while self._urgent and best is None:
+                ch = self._urgent.popleft()
+                if ch.urgent and ch.pending:
+                    best = ch
+                ch.urgent = False
+            for ch in self._channels.values() if best is None else ():
+                if ch.pending and (best is None or ch.vtime < best.vtime):
+                    best = ch
+            if best is None:
+                # No channel has a pending job, so none is left to count
+                self._pending_count = 0
+                return None
+            self._pending_count -= 1
+            job = best.pending.popleft()
+            now = time.perf_counter()
+            if self._shed_expired(job, now):
+                # Only work actually done is charged to the channel
+                self._vclock = best.vtime
+                best.vtime += 1.0 / best.weight
+                job.running = True
+                self._m_queue_wait.observe(now - job.queued_at)
+                return job
+
+    def _shed_expired(self, job: _Job, now: float) -> bool:
+        """
+        Cancel the job's lines whose deadline has passed, as if cancel() had
+        been called. Returns False, with the job dropped, if no line still
+        wants it. Caller holds the lock.
+        """
+        for ch, line in list(job.slots):
+            deadline = ch.deadlines.get(line)
+            if deadline is None or deadline > now:
                 continue
-            if task is None:
-                break
+            job.slots.remove((ch, line))
+            ch.jobs.pop(line, None)
+            ch.cancelled.add(line)
+            if line == ch.next_line:
+                ch.clip_ready.notify()
+            self._m_shed.inc(1.0, "queue")
+        if job.slots:
+            return True
+        if self._jobs.get(job.key) is job:
+            del self._jobs[job.key]
+        return False
 
-            line, txt, speed, voice = task
+    def _worker(self) -> None:
+        """Sleeps until a task is queued, generates audio, hands the clip to every waiting slot."""
+        model = self._batcher or self._load_model()
+        self._instrument(model)
+        while True:
+            with self._lock:
+                while not self._pending_count and not self._stopping:
+                    self._work_ready.wait()
+                if self._stopping:
+                    return
+                job = self._next_task()
+                if job is None:
+                    # Everything pending had expired: sleep until more work is queued
+                    self._work_ready.wait()
+                    continue
+                ch, line = job.slots[0]
+
+            txt, speed, voice = job.text, job.speed, job.voice
             color = VOICE_COLORS.get(voice, Colors.RESET)
-            with self._print_lock:
-                print(color + f"\tGenerating-{line}.{speed:.1f}.{voice}:{txt}" + Colors.RESET)
-            audio_data = model.generate(txt, voice=voice, speed=speed)
-            self._results_queue.put((line, txt, speed, voice, audio_data))
-            self._task_queue.task_done()
-
-    def _player(self) -> None:
-        """Plays audio clips in order as they become available."""
-        next_line_to_play = 1
-        results_buffer: dict[int, tuple] = {}
-        played_count = 0
-
-        while not self._shutdown.is_set():
-            # Check if we're done: no more lines coming and we've played all
-            if self._no_more_lines.is_set() and self._total_lines > 0 and played_count >= self._total_lines:
-                break
-
-            # Play consecutive lines from buffer first
-            while next_line_to_play in results_buffer:
-                line, txt, speed, voice, audio_data = results_buffer.pop(next_line_to_play)
-                color = VOICE_COLORS.get(voice, Colors.RESET)
-                with self._print_lock:
-                    print(color + f"Playing-{line}.{speed:.1f}.{voice}:{txt}" + Colors.RESET)
-                sd.play(audio_data, self.sample_rate)
-                sd.wait()
-                self._buffer_semaphore.release()
-                played_count += 1
-                next_line_to_play += 1
+            self._log(ch, color, f"\tGenerating-{line}.{speed:.1f}.{voice}:{txt}")
+            t0 = time.perf_counter()
+            try:
+                generator = model if job.model is None else self._pooled_model(job.model)
+                audio_data = generator.generate(txt, voice=voice, speed=speed, profile=job.profile)
+            except Exception as e:
+                # Keep the slots so the players can move past them instead of stalling
+                self._log(ch, Colors.RESET, f"Generation failed for line {line}: {e}")
+                audio_data = None
+            elapsed = time.perf_counter() - t0
+            self._record_synthesis(elapsed, audio_data)
 
-            if self._no_more_lines.is_set() and played_count >= self._total_lines:
-                break
+            with self._lock:
+                self._avg_synth_s = _ewma(self._avg_synth_s, elapsed)
+                if self._jobs.get(job.key) is job:
+                    del self._jobs[job.key]
+                if audio_data is not None and job.slots:
+                    self._remember(job.key, audio_data)
+                for ch, line in job.slots:
+                    ch.jobs.pop(line, None)
+                    self._deliver(ch, line, txt, speed, voice, audio_data)
 
-            # Get next result from queue
-            try:
-                line, txt, speed, voice, audio_data = self._results_queue.get(
-                    timeout=self.player_timeout
-                )
-                if line == next_line_to_play:
-                    color = VOICE_COLORS.get(voice, Colors.RESET)
-                    with self._print_lock:
-                        print(color + f"Playing-{line}.{speed:.1f}.{voice}:{txt}" + Colors.RESET)
-                    sd.play(audio_data, self.sample_rate)
-                    sd.wait()
-                    self._buffer_semaphore.release()
-                    played_count += 1
-                    next_line_to_play += 1
-                else:
-                    results_buffer[line] = (line, txt, speed, voice, audio_data)
-            except queue.Empty:
-                if self._no_more_lines.is_set():
-                    with self._print_lock:
-                        print("Player: no more lines expected, exiting.")
+    def _pooled_model(self, name: str):
+        """This worker's instance of a non-default model, loaded on demand by the pool."""
+        model = self._pool.get(self.model_dir + name)
+        self._instrument(model)
+        return model
+
+    def _resolve_model(self, model: str | None) -> str | None:
+        """
+        Normalize a requested model name: None for the default model, the
+        name for another servable model. Raises ValueError for unknown ones.
+        """
+        if model is None or model == self.model_name:
+            return None
+        if model not in self.models:
+            raise ValueError(f"Unknown model '{model}'. Choose from: {self.models}")
+        return model
+
+    def _resolve_profile(self, profile: str | None) -> str:
+        """
+        Normalize a requested preprocessing profile: the Speech's default for
+        None, else the name. Raises ValueError for unknown ones.
+        """
+        if profile is None:
+            return self.preprocess_profile
+        if profile not in PROFILES:
+            raise ValueError(f"Unknown preprocess profile '{profile}'. Choose from: {self.profiles}")
+        return profile
+
+    def model_stats(self) -> dict | None:
+        """Model pool stats (see ModelPool.stats()), or None when only the default model is served."""
+        return self._pool.stats() if self._pool else None
+
+    def _record_synthesis(self, elapsed: float, audio_data) -> None:
+        """Metrics for one model call: time, result, worker busy time and real-time factor."""
+        self._m_busy.inc(elapsed)
+        self._m_synth.observe(elapsed)
+        self._m_syntheses.inc(1.0, "error" if audio_data is None else "ok")
+        if audio_data is not None:
+            samples = getattr(audio_data, "size", None) or len(audio_data)
+            if samples:
+                self._m_rtf.observe(elapsed * self.sample_rate / samples)
+
+    def _deliver(self, ch: Channel, line: int, txt: str, speed: float, voice: str, audio_data) -> None:
+        """Hand a finished clip to a channel slot, unless it was cancelled. Caller holds the lock."""
+        if line in ch.cancelled or line < ch.next_line:
+            return
+        ch.results[line] = (line, txt, speed, voice, audio_data)
+        if line == ch.next_line:
+            ch.clip_ready.notify()
+
+    def _remember(self, key: tuple, audio_data) -> None:
+        """Keep a generated clip for reuse by identical lines queued soon after. Caller holds the lock."""
+        if self.dedup_cache_size <= 0:
+            return
+        self._recent[key] = audio_data
+        self._recent.move_to_end(key)
+        while len(self._recent) > self.dedup_cache_size:
+            self._recent.popitem(last=False)
+
+    def _player(self, ch: Channel) -> None:
+        """
+        Plays a channel's clips in order, sleeping until the next-in-order clip
+        is ready. Retires a reapable channel left idle for channel_idle_s.
+        """
+        while True:
+            with self._lock:
+                while (
+                    ch.next_line not in ch.results
+                    and ch.next_line not in ch.cancelled
+                    and not self._stopping
+                    and not ch.is_drained()
+                ):
+                    idle = ch.reapable and self.channel_idle_s is not None and ch.played_count >= ch.line_counter
+                    if not ch.clip_ready.wait(self.channel_idle_s if idle else None) and idle:
+                        if ch.played_count >= ch.line_counter:
+                            ch.no_more_lines = True
+                if self._stopping or ch.is_drained():
                     break
-                with self._print_lock:
-                    print("Player timed out waiting for next audio clip.")
-                continue
+                if ch.next_line in ch.cancelled:
+                    ch.cancelled.discard(ch.next_line)
+                    ch.admitted_at.pop(ch.next_line, None)
+                    ch.deadlines.pop(ch.next_line, None)
+                    ch.played_count += 1
+                    ch.next_line += 1
+                    ch.space_ready.notify()
+                    continue
+                line, txt, speed, voice, audio_data = ch.results.pop(ch.next_line)
+                ch.playing_line = line
+                admitted_at = ch.admitted_at.pop(line, None)
+                deadline = ch.deadlines.pop(line, None)
 
-        with self._print_lock:
-            print("Finished playing.")
-        self._all_played.set()
+            elapsed = None
+            if audio_data is not None:
+                color = VOICE_COLORS.get(voice, Colors.RESET)
+                self._log(ch, color, f"Playing-{line}.{speed:.1f}.{voice}:{txt}")
+                t0 = time.perf_counter()
+                if admitted_at is not None:
+                    self._m_latency.observe(t0 - admitted_at)
+                self._m_completed.inc(1.0, "none" if deadline is None else "met" if t0 <= deadline else "missed")
+                ch.sink(audio_data, self.sample_rate)
+                elapsed = time.perf_counter() - t0
+            elif hasattr(ch.sink, "skip"):
+                ch.sink.skip(line)
+
+            with self._lock:
+                ch.playing_line = None
+                if elapsed is not None:
+                    ch.avg_play_s = _ewma(ch.avg_play_s, elapsed)
+                ch.played_count += 1
+                ch.next_line += 1
+                ch.space_ready.notify()
+
+        self._log(ch, Colors.RESET, "Finished playing.")
+        if hasattr(ch.sink, "close"):
+            ch.sink.close()
+        with self._lock:
+            if self._channels.get(ch.name) is ch:
+                del self._channels[ch.name]
+            self._all_played.notify_all()
 
     def start(self) -> None:
-        """Start worker and player threads. Call to preload model before first request."""
+        """Start worker threads. Call to preload model before first request."""
         self._ensure_started()
 
     def _ensure_started(self) -> None:
-        """Start worker and player threads on first use."""
-        if self._started:
-            return
-        self._started = True
-        for _ in range(self.num_workers):
+        """
+        Start worker threads on first use. Player threads start with their channel.
+        With max_batch > 1 the workers share one model behind a MicroBatcher,
+        and there are at least max_batch of them so a batch can fill. A model
+        that cannot batch (no per-token durations output) keeps max_batch at 1.
+        """
+        with self._lock:
+            if self._started:
+                return
+            self._started = True
+            self._started_at = time.perf_counter()
+        num_workers = self.num_workers
+        if self.max_batch > 1:
+            model = self._load_model()
+            if not getattr(getattr(model, "model", model), "batching", False):
+                print(f"max_batch={self.max_batch} ignored: the model has no per-token durations output to cut batched rows by")
+                self.max_batch = 1
+        if self.max_batch > 1:
+            self._batcher = MicroBatcher(model, self.batch_window_ms, self.max_batch)
+            self._batcher.batch_observer = self._observe_batch
+            self._instrument(self._batcher)
+            num_workers = max(num_workers, self.max_batch)
+        for _ in range(num_workers):
             t = threading.Thread(target=self._worker, daemon=True)
             t.start()
             self._worker_threads.append(t)
-        self._player_thread = threading.Thread(target=self._player, daemon=True)
-        self._player_thread.start()
 
-    def add_speech_line(self, line: str) -> bool:
+    # ── Adding lines ─────────────────────────────────────────────────────
+
+    def parse_speech_line(self, line: str) -> tuple[str, float, str] | None:
         """
-        Parse and queue a speech line. Format: Character|speed|text
-        Returns True if valid and queued.
+        Parse a speech line. Format: Character|speed|text
+        Returns (voice, speed, text) with speed_offset applied, or None if invalid.
         """
         line = line.strip()
         if not line:
-            return False
+            return None
 
         parts = line.split("|")
         if len(parts) < 3:
-            return False
+            return None
 
         try:
             voice = parts[0].strip()
             speed = float(parts[1]) + self.speed_offset
             text = parts[2].replace("'", "").replace("'", "").strip()
         except (ValueError, IndexError):
-            return False
+            return None
 
+        if not text:
+            return None
         if voice not in self.voices:
             voice = self.default_voice
+        return voice, speed, text
 
-        return self.add_speech_line_parts(voice, speed, text)
+    def add_speech_line(
+        self, line: str, channel: str = DEFAULT_CHANNEL, barge_in: bool = False, model: str | None = None,
+        profile: str | None = None,
+    ) -> bool:
+        """
+        Parse and queue a speech line. Format: Character|speed|text
+        Blocks while the channel's buffer is full. Returns True if valid and queued.
+        With barge_in, everything else in the channel is cancelled first and
+        the line jumps ahead of other channels for a worker. `model` picks one
+        of self.models for this line (default: model_name), `profile` one of
+        self.profiles for its text preprocessing (default: preprocess_profile).
+        """
+        parsed = self.parse_speech_line(line)
+        if parsed is None:
+            return False
+        return self.add_speech_line_parts(*parsed, channel=channel, barge_in=barge_in, model=model, profile=profile)
 
-    def add_speech_line_parts(self, voice: str, speed: float, text: str) -> bool:
-        """Queue a parsed speech line. Returns True."""
+    def add_speech_line_parts(
+        self, voice: str, speed: float, text: str, channel: str = DEFAULT_CHANNEL, barge_in: bool = False,
+        model: str | None = None, profile: str | None = None,
+    ) -> bool:
+        """Queue a parsed speech line, waiting for a free buffer slot. Returns True."""
         if not text.strip():
             return False
+        try:
+            model = self._resolve_model(model)
+            profile = self._resolve_profile(profile)
+        except ValueError:
+            return False
+
+        self._ensure_started()
+        if barge_in:
+            self.cancel_channel(channel)
+        with self._lock:
+            ch = self._get_channel(channel)
+            while ch is not None and ch.queue_depth() >= ch.buffer_size and not self._stopping:
+                ch.space_ready.wait()
+                # The channel may have been closed and drained meanwhile
+                ch = self._get_channel(channel)
+            if ch is None or self._stopping:
+                return False
+            self._enqueue(ch, voice, speed, text, urgent=barge_in, model=model, profile=profile)
+        return True
+
+    def try_add_speech_line(
+        self, line: str, channel: str = DEFAULT_CHANNEL, barge_in: bool = False, model: str | None = None,
+        deadline: float | None = None, profile: str | None = None,
+    ) -> Admission:
+        """
+        Parse and queue a speech line without blocking.
+        Returns an Admission: a line id when accepted, otherwise the reason
+        ("invalid", "full", "deadline", "channels", "stopped") with the current queue depth
+        and an estimate of how long until a slot frees up.
+
+        `deadline` is how many seconds from now the line may take to start
+        playing. A line whose estimated wait is already longer is refused
+        ("deadline"); an accepted line still waiting for a worker when its
+        deadline passes is dropped like a cancelled one.
+        """
+        parsed = self.parse_speech_line(line)
+        if parsed is None:
+            return self._counted(Admission(accepted=False, channel=channel, reason="invalid"))
+        return self.try_add_speech_line_parts(
+            *parsed, channel=channel, barge_in=barge_in, model=model, deadline=deadline, profile=profile
+        )
+
+    def try_add_speech_line_parts(
+        self, voice: str, speed: float, text: str, channel: str = DEFAULT_CHANNEL, barge_in: bool = False,
+        model: str | None = None, deadline: float | None = None, profile: str | None = None,
+    ) -> Admission:
+        """Queue a parsed speech line without blocking. See try_add_speech_line()."""
+        try:
+            model = self._resolve_model(model)
+            profile = self._resolve_profile(profile)
+        except ValueError:
+            return self._counted(Admission(accepted=False, channel=channel, reason="invalid"))
+        if not text.strip():
+            return self._counted(Admission(accepted=False, channel=channel, reason="invalid"))
 
         self._ensure_started()
-        self._line_counter += 1
-        self._total_lines = self._line_counter
-        line_num = self._line_counter
+        stop_sink = None
+        with self._lock:
+            if self._stopping:
+                return self._counted(Admission(accepted=False, channel=channel, reason="stopped"))
+            ch = self._get_channel(channel)
+            if ch is None:
+                return self._counted(Admission(accepted=False, channel=channel, reason="channels"))
+            if barge_in:
+                _, stop_sink = self._cancel_all(ch)
+            admission = self._try_enqueue(
+                ch, voice, speed, text, urgent=barge_in, model=model, deadline=deadline, profile=profile
+            )
+        if stop_sink:
+            stop_sink()
+        return self._counted(admission)
+
+    def try_add_speech_lines(
+        self, lines: list[str], channel: str = DEFAULT_CHANNEL, model: str | None = None,
+        deadline: float | None = None, profile: str | None = None,
+    ) -> list[Admission]:
+        """
+        Parse and queue many speech lines in one call, in order, without
+        blocking. Returns one Admission per line. Invalid lines are refused on
+        their own; once the channel is full (or a line would miss `deadline`,
+        as in try_add_speech_line()) every later line is refused too, so the
+        accepted lines always keep script order.
+        """
+        try:
+            model = self._resolve_model(model)
+            profile = self._resolve_profile(profile)
+        except ValueError:
+            return [self._counted(Admission(accepted=False, channel=channel, reason="invalid")) for _ in lines]
+        parsed = [self.parse_speech_line(line) for line in lines]
+        self._ensure_started()
+        admissions = []
+        with self._lock:
+            ch = None if self._stopping else self._get_channel(channel)
+            refused = None
+            for parts in parsed:
+                if parts is None or not parts[2].strip():
+                    admissions.append(Admission(accepted=False, channel=channel, reason="invalid"))
+                elif ch is None:
+                    reason = "stopped" if self._stopping else "channels"
+                    admissions.append(Admission(accepted=False, channel=channel, reason=reason))
+                elif refused is not None:
+                    admissions.append(refused)
+                else:
+                    admission = self._try_enqueue(ch, *parts, model=model, deadline=deadline, profile=profile)
+                    if not admission.accepted:
+                        refused = admission
+                    admissions.append(admission)
+        for admission in admissions:
+            self._counted(admission)
+        return admissions
+
+    def _counted(self, admission: Admission) -> Admission:
+        """Count a refused admission by reason; returns it unchanged."""
+        if not admission.accepted:
+            self._m_rejected.inc(1.0, admission.reason)
+            if admission.reason == "deadline":
+                self._m_shed.inc(1.0, "admission")
+        return admission
+
+    def _try_enqueue(
+        self, ch: Channel, voice: str, speed: float, text: str, urgent: bool = False, model: str | None = None,
+        deadline: float | None = None, profile: str = DEFAULT_PROFILE,
+    ) -> Admission:
+        """
+        Queue a line if the channel has room (barge-in lines always fit) and,
+        with a deadline (seconds from now), if it is expected to start playing
+        in time. Caller holds the lock.
+        """
+        channel = ch.name
+        depth = ch.queue_depth()
+        if depth >= ch.buffer_size and not urgent:
+            # Time until the oldest queued line finishes and frees its slot
+            return Admission(
+                accepted=False,
+                channel=channel,
+                queue_depth=depth,
+                estimated_wait=self._estimate_wait(ch, 1),
+                reason="full",
+            )
+        wait = self._estimate_wait(ch, 0 if urgent else depth)
+        if deadline is not None and wait > deadline:
+            return Admission(accepted=False, channel=channel, queue_depth=depth, estimated_wait=wait, reason="deadline")
+        line_id = self._enqueue(ch, voice, speed, text, urgent=urgent, model=model, profile=profile)
+        if deadline is not None:
+            ch.deadlines[line_id] = ch.admitted_at[line_id] + deadline
+        return Admission(
+            accepted=True,
+            line_id=line_id,
+            channel=channel,
+            queue_depth=depth,
+            estimated_wait=self._estimate_wait(ch, depth),
+        )
+
+    def _enqueue(
+        self, ch: Channel, voice: str, speed: float, text: str, urgent: bool = False, model: str | None = None,
+        profile: str = DEFAULT_PROFILE,
+    ) -> int:
+        """
+        Assign the channel's next line number and find it a clip: reuse a
+        recently generated one, attach to an identical pending or running job,
+        or schedule a new job. Urgent (barge-in) lines go to the front of the
+        channel and of the scheduler. Caller holds the lock.
+        """
+        ch.line_counter += 1
+        line = ch.line_counter
+        key = (model, profile, voice, round(speed, 3), text)
+        ch.admitted_at[line] = time.perf_counter()
+        self._m_lines.inc()
+
+        audio_data = self._recent.get(key)
+        if audio_data is not None:
+            self._recent.move_to_end(key)
+            self._dedup_hits += 1
+            self._cache_hits += 1
+            self._m_dedup.inc()
+            self._m_cache_hits.inc()
+            self._deliver(ch, line, text, speed, voice, audio_data)
+            return line
+
+        job = self._jobs.get(key)
+        # A barge-in line must not wait behind an ordinary pending job
+        if job is not None and (job.running or not urgent):
+            self._dedup_hits += 1
+            self._m_dedup.inc()
+            job.slots.append((ch, line))
+            ch.jobs[line] = job
+            if not job.running:
+                self._adopt(job, ch)
+            return line
+
+        job = _Job(key, voice, speed, text, ch, model, profile)
+        job.slots.append((ch, line))
+        ch.jobs[line] = job
+        self._jobs[key] = job
+        if not ch.pending:
+            # A channel that was idle starts at the current virtual time, not with banked credit
+            ch.vtime = max(ch.vtime, self._vclock)
+        if urgent:
+            ch.pending.appendleft(job)
+            ch.urgent = True
+            self._urgent.append(ch)
+        else:
+            ch.pending.append(job)
+        self._pending_count += 1
+        self._work_ready.notify()
+        return line
+
+    def _adopt(self, job: _Job, ch: Channel) -> None:
+        """
+        Move a pending job into `ch`'s queue if `ch` would get to it sooner,
+        e.g. a stream attaching to a line deep in another channel's backlog:
+        a shared job runs at the earliest position of any line waiting on it.
+        Positions are compared in virtual time. If the adopter cancels, the
+        job moves back to a channel still waiting on it (see _rehome()).
+        Caller holds the lock.
+        """
+        owner = job.owner
+        if owner is ch:
+            return
+        position = owner.pending.index(job)
+        if owner.urgent and position == 0:
+            return
+        if not ch.pending:
+            ch.vtime = max(ch.vtime, self._vclock)
+        if ch.vtime + len(ch.pending) / ch.weight >= owner.vtime + position / owner.weight:
+            return
+        del owner.pending[position]
+        ch.pending.append(job)
+        job.owner = ch
+
+    def _estimate_wait(self, ch: Channel, lines_ahead: int) -> float:
+        """
+        Seconds until a line with `lines_ahead` lines in front of it in `ch`
+        starts playing. Playback is serial per channel; synthesis runs
+        num_workers wide, split between busy channels by weight. Whichever is
+        slower sets the pace. Caller holds the lock.
+        """
+        busy_weight = sum(c.weight for c in self._channels.values() if c.queue_depth() or c is ch)
+        share = ch.weight / busy_weight
+        per_line = max(ch.avg_play_s, self._avg_synth_s / max(self.num_workers, 1) / share)
+        return lines_ahead * per_line
+
+    # ── Streaming ────────────────────────────────────────────────────────
 
-        self._buffer_semaphore.acquire()
-        self._task_queue.put((line_num, text, speed, voice))
+    def stream(
+        self, voice: str, speed: float, text: str, model: str | None = None, profile: str | None = None
+    ) -> Iterator:
+        """
+        Synthesize text sentence by sentence on the shared worker pool and
+        yield each sentence's audio, in order, as soon as it is ready. The
+        stream runs on its own channel, so it is fairly scheduled against other
+        channels; at most buffer_size sentences are in flight, and whatever is
+        left is cancelled if the consumer stops early. `model` and `profile` as
+        in add_speech_line().
+        """
+        sentences = split_sentences(text)
+        if not sentences:
+            return
+        sink = _StreamSink()
+        name = self._open_stream(sink)
+        submitted = received = 0
+        try:
+            while received < len(sentences):
+                submitted = self._feed_stream(name, voice, speed, sentences, submitted, received, model, profile)
+                if submitted is None:
+                    return
+                audio_data = sink.clips.get()
+                if audio_data is _StreamSink.END:
+                    return
+                received += 1
+                if audio_data is not None:
+                    yield audio_data
+        finally:
+            self._close_stream(name)
+
+    async def astream(
+        self, voice: str, speed: float, text: str, model: str | None = None, profile: str | None = None
+    ) -> AsyncIterator:
+        """
+        stream() for asyncio servers: the same scheduling and cancellation, but
+        waiting for the next clip suspends the coroutine instead of blocking a
+        thread, so one event loop can serve many slow streaming clients.
+        """
+        sentences = split_sentences(text)
+        if not sentences:
+            return
+        loop = asyncio.get_running_loop()
+        clips: asyncio.Queue = asyncio.Queue()
+
+        def put(item) -> None:
+            # Called from the player thread; the loop may already be gone
+            try:
+                loop.call_soon_threadsafe(clips.put_nowait, item)
+            except RuntimeError:
+                pass
+
+        name = self._open_stream(_StreamSink(put))
+        submitted = received = 0
+        try:
+            while received < len(sentences):
+                submitted = self._feed_stream(name, voice, speed, sentences, submitted, received, model, profile)
+                if submitted is None:
+                    return
+                audio_data = await clips.get()
+                if audio_data is _StreamSink.END:
+                    return
+                received += 1
+                if audio_data is not None:
+                    yield audio_data
+        finally:
+            self._close_stream(name)
+
+    def _open_stream(self, sink: _StreamSink) -> str:
+        """Create a private channel for one stream; returns its name."""
+        self._ensure_started()
+        name = f"stream-{next(self._stream_ids)}"
+        with self._lock:
+            ch = self._get_channel(name, sink, implicit=False)
+            # A clip the consumer already has counts as played only once the sink returns
+            ch.buffer_size = self.buffer_size + 1
+        return name
+
+    def _feed_stream(self, name: str, voice: str, speed: float, sentences: list[str],
+                     submitted: int, received: int, model: str | None = None,
+                     profile: str | None = None) -> int | None:
+        """
+        Queue sentences until buffer_size are in flight, without blocking, so
+        astream() can call it on the event loop; the channel has room for them
+        all (see _open_stream). Returns the new submitted count, or None if the
+        Speech is stopping.
+        """
+        while submitted < len(sentences) and submitted - received < self.buffer_size:
+            admission = self.try_add_speech_line_parts(
+                voice, speed, sentences[submitted], channel=name, model=model, profile=profile
+            )
+            if admission.reason == "full":
+                break   # retried after the next clip
+            if not admission.accepted:
+                return None
+            submitted += 1
+        return submitted
+
+    def _close_stream(self, name: str) -> None:
+        """Cancel whatever a stream left in flight and retire its channel."""
+        self.cancel_channel(name)
+        self.close_channel(name)
+
+    # ── Cancellation ─────────────────────────────────────────────────────
+
+    def cancel(self, line_id: int, channel: str = DEFAULT_CHANNEL) -> bool:
+        """
+        Drop a queued line: pending lines never reach a worker, finished clips
+        are discarded, in-flight results are dropped when they complete, and a
+        clip that is playing is stopped if the sink supports stop().
+        Returns False if the line is unknown or already finished.
+        """
+        with self._lock:
+            ch = self._channels.get(channel)
+            if ch is None or not self._cancel_line(ch, line_id):
+                return False
+            stop_sink = self._sink_stopper(ch, line_id)
+        if stop_sink:
+            stop_sink()
         return True
 
-    def mark_complete(self) -> None:
-        """Signal that no more lines will be added. Required before wait_until_complete()."""
-        self._no_more_lines.set()
+    def cancel_channel(self, channel: str = DEFAULT_CHANNEL) -> int:
+        """Cancel every line queued, generating or playing in a channel. Returns how many."""
+        with self._lock:
+            ch = self._channels.get(channel)
+            if ch is None:
+                return 0
+            count, stop_sink = self._cancel_all(ch)
+        if stop_sink:
+            stop_sink()
+        return count
+
+    def _cancel_line(self, ch: Channel, line_id: int) -> bool:
+        """Mark one line cancelled and drop its task or clip. Caller holds the lock."""
+        if line_id == ch.playing_line:
+            # Already out of the queue; the caller stops the sink
+            return True
+        if line_id < ch.next_line or line_id > ch.line_counter or line_id in ch.cancelled:
+            return False
+        job = ch.jobs.pop(line_id, None)
+        if job is not None:
+            self._detach(job, ch, line_id)
+        ch.results.pop(line_id, None)
+        ch.cancelled.add(line_id)
+        if line_id == ch.next_line:
+            ch.clip_ready.notify()
+        return True
+
+    def _cancel_all(self, ch: Channel) -> tuple[int, Callable | None]:
+        """
+        Cancel everything in a channel. Returns how many lines were cancelled
+        and the sink stopper to call outside the lock. Caller holds the lock.
+        """
+        for line_id, job in list(ch.jobs.items()):
+            self._detach(job, ch, line_id)
+        ch.jobs.clear()
+        ch.urgent = False
+        ch.results.clear()
+        # The playing line is already out of the queue; it is only stopped
+        first = ch.next_line + (ch.playing_line == ch.next_line)
+        waiting = set(range(first, ch.line_counter + 1)) - ch.cancelled
+        ch.cancelled.update(waiting)
+        ch.clip_ready.notify()
+        stop_sink = self._sink_stopper(ch, ch.playing_line)
+        return len(waiting) + (stop_sink is not None), stop_sink
+
+    def _detach(self, job: _Job, ch: Channel, line_id: int) -> None:
+        """
+        Remove a cancelled slot from its job. A pending job nobody waits on any
+        more is unscheduled; a running one is discarded when it finishes. A
+        pending job whose owner drops out but that other lines still share
+        moves to one of their channels. Caller holds the lock.
+        """
+        job.slots.remove((ch, line_id))
+        if job.running:
+            return
+        if job.slots:
+            if job.owner is ch and job.first_line(ch) is None:
+                self._rehome(job)
+            return
+        job.owner.pending.remove(job)
+        self._pending_count -= 1
+        if self._jobs.get(job.key) is job:
+            del self._jobs[job.key]
+
+    def _rehome(self, job: _Job) -> None:
+        """
+        Move a pending job out of the queue of an owner that no longer waits
+        on it, into the queue of a channel that still does, ahead of that
+        channel's later lines, or whichever sharing channel reaches it first.
+        Caller holds the lock.
+        """
+        owner = job.owner
+        position = owner.pending.index(job)
+        if owner.urgent and position == 0:
+            owner.urgent = False
+        del owner.pending[position]
+        ch = job.slots[0][0]
+        line = job.first_line(ch)
+        if not ch.pending:
+            ch.vtime = max(ch.vtime, self._vclock)
+        # A barge-in line at the head stays there
+        start = 1 if ch.urgent else 0
+        index = next((i for i in range(start, len(ch.pending)) if ch.pending[i].first_line(ch) > line),
+                     len(ch.pending))
+        ch.pending.insert(index, job)
+        job.owner = ch
+        for other, _ in job.slots:
+            self._adopt(job, other)
+
+    @staticmethod
+    def _sink_stopper(ch: Channel, line_id: int | None) -> Callable | None:
+        """The sink's stop() if `line_id` is the clip playing right now. Caller holds the lock."""
+        if line_id is None or ch.playing_line != line_id:
+            return None
+        return getattr(ch.sink, "stop", None)
+
+    def queue_depth(self, channel: str | None = None) -> int:
+        """Lines queued but not yet played, in one channel or (None) across all channels."""
+        with self._lock:
+            if channel is not None:
+                ch = self._channels.get(channel)
+                return ch.queue_depth() if ch else 0
+            return sum(ch.queue_depth() for ch in self._channels.values())
+
+    def coalescing_stats(self) -> dict:
+        """
+        How many admitted lines shared another line's synthesis: attached to a
+        pending or running job (inflight_hits) or served a recent clip
+        (cache_hits), plus the clip cache's fill and size.
+        """
+        with self._lock:
+            return {
+                "lines": int(self._m_lines.value()),
+                "inflight_hits": self._dedup_hits - self._cache_hits,
+                "cache_hits": self._cache_hits,
+                "cache_clips": len(self._recent),
+                "cache_size": self.dedup_cache_size,
+            }
+
+    def preprocess_stats(self) -> dict:
+        """Preprocessed-sentence cache stats (see kittentts.preprocess.SentenceCache.stats())."""
+        return SENTENCE_CACHE.stats()
+
+    def batch_stats(self) -> dict | None:
+        """Micro-batching stats (see MicroBatcher.stats()), or None when batching is off."""
+        return self._batcher.stats() if self._batcher else None
+
+    # ── Completion and shutdown ──────────────────────────────────────────
+
+    def mark_complete(self, channel: str | None = None) -> None:
+        """
+        Signal that no more lines will be added to a channel, or (None) to any
+        channel. Required before wait_until_complete().
+        """
+        with self._lock:
+            targets = list(self._channels.values()) if channel is None else [self._channels.get(channel)]
+            for ch in targets:
+                if ch is not None:
+                    ch.no_more_lines = True
+                    # Wake the player in case it is already idle with nothing left to play
+                    ch.clip_ready.notify()
 
     def wait_until_complete(self) -> None:
         """
-        Block until all queued lines have been played.
+        Block until all queued lines in every channel have been played.
         Call mark_complete() first if you're done adding lines.
         """
         self._ensure_started()
-        self._no_more_lines.set()
-        self._task_queue.join()
-        # Stop workers
-        for _ in range(self.num_workers):
-            self._task_queue.put(None)
+        self.mark_complete()
+        with self._lock:
+            while not all(ch.is_drained() for ch in self._channels.values()) and not self._stopping:
+                self._all_played.wait()
+        self._stop_threads()
+
+    def _stop_threads(self) -> None:
+        """Wake every thread with the stop flag set and join them."""
+        with self._lock:
+            self._stopping = True
+            self._work_ready.notify_all()
+            self._all_played.notify_all()
+            for ch in self._channels.values():
+                ch.clip_ready.notify_all()
+                ch.space_ready.notify_all()
         for t in self._worker_threads:
             t.join()
-        if self._player_thread:
-            self._player_thread.join()
-        self._all_played.wait()
+        for t in self._player_threads:
+            t.join()
+        if self._batcher:
+            self._batcher.close()
 
     def shutdown(self) -> None:
-        """Stop workers and cleanup resources."""
-        self._shutdown.set()
-        self._no_more_lines.set()
-        for _ in range(self.num_workers):
-            try:
-                self._task_queue.put(None)
-            except Exception:
-                pass
-        for t in self._worker_threads:
-            t.join(timeout=2.0)
-        if self._player_thread:
-            self._player_thread.join(timeout=2.0)
+        """Stop workers and cleanup resources. Lines not yet played are dropped."""
+        with self._lock:
+            for ch in self._channels.values():
+                ch.no_more_lines = True
+                ch.pending.clear()
+                ch.jobs.clear()
+            self._jobs.clear()
+            self._pending_count = 0
+        self._stop_threads()
 
     def __enter__(self) -> "Speech":
         return self
@@ -0,0 +1,104 @@
+"""
+Fixtures for the Speech tests: a fake model and recording sinks, so the
+scheduling code runs without a model download or a sound device.
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+
+import pytest
+
+from speech import Speech
+
+
+class FakeModel:
+    """
+    Stands in for KittenTTS: each line's "audio" is a one-element list
+    holding its text. Close `gate` to hold every generate() call until it
+    opens again, so tests can fill queues while the workers are busy.
+    """
+
+    def __init__(self, delay: float = 0.0):
+        self.delay = delay
+        self.gate = threading.Event()
+        self.gate.set()
+        self.calls: list[str] = []      # texts, in the order generation started
+        self._lock = threading.Lock()
+
+    def generate(self, text, voice="Leo", speed=1.0, profile=None):
+        with self._lock:
+            self.calls.append(text)
+        self.gate.wait(10)
+        if self.delay:
+            time.sleep(self.delay)
+        return [text]
+
+
+class RecordingSink:
+    """Channel sink that records the text of each clip it plays, in order."""
+
+    def __init__(self):
+        self.played: list[str] = []
+        self._cond = threading.Condition()
+
+    def __call__(self, audio_data, sample_rate: int) -> None:
+        with self._cond:
+            self.played.append(audio_data[0])
+            self._cond.notify_all()
+
+    def wait_for(self, count: int, timeout: float = 5.0) -> list[str]:
+        """Block until `count` clips have played (or the timeout passes); returns what played."""
+        with self._cond:
+            self._cond.wait_for(lambda: len(self.played) >= count, timeout)
+            return list(self.played)
+
+
+class FakeSpeech(Speech):
+    """Speech whose workers all use one FakeModel."""
+
+    def __init__(self, model: FakeModel, **kwargs):
+        self.fake_model = model
+        super().__init__(**kwargs)
+
+    def _load_model(self):
+        return self.fake_model
+
+
+def wait_until(predicate, timeout: float = 5.0) -> bool:
+    """Poll predicate() until it is true or the timeout passes; returns its last value."""
+    deadline = time.perf_counter() + timeout
+    while not predicate():
+        if time.perf_counter() > deadline:
+            return False
+        time.sleep(0.005)
+    return True
+
+
+@pytest.fixture
+def model() -> FakeModel:
+    return FakeModel()
+
+
+@pytest.fixture
+def sink() -> RecordingSink:
+    return RecordingSink()
+
+
+@pytest.fixture
+def make_speech(model, sink):
+    """Factory for FakeSpeech instances (default sink: `sink`); all are shut down after the test."""
+    created = []
+
+    def make(**kwargs) -> FakeSpeech:
+        kwargs.setdefault("sink", sink)
+        kwargs.setdefault("speed_offset", 0.0)
+        s = FakeSpeech(model, **kwargs)
+        created.append(s)
+        return s
+
+    yield make
+    model.gate.set()
+    for s in created:
+        s.shutdown()
@@ -0,0 +1,110 @@
+"""
+MicroBatcher grouping: rows share a model call only when they match in token
+count and speed. Runs on a fake model, so no model download is needed; the
+check against the real graph runs only when the model is already in the
+Hugging Face cache.
+"""
+
+from __future__ import annotations
+
+import json
+import threading
+
+import numpy as np
+import pytest
+
+from kittentts.batcher import MicroBatcher
+from kittentts.onnx_model import KittenTTS_1_Onnx, row_lengths
+
+REAL_MODEL = "KittenML/kitten-tts-nano-0.8-fp32"
+
+
+class FakeModel:
+    """Prepares inputs like KittenTTS_1_Onnx (one token per character) and records each run_batch call."""
+
+    batching = True
+
+    def __init__(self):
+        self.calls: list[list[tuple[int, float]]] = []
+
+    def text_chunks(self, text, clean_text=True, profile=None):
+        return [text]
+
+    def _prepare_inputs(self, text, voice, speed=1.0):
+        return {
+            "input_ids": np.zeros((1, len(text)), dtype=np.int64),
+            "style": np.zeros((1, 4), dtype=np.float32),
+            "speed": np.array([speed], dtype=np.float32),
+        }
+
+    def run_batch(self, batch_inputs):
+        self.calls.append([(b["input_ids"].shape[1], round(float(b["speed"][0]), 3)) for b in batch_inputs])
+        return [np.full(3, b["input_ids"].shape[1], dtype=np.float32) for b in batch_inputs]
+
+
+def test_rows_are_grouped_by_token_count_and_speed():
+    model = FakeModel()
+    batches = []
+    batcher = MicroBatcher(model, window_ms=200, max_batch=4)
+    batcher.batch_observer = lambda sizes, delays: batches.append((sorted(sizes), len(delays)))
+    requests = [("abc", 1.0), ("xyz", 1.0), ("def", 1.2), ("ab", 1.0)]
+    results = {}
+    threads = [
+        threading.Thread(target=lambda t=text, s=speed: results.setdefault(t, batcher.generate(t, speed=s)))
+        for text, speed in requests
+    ]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    batcher.close()
+
+    assert sorted(model.calls) == [[(2, 1.0)], [(3, 1.0), (3, 1.0)], [(3, 1.2)]]
+    assert batches == [([1, 1, 2], 4)]
+    assert all(results[text][0] == len(text) for text, _ in requests)
+    assert batcher.stats()["model_calls"] == 3
+
+
+def test_row_lengths_follow_the_durations_output():
+    # Rows of 4 and 6 frames at 10 samples a frame: the first is padded to 60
+    durations = np.array([[1, 2, 1], [2, 2, 2]], dtype=np.int64)
+    audio = np.ones((2, 60), dtype=np.float32)
+    assert row_lengths(audio, durations, 2) == [40, 60]
+    assert row_lengths(audio[:, None, :], durations, 2) == [40, 60]
+    # Not one row per input, or an output that is not whole frames
+    assert row_lengths(audio[0], durations, 2) is None
+    assert row_lengths(audio, durations.ravel(), 2) is None
+    assert row_lengths(audio[:, :55], durations, 2) is None
+
+
+def _real_model() -> KittenTTS_1_Onnx:
+    """The real model from the Hugging Face cache; skips the test if it was never downloaded."""
+    hub = pytest.importorskip("huggingface_hub")
+    try:
+        with open(hub.hf_hub_download(REAL_MODEL, "config.json", local_files_only=True)) as f:
+            config = json.load(f)
+        model_path = hub.hf_hub_download(REAL_MODEL, config["model_file"], local_files_only=True)
+        voices_path = hub.hf_hub_download(REAL_MODEL, config["voices"], local_files_only=True)
+    except Exception:
+        pytest.skip(f"{REAL_MODEL} is not in the Hugging Face cache")
+    return KittenTTS_1_Onnx(
+        model_path, voices_path,
+        speed_priors=config.get("speed_priors", {}), voice_aliases=config.get("voice_aliases", {}),
+    )
+
+
+def test_batched_rows_match_single_calls_on_the_real_model():
+    model = _real_model()
+    # Same text, so the same token count, but the voices give different durations
+    text = "The quick brown fox jumps over the lazy dog."
+    inputs = [model._prepare_inputs(text, voice) for voice in ("Bella", "Leo", "Kiki")]
+    alone = [model.run_batch([b])[0] for b in inputs]
+    batched = model.run_batch(inputs)
+
+    # Batches only when the graph says how long each row is
+    if model._duration_output is None:
+        assert not model.batching
+    for row, single in zip(batched, alone):
+        assert row.shape == single.shape
+        rms = float(np.sqrt(np.mean(np.square(row))))
+        assert 0.8 < rms / float(np.sqrt(np.mean(np.square(single)))) < 1.25
@@ -0,0 +1,53 @@
+"""
+Sentence-level preprocessing: process_sentences(), sentence_spans() and
+StreamingPreprocessor must give the same text as process() on the whole input.
+"""
+
+from __future__ import annotations
+
+import pytest
+
+from kittentts.preprocess import SentenceCache, StreamingPreprocessor, TextPreprocessor
+
+TEXTS = [
+    "Hello world. It costs $5! Is it 3:30 pm?",
+    "Chapter one.  The 1990s were long. Call 555-1234.",
+    "<b>Bold</b> text. More <i>text</i> here.",
+    # HTML-like spans across a sentence break
+    "a < 5. Then b > 3",
+    "x <b. c> y",
+    "First. <p>Second. Third</p> and more. Last!",
+]
+
+
+@pytest.mark.parametrize("text", TEXTS)
+def test_process_sentences_matches_process(text):
+    pp = TextPreprocessor()
+    cache = SentenceCache()
+    expected = pp.process(text)
+    assert pp.process_sentences(text, cache=cache) == expected
+    # Again, now served from the cache
+    assert pp.process_sentences(text, cache=cache) == expected
+
+
+@pytest.mark.parametrize("text", TEXTS)
+def test_sentence_spans_join_to_process(text):
+    pp = TextPreprocessor()
+    spans = pp.sentence_spans(text, cache=SentenceCache())
+    assert " ".join(out for _, _, out in spans) == pp.process(text)
+    for start, end, _ in spans:
+        assert 0 <= start < end <= len(text)
+
+
+@pytest.mark.parametrize("text", TEXTS)
+def test_streaming_matches_process(text):
+    pp = TextPreprocessor()
+    sp = StreamingPreprocessor(pp, cache=SentenceCache())
+    fragments = [text[i:i + 3] for i in range(0, len(text), 3)]
+    assert " ".join(sp.stream(fragments)) == pp.process(text)
+
+
+def test_tag_across_sentences_is_processed_whole():
+    pp = TextPreprocessor()
+    assert pp.process("a < 5. Then b > 3") == "a three"
+    assert pp.sentence_spans("x <b. c> y", cache=None) == [(0, 10, "x y")]
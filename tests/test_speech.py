@@ -0,0 +1,337 @@
+"""
+Speech scheduling: ordering, channels, fair queuing, barge-in, single-flight
+deduplication, deadlines and cancellation, plus idle latency and shutdown.
+Runs on a fake model and recording sinks (see conftest.py).
+"""
+
+from __future__ import annotations
+
+import asyncio
+import threading
+import time
+
+import pytest
+
+from conftest import RecordingSink, wait_until
+
+
+def add(s, text, channel="default", **kwargs):
+    """Queue one line without blocking; returns its Admission."""
+    return s.try_add_speech_line_parts("Leo", 1.0, text, channel=channel, **kwargs)
+
+
+def test_lines_play_in_order(make_speech, sink):
+    s = make_speech(num_workers=3, buffer_size=10)
+    for i in range(8):
+        assert add(s, f"line {i}").accepted
+    s.wait_until_complete()
+    assert sink.played == [f"line {i}" for i in range(8)]
+
+
+def test_idle_to_first_sample_latency(make_speech, sink):
+    """A line queued on an idle engine reaches the sink without waiting on a poll interval."""
+    s = make_speech(num_workers=2)
+    s.start()
+    time.sleep(0.3)
+    latencies = []
+    for i in range(5):
+        t0 = time.perf_counter()
+        assert add(s, f"hello {i}").accepted
+        assert len(sink.wait_for(i + 1)) == i + 1
+        latencies.append(time.perf_counter() - t0)
+        time.sleep(0.05)
+    assert max(latencies) < 0.1
+
+
+def test_idle_workers_use_no_cpu(make_speech, sink):
+    s = make_speech(num_workers=4)
+    assert add(s, "warm up").accepted
+    sink.wait_for(1)
+    t0 = time.process_time()
+    time.sleep(0.5)
+    assert time.process_time() - t0 < 0.1
+
+
+def test_shutdown_is_prompt(make_speech):
+    s = make_speech(num_workers=4)
+    s.start()
+    s.channel("other")
+    t0 = time.perf_counter()
+    s.shutdown()
+    assert time.perf_counter() - t0 < 1.0
+    assert not any(t.is_alive() for t in s._worker_threads + s._player_threads)
+
+
+def test_channels_keep_their_own_order_and_sink(make_speech):
+    a, b = RecordingSink(), RecordingSink()
+    s = make_speech(num_workers=3, buffer_size=10)
+    s.channel("a", sink=a)
+    s.channel("b", sink=b)
+    for i in range(5):
+        assert add(s, f"a{i}", channel="a").accepted
+        assert add(s, f"b{i}", channel="b").accepted
+    s.wait_until_complete()
+    assert a.played == [f"a{i}" for i in range(5)]
+    assert b.played == [f"b{i}" for i in range(5)]
+
+
+def test_busy_channel_does_not_starve_others(make_speech, model):
+    s = make_speech(num_workers=1, buffer_size=30)
+    s.channel("script", sink=RecordingSink())
+    s.channel("client", sink=RecordingSink())
+    model.gate.clear()
+    for i in range(20):
+        assert add(s, f"script {i}", channel="script").accepted
+    assert wait_until(lambda: model.calls == ["script 0"])
+    assert add(s, "client 0", channel="client").accepted
+    assert add(s, "client 1", channel="client").accepted
+    model.gate.set()
+    s.wait_until_complete()
+    assert model.calls.index("client 1") < 5
+
+
+def test_barge_in_cancels_the_channel_and_goes_first(make_speech, model, sink):
+    s = make_speech(num_workers=1, buffer_size=10)
+    other = RecordingSink()
+    s.channel("other", sink=other)
+    model.gate.clear()
+    assert add(s, "old 0").accepted
+    assert wait_until(lambda: model.calls == ["old 0"])
+    assert add(s, "other 0", channel="other").accepted
+    assert add(s, "old 1").accepted
+    assert add(s, "urgent", barge_in=True).accepted
+    model.gate.set()
+    s.wait_until_complete()
+    assert sink.played == ["urgent"]
+    assert model.calls[:2] == ["old 0", "urgent"]
+    assert other.played == ["other 0"]
+
+
+def test_identical_lines_share_one_synthesis(make_speech, model):
+    a, b = RecordingSink(), RecordingSink()
+    s = make_speech(num_workers=1, buffer_size=10)
+    s.channel("a", sink=a)
+    s.channel("b", sink=b)
+    model.gate.clear()
+    assert add(s, "busy", channel="a").accepted
+    assert wait_until(lambda: model.calls == ["busy"])
+    assert add(s, "same text", channel="a").accepted
+    assert add(s, "same text", channel="b").accepted
+    model.gate.set()
+    s.wait_until_complete()
+    assert model.calls.count("same text") == 1
+    assert a.played == ["busy", "same text"]
+    assert b.played == ["same text"]
+    assert s.coalescing_stats()["inflight_hits"] == 1
+
+
+def test_recent_clip_is_reused(make_speech, model, sink):
+    s = make_speech(num_workers=1)
+    assert add(s, "again").accepted
+    sink.wait_for(1)
+    assert add(s, "again").accepted
+    s.wait_until_complete()
+    assert sink.played == ["again", "again"]
+    assert model.calls == ["again"]
+    assert s.coalescing_stats()["cache_hits"] == 1
+
+
+def test_line_past_its_deadline_is_shed(make_speech, model, sink):
+    s = make_speech(num_workers=1, buffer_size=10)
+    model.gate.clear()
+    assert add(s, "first").accepted
+    assert wait_until(lambda: model.calls == ["first"])
+    assert add(s, "late", deadline=0.05).accepted
+    time.sleep(0.1)
+    model.gate.set()
+    s.wait_until_complete()
+    assert sink.played == ["first"]
+    assert "late" not in model.calls
+    assert s._pending_count == 0
+
+
+def test_deadline_that_cannot_be_met_is_refused(make_speech, model, sink):
+    model.delay = 0.02
+    s = make_speech(num_workers=1, buffer_size=10)
+    assert add(s, "seed the averages").accepted
+    sink.wait_for(1)
+    model.gate.clear()
+    for i in range(3):
+        assert add(s, f"queued {i}").accepted
+    admission = add(s, "hurry", deadline=0.001)
+    assert not admission.accepted and admission.reason == "deadline"
+    model.gate.set()
+
+
+def test_full_channel_refuses_without_blocking(make_speech, model):
+    s = make_speech(num_workers=1, buffer_size=2)
+    model.gate.clear()
+    assert add(s, "one").accepted
+    assert add(s, "two").accepted
+    t0 = time.perf_counter()
+    admission = add(s, "three")
+    assert time.perf_counter() - t0 < 0.05
+    assert not admission.accepted and admission.reason == "full"
+    assert admission.queue_depth == 2
+
+
+def test_cancel_pending_line(make_speech, model, sink):
+    s = make_speech(num_workers=1, buffer_size=10)
+    model.gate.clear()
+    ids = [add(s, f"line {i}").line_id for i in range(3)]
+    assert wait_until(lambda: model.calls == ["line 0"])
+    assert s.cancel(ids[1])
+    assert not s.cancel(999)
+    model.gate.set()
+    s.wait_until_complete()
+    assert sink.played == ["line 0", "line 2"]
+    assert "line 1" not in model.calls
+
+
+def test_blocking_add_waits_for_a_free_slot(make_speech, model, sink):
+    s = make_speech(num_workers=1, buffer_size=1)
+    model.gate.clear()
+    assert s.add_speech_line("Leo|1.0|first")
+    done = threading.Event()
+    threading.Thread(target=lambda: (s.add_speech_line("Leo|1.0|second"), done.set()), daemon=True).start()
+    assert not done.wait(0.1)
+    model.gate.set()
+    assert done.wait(2.0)
+    s.wait_until_complete()
+    assert sink.played == ["first", "second"]
+
+
+def test_cancelling_the_owner_of_a_shared_job_keeps_the_other_line(make_speech, model, sink):
+    """A stream that shares a line's synthesis and then goes away must not strand that line."""
+    s = make_speech(num_workers=1, buffer_size=10)
+    stream = RecordingSink()
+    s.channel("stream", sink=stream)
+    model.gate.clear()
+    assert add(s, "A").accepted
+    assert wait_until(lambda: model.calls == ["A"])
+    assert add(s, "C", channel="stream").accepted     # owns the job
+    for text in ("B1", "B2", "C"):
+        assert add(s, text).accepted
+    job = s._jobs[(None, "full", "Leo", 1.0, "C")]
+    assert job.owner.name == "stream" and len(job.slots) == 2
+
+    s.cancel_channel("stream")
+    s.close_channel("stream")
+    assert job.owner.name == "default"
+    model.gate.set()
+    assert sink.wait_for(4) == ["A", "B1", "B2", "C"]
+    assert wait_until(lambda: s._pending_count == 0)
+    s.wait_until_complete()
+    assert stream.played == []
+
+
+def test_cancelling_a_channel_that_adopted_a_job_keeps_the_original_line(make_speech, model, sink):
+    """A stream adopts a line deep in the default backlog, then is cancelled: the line still plays."""
+    s = make_speech(num_workers=1, buffer_size=10)
+    stream = RecordingSink()
+    s.channel("stream", sink=stream)
+    model.gate.clear()
+    assert add(s, "A").accepted
+    assert wait_until(lambda: model.calls == ["A"])
+    for text in ("B1", "B2", "C"):
+        assert add(s, text).accepted
+    assert add(s, "C", channel="stream").accepted
+    job = s._jobs[(None, "full", "Leo", 1.0, "C")]
+    assert job.owner.name == "stream"
+
+    s.cancel_channel("stream")
+    assert job.owner.name == "default"
+    assert list(s._channels["default"].pending) == [s._channels["default"].jobs[i] for i in (2, 3, 4)]
+    model.gate.set()
+    assert sink.wait_for(4) == ["A", "B1", "B2", "C"]
+    assert wait_until(lambda: s._pending_count == 0)
+    s.wait_until_complete()
+    assert stream.played == []
+    assert model.calls.count("C") == 1
+
+
+def test_line_for_a_closed_channel_still_draining_reuses_it(make_speech, model):
+    a = RecordingSink()
+    s = make_speech(num_workers=1, buffer_size=10)
+    s.channel("a", sink=a)
+    model.gate.clear()
+    assert add(s, "a0", channel="a").accepted
+    assert wait_until(lambda: model.calls == ["a0"])
+    assert add(s, "a1", channel="a").accepted
+    s.close_channel("a")
+    assert add(s, "a2", channel="a").accepted
+    model.gate.set()
+    assert a.wait_for(3) == ["a0", "a1", "a2"]
+    assert wait_until(lambda: s._pending_count == 0)
+    s.wait_until_complete()
+
+
+def test_idle_implicit_channel_is_retired(make_speech, sink):
+    s = make_speech(num_workers=1, channel_idle_s=0.1)
+    assert add(s, "hello", channel="client-1").accepted
+    sink.wait_for(1)
+    player = s._channels["client-1"].player_thread
+    assert wait_until(lambda: not player.is_alive())
+    assert "client-1" not in s.channel_names()
+    assert add(s, "again", channel="client-1").accepted
+    assert sink.wait_for(2) == ["hello", "again"]
+
+
+def test_channels_beyond_the_cap_are_refused(make_speech, model):
+    s = make_speech(num_workers=1, max_channels=2)
+    model.gate.clear()
+    assert add(s, "one", channel="c1").accepted
+    assert add(s, "two", channel="c2").accepted
+    admission = add(s, "three", channel="c3")
+    assert not admission.accepted and admission.reason == "channels"
+    assert add(s, "more", channel="c1").accepted
+    assert s.channel("explicit") is not None
+
+
+def test_worker_sleeps_when_the_pending_count_is_stale(make_speech, sink):
+    """A count that disagrees with the queues is corrected instead of keeping a worker spinning."""
+    s = make_speech(num_workers=2)
+    assert add(s, "warm up").accepted
+    sink.wait_for(1)
+    with s._lock:
+        s._pending_count = 1
+        s._work_ready.notify_all()
+    assert wait_until(lambda: s._pending_count == 0)
+    t0 = time.process_time()
+    time.sleep(0.3)
+    assert time.process_time() - t0 < 0.1
+    assert add(s, "still works").accepted
+    assert sink.wait_for(2) == ["warm up", "still works"]
+
+
+def test_max_batch_stays_off_for_a_model_that_cannot_batch(make_speech, sink):
+    # FakeModel has no per-token durations, so batched rows could not be cut to length
+    s = make_speech(max_batch=4)
+    s.start()
+    assert s.max_batch == 1
+    assert s.batch_stats() is None
+    assert add(s, "hello").accepted
+    assert sink.wait_for(1) == ["hello"]
+
+
+TEXT = " ".join(f"Sentence {i}." for i in range(12))
+
+
+def test_stream_yields_every_sentence_in_order(make_speech):
+    s = make_speech(num_workers=3, buffer_size=2)
+    assert [clip[0] for clip in s.stream("Leo", 1.0, TEXT)] == [f"Sentence {i}." for i in range(12)]
+    assert wait_until(lambda: not any(name.startswith("stream-") for name in s.channel_names()))
+
+
+def test_astream_yields_every_sentence_in_order(make_speech):
+    s = make_speech(num_workers=3, buffer_size=2)
+
+    async def collect():
+        return [clip[0] async for clip in s.astream("Leo", 1.0, TEXT)]
+
+    assert asyncio.run(collect()) == [f"Sentence {i}." for i in range(12)]
+
+
+def test_player_timeout_is_accepted_but_deprecated(make_speech):
+    with pytest.warns(DeprecationWarning, match="player_timeout"):
+        make_speech(player_timeout=10.0)